@@ -2,7 +2,7 @@ from django.apps import AppConfig
 
 """
 Configures the API piece of the application, setting its name and the type of default primary key used when creating 
-models.
+models. Once the application is ready, log messages are moved onto a queue written by a separate thread.
 
 Generated by 'django-admin startproject' using Django 5.0.1.
 """
@@ -11,3 +11,7 @@ Generated by 'django-admin startproject' using Django 5.0.1.
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from api import log_queue
+        log_queue.start_queue_logging()
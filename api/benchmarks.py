@@ -0,0 +1,314 @@
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.db import connection
+
+from api import services, synthetic
+from api.models import Course
+from api.slow_queries import fingerprint
+
+logger = logging.getLogger("benchmarks")
+
+"""
+Measures how long every service function and upload path takes on synthetic campuses of increasing size. Each function
+is timed several times against the same campus, recording the fastest, median, and slowest run along with the number of
+database queries made, and the results are collected into a report that later runs can be compared against. The plan of
+every distinct query is also captured, flagging queries that scan a whole table or sort without an index.
+
+Author: Ryan Johnson
+"""
+
+# Version of the benchmark report layout, increased whenever the layout changes
+REPORT_VERSION = 2
+
+
+class QueryCounter:
+    """
+    Counts the queries executed through a database connection while installed as one of its execute wrappers, keeping
+    the SQL and parameters of each so that their plans can be explained once timing has finished. Unlike the
+    connection's query log, the count isn't limited by the number of queries the log holds.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        if not many:
+            self.statements.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+def explain_query(sql: str, params) -> {}:
+    """
+    Captures the plan the database uses for a query, and finds any tables read in full along with whether the rows are
+    sorted without the help of an index (a filesort within MySQL, or a temporary B-tree within SQLite).
+
+    :param sql:    string containing the SQL of the query
+    :param params: parameters of the query
+    :return:       dictionary holding the plan, the tables scanned in full, and whether the query sorts its rows. The
+                   plan is None for databases whose plans can't be read.
+    """
+    vendor = connection.vendor
+    with connection.cursor() as cursor:
+        if vendor == "mysql":
+            cursor.execute(f"EXPLAIN {sql}", params)
+            columns = [column[0] for column in cursor.description]
+            plan = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            full_scans = [row["table"] for row in plan if row.get("type") == "ALL"]
+            filesort = any("Using filesort" in (row.get("Extra") or "") for row in plan)
+        elif vendor == "sqlite":
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            plan = [row[-1] for row in cursor.fetchall()]
+            full_scans = [detail.split()[1] for detail in plan
+                          if detail.startswith("SCAN ") and " USING " not in detail]
+            filesort = any("USE TEMP B-TREE" in detail for detail in plan)
+        elif vendor == "postgresql":
+            cursor.execute(f"EXPLAIN {sql}", params)
+            plan = [row[0] for row in cursor.fetchall()]
+            full_scans = [line.split("Seq Scan on ")[1].split()[0] for line in plan if "Seq Scan on " in line]
+            filesort = any(line.strip().lstrip("-> ").startswith("Sort") for line in plan)
+        else:
+            return {"plan": None, "fullScans": [], "filesort": False}
+    return {"plan": plan, "fullScans": full_scans, "filesort": filesort}
+
+
+def explain_queries(statements: []) -> []:
+    """
+    Captures the plan of every distinct query within a list of executed statements. Queries are told apart by their
+    fingerprint, so a query run many times with different values is only explained once. Only SELECT queries are
+    explained, since explaining a statement that changes data may also run it.
+
+    :param statements: list of tuples holding the SQL and parameters of every executed statement
+    :return:           list of dictionaries holding the fingerprint, number of executions, and plan of each query
+    """
+    queries = {}
+    for sql, params in statements:
+        if not sql.lstrip().upper().startswith("SELECT"):
+            continue
+        query = queries.setdefault(fingerprint(sql), {"sql": sql, "params": params, "executions": 0})
+        query["executions"] += 1
+
+    plans = []
+    for query_fingerprint, query in queries.items():
+        try:
+            plan = explain_query(query["sql"], query["params"])
+        except Exception as e:
+            logger.warning("explain_queries - Plan could not be captured for %s: %s", query_fingerprint, e)
+            plan = {"plan": None, "fullScans": [], "filesort": False, "error": str(e)}
+        plans.append({"fingerprint": query_fingerprint, "executions": query["executions"], **plan})
+    return plans
+
+
+def time_function(function, repeat: int, clear_cache: bool = True, explain: bool = False) -> {}:
+    """
+    Runs the specified function several times, timing each run and counting the database queries made by the final run.
+    The cache is cleared before every run by default, so that the result is calculated each time. The plans of the
+    queries made by the final run may also be captured, which happens after timing has finished.
+
+    :param function:    callable taking no arguments
+    :param repeat:      number of times the function is run
+    :param clear_cache: whether the cache is cleared before every run
+    :param explain:     whether the plan of every distinct query made by the final run is captured
+    :return:            dictionary holding the median, fastest, and slowest run in seconds along with the number of
+                        queries made and, if requested, their plans
+    """
+    timings = []
+    for _ in range(repeat):
+        if clear_cache:
+            cache.clear()
+        queries = QueryCounter()
+        with connection.execute_wrapper(queries):
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+    result = {
+        "medianSeconds": round(statistics.median(timings), 6),
+        "minSeconds": round(min(timings), 6),
+        "maxSeconds": round(max(timings), 6),
+        "queries": queries.count,
+    }
+    if explain:
+        result["plans"] = explain_queries(queries.statements)
+    return result
+
+
+def find_sample_arguments(buildings: []) -> {}:
+    """
+    Chooses the arguments passed to the service functions being timed, using a classroom holding courses and the first
+    time block on Monday so that each function has data to work through.
+
+    :param buildings: list of building codes on the campus
+    :return:          dictionary holding the classroom, day, start and end time, and subset of buildings to query
+    """
+    classroom = (Course.objects.exclude(classroom__isnull=True).exclude(classroom__building="OFCP")
+                 .values_list('classroom__name', flat=True).order_by('classroom__name').first())
+    time_blocks = services.calculate_time_blocks('all', services.resolve_term()[0])
+    start_time, end_time = time_blocks.get('M', [["08:00:00", "08:50:00"]])[0]
+    return {
+        "classroom": classroom,
+        "day": "M",
+        # Times are passed in the HH:MM format sent by the front end
+        "start_time": start_time[:5],
+        "end_time": end_time[:5],
+        "buildings": buildings[:3],
+    }
+
+
+def benchmark_services(buildings: [], repeat: int, explain: bool = False) -> {}:
+    """
+    Times every service function used by the views against the campus currently in the database.
+
+    :param buildings: list of building codes on the campus
+    :param repeat:    number of times each function is run
+    :param explain:   whether the plans of the queries made by each function are captured
+    :return:          dictionary mapping the name of each benchmark to its timings
+    """
+    sample = find_sample_arguments(buildings)
+    day, start_time, end_time = sample["day"], sample["start_time"], sample["end_time"]
+    benchmarks = {
+        "calculate_time_blocks": lambda: services.calculate_time_blocks('all', services.resolve_term()[0]),
+        "calculate_number_classes": lambda: services.calculate_number_classes('all'),
+        "calculate_number_classes_buildings": lambda: services.calculate_number_classes(sample["buildings"]),
+        "get_all_buildings": services.get_all_buildings,
+        "get_used_classrooms": lambda: services.get_used_classrooms(day, start_time, end_time),
+        "get_used_classrooms_buildings": lambda: services.get_used_classrooms(day, start_time, end_time,
+                                                                              sample["buildings"]),
+        "get_classroom_courses": lambda: services.get_classroom_courses(sample["classroom"]),
+        "get_past_time": lambda: services.get_past_time(day, end_time),
+        "get_next_time": lambda: services.get_next_time(day, start_time),
+        "get_terms": services.get_terms,
+    }
+    results = {name: time_function(function, repeat, explain=explain) for name, function in benchmarks.items()}
+    # Cached results are also timed, measuring the cost of a request once the result has been calculated
+    services.calculate_number_classes('all')
+    results["calculate_number_classes_cached"] = time_function(lambda: services.calculate_number_classes('all'),
+                                                               repeat, clear_cache=False)
+    return results
+
+
+def benchmark_uploads(sections: int, buildings: [], rooms_per_building: int, repeat: int, seed: int,
+                      explain: bool = False) -> {}:
+    """
+    Times every upload path using spreadsheets holding a synthetic campus of the same size as the one in the database.
+    Each upload replaces the schedule or classrooms of the campus with ones of the same size, so later scales are
+    unaffected.
+
+    :param sections:           number of course sections within the uploaded schedule
+    :param buildings:          list of building codes on the campus
+    :param rooms_per_building: number of classrooms within each building
+    :param repeat:             number of times each upload is run
+    :param seed:               seed for the random campus data
+    :param explain:            whether the plans of the queries made by each upload are captured
+    :return:                   dictionary mapping the name of each benchmark to its timings
+    """
+    rng = random.Random(seed)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        classroom_path = os.path.join(directory, "classrooms.csv")
+        synthetic.build_classroom_sheet(buildings, rooms_per_building, rng).to_csv(classroom_path, index=False)
+        schedule = synthetic.build_schedule_frame(sections, rng, buildings, rooms_per_building)
+        schedule_path = os.path.join(directory, "schedule.csv")
+        schedule.to_csv(schedule_path, index=False)
+        workbook_path = os.path.join(directory, "schedule.xlsx")
+        schedule.to_excel(workbook_path, index=False)
+
+        def upload(function, file_path):
+            with open(file_path, "rb") as file:
+                return function(file)
+
+        benchmarks = {
+            "validate_upload_schedule": lambda: upload(lambda file: services.validate_upload(file, "schedule"),
+                                                       schedule_path),
+            "upload_schedule_data_csv": lambda: upload(services.upload_schedule_data, schedule_path),
+            "upload_schedule_data_xlsx": lambda: upload(services.upload_schedule_data, workbook_path),
+            "upload_schedule_batch": lambda: services.upload_schedule_batch([("schedule.csv", schedule_path)]),
+            "upload_classroom_data": lambda: upload(services.upload_classroom_data, classroom_path),
+        }
+        for name, function in benchmarks.items():
+            results[name] = time_function(function, repeat, explain=explain)
+            rows = len(buildings) * rooms_per_building if name == "upload_classroom_data" else sections
+            results[name]["rowsPerSecond"] = round(rows / results[name]["medianSeconds"], 1)
+    return results
+
+
+def run_benchmarks(scales: [], buildings: int, rooms_per_building: int, repeat: int, seed: int,
+                   include_uploads: bool = True, explain: bool = True) -> {}:
+    """
+    Generates a synthetic campus for every scale and times each service function and upload path against it. The
+    data within the database is replaced by each campus, so this should only be run against a database holding no real
+    data.
+
+    :param scales:             list holding the number of course sections of each campus
+    :param buildings:          number of buildings on each campus
+    :param rooms_per_building: number of classrooms within each building
+    :param repeat:             number of times each function is run
+    :param seed:               seed for the random campus data
+    :param include_uploads:    whether the upload paths are also timed
+    :param explain:            whether the plans of the queries made by every benchmark are captured
+    :return:                   dictionary holding the report, with the campus, timings, and flagged query plans of every
+                               scale
+    """
+    report = {
+        "version": REPORT_VERSION,
+        "createdAt": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "database": connection.vendor,
+        "repeat": repeat,
+        "seed": seed,
+        "scales": {},
+    }
+    building_codes = synthetic.campus_buildings(buildings)
+    for sections in scales:
+        campus = synthetic.generate_campus(sections, buildings, rooms_per_building, seed=seed)
+        results = benchmark_services(building_codes, repeat, explain)
+        if include_uploads:
+            results.update(benchmark_uploads(sections, building_codes, rooms_per_building, repeat, seed, explain))
+        report["scales"][str(sections)] = {"campus": campus, "benchmarks": results,
+                                           "flaggedQueries": find_flagged_queries(results)}
+        logger.info("run_benchmarks - Benchmarks finished for %s sections", sections)
+    return report
+
+
+def find_flagged_queries(results: {}) -> []:
+    """
+    Lists every query whose plan scans a whole table or sorts its rows without an index, along with the benchmarks
+    making the query.
+
+    :param results: dictionary mapping the name of each benchmark to its timings and query plans
+    :return:        list of dictionaries holding the fingerprint, tables scanned in full, whether the query sorts its
+                    rows, and the benchmarks making each flagged query
+    """
+    flagged = {}
+    for name, result in results.items():
+        for plan in result.get("plans", []):
+            if plan["fullScans"] or plan["filesort"]:
+                query = flagged.setdefault(plan["fingerprint"], {"fingerprint": plan["fingerprint"],
+                                                                 "fullScans": plan["fullScans"],
+                                                                 "filesort": plan["filesort"], "benchmarks": []})
+                query["benchmarks"].append(name)
+    return list(flagged.values())
+
+
+def compare_reports(report: {}, baseline: {}) -> {}:
+    """
+    Adds the median time of every benchmark within an earlier report to the matching benchmark of the new report, along
+    with the ratio between the new and earlier time. Ratios above 1 mean the benchmark has become slower.
+
+    :param report:   dictionary holding the new report
+    :param baseline: dictionary holding the earlier report
+    :return:         the new report, with the earlier timings added
+    """
+    for sections, scale in report["scales"].items():
+        baseline_benchmarks = baseline.get("scales", {}).get(sections, {}).get("benchmarks", {})
+        for name, result in scale["benchmarks"].items():
+            if name in baseline_benchmarks and baseline_benchmarks[name]["medianSeconds"] > 0:
+                result["baselineMedianSeconds"] = baseline_benchmarks[name]["medianSeconds"]
+                result["change"] = round(result["medianSeconds"] / baseline_benchmarks[name]["medianSeconds"], 3)
+    return report
@@ -0,0 +1,269 @@
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.db import connections, transaction
+from django.utils import timezone
+
+from api import services
+from api.models import DataSource, Term, UploadJob
+from api.upload_handlers import MappedFile
+from api.upload_stages import UploadStages
+
+logger = logging.getLogger("jobs")
+
+"""
+Runs spreadsheet uploads in the background. Uploaded files are saved to disk and recorded as an UploadJob before being
+handed off to a pool of worker threads, allowing the HTTP request to return immediately. The worker records the
+progress of the import on the job, which the front end polls until the upload completes. Uploading a file identical to
+the one the current data was imported from is skipped entirely.
+
+Author: Ryan Johnson
+"""
+
+# Minimum number of seconds between progress updates written to the database while rows are being imported
+PROGRESS_UPDATE_INTERVAL = 0.5
+
+_executor = ThreadPoolExecutor(max_workers=settings.UPLOAD_JOB_WORKERS, thread_name_prefix="upload-job")
+
+
+def submit_upload(data_type: str, file) -> (UploadJob, bool):
+    """
+    Saves the uploaded file to disk and creates a job for importing it. The job is handed to the worker pool once the
+    current transaction commits, ensuring the worker is able to see the newly created job. If the file is identical to
+    the file the current data was uploaded from, no job is created and the job that uploaded the data is returned
+    instead, or None if that job no longer exists, leaving the database and any cached results untouched.
+
+    :param data_type: string specifying the type of spreadsheet being uploaded ('schedule' or 'classroom')
+    :param file:      uploaded file object received within the HTTP request
+    :return:          UploadJob object tracking the progress of the upload and a boolean specifying whether a new job
+                      was created
+    """
+    file_path, content_hash = save_upload(file)
+    identical, identical_job = find_identical_upload(data_type, content_hash)
+    if identical:
+        os.remove(file_path)
+        logger.info("submit_upload - %s is identical to the file the current data was read from", file.name)
+        return identical_job, False
+
+    job = UploadJob.objects.create(data_type=data_type, file_name=file.name, file_path=file_path,
+                                   content_hash=content_hash)
+    transaction.on_commit(lambda: _executor.submit(_run_in_worker, job.id))
+    logger.info("submit_upload - Upload job %s queued for %s", job.id, file.name)
+    return job, True
+
+
+def submit_batch_upload(files: []) -> (UploadJob, bool):
+    """
+    Saves several uploaded schedule files to disk and creates a single job for importing all of them together, as
+    described in submit_upload(). The batch is identified by a hash combining the hashes of every file, so uploading
+    the same batch of files again is skipped.
+
+    :param files: list of uploaded file objects received within the HTTP request
+    :return:      UploadJob object tracking the progress of the upload and a boolean specifying whether a new job was
+                  created
+    """
+    saved_files = [save_upload(file) for file in files]
+    file_names = [file.name for file in files]
+    content_hash = hashlib.sha256("".join(sorted(file_hash for _, file_hash in saved_files)).encode()).hexdigest()
+    identical, identical_job = find_identical_upload("schedule_batch", content_hash)
+    if identical:
+        for file_path, _ in saved_files:
+            os.remove(file_path)
+        logger.info("submit_batch_upload - Batch is identical to the files the current data was read from")
+        return identical_job, False
+
+    job = UploadJob.objects.create(data_type="schedule_batch", file_name=", ".join(file_names)[:255],
+                                   file_paths=[[name, path] for name, (path, _) in zip(file_names, saved_files)],
+                                   content_hash=content_hash)
+    transaction.on_commit(lambda: _executor.submit(_run_in_worker, job.id))
+    logger.info("submit_batch_upload - Upload job %s queued for %s files", job.id, len(files))
+    return job, True
+
+
+def find_identical_upload(data_type: str, content_hash: str) -> (bool, UploadJob):
+    """
+    Determines whether the currently loaded data of the specified type was read from a file with the specified hash.
+    Classroom data is compared against the hash of the latest classroom file. Single schedule uploads and batch
+    schedule uploads both replace course data, so these are considered together, with a schedule file only considered
+    identical while every term read from it still holds its hash. The stored hashes are used rather than the job
+    table, so neither uploads of other terms nor removing old jobs prevents an identical upload from being skipped.
+
+    :param data_type:    string specifying the type of spreadsheet being uploaded ('schedule' or 'classroom')
+    :param content_hash: string containing the SHA-256 hash of the uploaded file
+    :return:             boolean specifying whether the file is identical to the loaded data, and the UploadJob object
+                         that uploaded the identical file if it still exists
+    """
+    source_type = "schedule" if data_type in ["schedule", "schedule_batch"] else data_type
+    source = DataSource.objects.filter(data_type=source_type, content_hash=content_hash).select_related("job").first()
+    if source is None:
+        return False, None
+    if source_type == "schedule":
+        current_terms = Term.objects.filter(name__in=source.terms, content_hash=content_hash).count()
+        if not source.terms or current_terms != len(source.terms):
+            return False, None
+    return True, source.job
+
+
+def record_data_source(job: UploadJob, terms: []):
+    """
+    Records the file uploaded by a successful job as the source of the data it loaded. Schedule files store their hash
+    on each uploaded term, and any earlier schedule file whose terms were replaced is forgotten. Since classroom
+    uploads may change any classroom, the latest classroom file replaces any earlier one.
+
+    :param job:   UploadJob object that uploaded the file
+    :param terms: list of term names read from a schedule file
+    """
+    if job.data_type in ["schedule", "schedule_batch"]:
+        Term.objects.filter(name__in=terms).update(content_hash=job.content_hash)
+        replaced_sources = [source.id for source in DataSource.objects.filter(data_type="schedule")
+                            if source.content_hash != job.content_hash and set(source.terms) & set(terms)]
+        DataSource.objects.filter(id__in=replaced_sources).delete()
+        DataSource.objects.update_or_create(data_type="schedule", content_hash=job.content_hash,
+                                            defaults={"terms": terms, "job": job})
+    else:
+        DataSource.objects.filter(data_type=job.data_type).exclude(content_hash=job.content_hash).delete()
+        DataSource.objects.update_or_create(data_type=job.data_type, content_hash=job.content_hash,
+                                            defaults={"job": job})
+
+
+def save_upload(file) -> (str, str):
+    """
+    Writes the uploaded file to a temporary file on disk, keeping the extension of the original file so that the file
+    type can still be checked during the import. Files already streamed to disk by the upload handler are moved into
+    place using the hash calculated while they were received. Any other file is copied, with the SHA-256 hash of the
+    file calculated as each chunk is written.
+
+    :param file: uploaded file object received within the HTTP request
+    :return:     strings containing the path of the saved file and the hash of its contents
+    """
+    extension = os.path.splitext(file.name)[1]
+    descriptor, file_path = tempfile.mkstemp(suffix=extension, prefix="upload-", dir=settings.FILE_UPLOAD_TEMP_DIR)
+    if hasattr(file, "temporary_file_path") and getattr(file, "content_hash", None):
+        os.close(descriptor)
+        file_move_safe(file.temporary_file_path(), file_path, allow_overwrite=True)
+        logger.debug("save_upload - Moved %s to %s", file.name, file_path)
+        return file_path, file.content_hash
+
+    content_hash = hashlib.sha256()
+    with os.fdopen(descriptor, "wb") as destination:
+        for chunk in file.chunks():
+            content_hash.update(chunk)
+            destination.write(chunk)
+    logger.debug("save_upload - Saved %s to %s", file.name, file_path)
+    return file_path, content_hash.hexdigest()
+
+
+def _run_in_worker(job_id: int):
+    """
+    Entry point for the worker threads. Database connections opened by the worker are closed once the job finishes,
+    since worker threads are never cleaned up by Django's request handling.
+
+    :param job_id: ID of the UploadJob to run
+    """
+    try:
+        run_upload_job(job_id)
+    finally:
+        connections.close_all()
+
+
+def run_upload_job(job_id: int):
+    """
+    Imports the file saved for the specified job, recording the phase of the import and the number of rows processed
+    as it runs. The file is read through a memory map, so the parser reads directly from the saved file rather than
+    from a copy held in memory. Once the import finishes, the outcome of the upload and the measurements of each of its
+    stages are stored on the job, and the saved file is removed.
+
+    :param job_id: ID of the UploadJob to run
+    """
+    job = UploadJob.objects.get(id=job_id)
+    job.started_at = timezone.now()
+    job.phase = "reading"
+    job.save(update_fields=["started_at", "phase"])
+
+    last_update = 0.0
+    stages = UploadStages()
+
+    def progress(phase, rows_processed, rows_total):
+        # Progress is only written periodically, as writing every row would slow the import down considerably
+        nonlocal last_update
+        now = time.monotonic()
+        if phase == job.phase and rows_processed < rows_total and now - last_update < PROGRESS_UPDATE_INTERVAL:
+            return
+        last_update = now
+        job.phase = phase
+        job.rows_processed = rows_processed
+        job.rows_total = rows_total
+        UploadJob.objects.filter(id=job.id).update(phase=phase, rows_processed=rows_processed, rows_total=rows_total)
+
+    try:
+        if job.data_type == "schedule_batch":
+            success, missing_columns, summary = services.upload_schedule_batch(job.file_paths, progress, stages)
+        else:
+            with MappedFile(job.file_path) as file:
+                if job.data_type == "schedule":
+                    success, missing_columns, summary = services.upload_schedule_data(file, progress, stages)
+                else:
+                    success, missing_columns, summary = services.upload_classroom_data(file, progress, stages)
+        job.success = success
+        job.missing_columns = missing_columns or []
+        job.summary = summary
+        if success:
+            # Store the hash with the new data, allowing an identical upload to be skipped later on
+            record_data_source(job, list(summary.get("terms", [])))
+        job.phase = "complete" if success else "failed"
+    except Exception as e:
+        logger.exception("run_upload_job - Upload job %s failed while importing %s", job.id, job.file_name)
+        job.success = False
+        job.errors = job.errors + [str(e)]
+        job.phase = "failed"
+    finally:
+        for file_path in [job.file_path] + [path for _, path in job.file_paths]:
+            if file_path and os.path.exists(file_path):
+                os.remove(file_path)
+
+    job.stages = stages.stages
+    job.finished_at = timezone.now()
+    job.save(update_fields=["phase", "success", "missing_columns", "summary", "errors", "stages", "finished_at"])
+    logger.info("run_upload_job - Upload job %s finished with phase %s: %s", job.id, job.phase, job.file_name)
+
+
+def get_job_status(job_id: int) -> {}:
+    """
+    Returns a dictionary describing the current state of the specified upload job, including the throughput of the
+    import so far. If no job exists with the specified ID, None is returned.
+
+    :param job_id: ID of the UploadJob to describe
+    :return:       dictionary holding the phase, progress, throughput, and outcome of the upload, including the number
+                   of rows created, updated, or left unchanged and the time and memory taken by each stage
+    """
+    job = UploadJob.objects.filter(id=job_id).first()
+    if job is None:
+        logger.debug("get_job_status - No upload job found with ID %s", job_id)
+        return None
+
+    elapsed_seconds = 0.0
+    if job.started_at is not None:
+        elapsed_seconds = ((job.finished_at or timezone.now()) - job.started_at).total_seconds()
+    rows_per_second = job.rows_processed / elapsed_seconds if elapsed_seconds > 0 else 0.0
+
+    return {
+        "jobId": job.id,
+        "dataType": job.data_type,
+        "fileName": job.file_name,
+        "phase": job.phase,
+        "rowsProcessed": job.rows_processed,
+        "rowsTotal": job.rows_total,
+        "rowsPerSecond": round(rows_per_second, 2),
+        "elapsedSeconds": round(elapsed_seconds, 3),
+        "success": job.success,
+        "missingColumns": job.missing_columns,
+        "summary": job.summary,
+        "errors": job.errors,
+        "stages": job.stages,
+    }
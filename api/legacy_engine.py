@@ -0,0 +1,155 @@
+import logging
+
+from api.models import Course
+
+logger = logging.getLogger("legacy_engine")
+
+"""
+Contains the original implementations of the analytics calculations, which query the database separately for every day
+and time block. These still calculate the results served by the heatmap, used classroom, and classroom schedule
+services, while the set-based calculations in services.py, which read each calculation's courses in a fixed number of
+queries, run in their shadow until shadow.py shows that both produce the same results on real data.
+
+Author: Ryan Johnson
+"""
+
+# Abbreviations of the weekdays courses can be held on
+DAYS = ['M', 'T', 'W', 'th', 'F']
+
+
+def term_courses(term: str = None):
+    """
+    Returns a queryset containing all courses held during the specified term, or every course if no term is specified.
+
+    :param term: string containing the name of the term, or None to include courses from every term
+    :return:     queryset holding the courses held during the term
+    """
+    if term is None:
+        return Course.objects.all()
+    return Course.objects.filter(term=term)
+
+
+def calculate_time_blocks(buildings, term: str = None) -> {}:
+    """
+    Calculates every block of time in which there could be a different number of utilized classrooms, reading the start
+    and end times of every day with separate queries.
+
+    :param buildings: list of buildings to look within for possible time blocks ('all' includes all buildings)
+    :param term:      string containing the name of the term to look within (every term if None)
+    :return:          dictionary mapping each day holding courses to a list of its time blocks
+    """
+    building_time_blocks = {}
+    for day in DAYS:
+        courses = term_courses(term).filter(day__contains=day).exclude(classroom__building__in=["Unknown", "OFCP"])
+        if buildings != 'all':
+            courses = courses.filter(classroom__building__in=buildings)
+        start_times = [time[0].strftime("%H:%M:%S") for time in
+                       courses.values_list('start_time').distinct().exclude(start_time__isnull=True)]
+        end_times = [time[0].strftime("%H:%M:%S") for time in
+                     courses.values_list('end_time').distinct().exclude(end_time__isnull=True)]
+        start_end_times = sorted(set(start_times + end_times + ['06:00:00', '23:59:00']))
+        building_time_blocks[day] = [[start_end_times[i], start_end_times[i + 1]]
+                                     for i in range(0, len(start_end_times) - 1)]
+    return building_time_blocks
+
+
+def count_block_classrooms(buildings, term: str = None) -> []:
+    """
+    Counts the number of classrooms used during each time block, querying the courses running during every block
+    separately.
+
+    :param buildings: list of buildings to count classrooms within ('all' includes all buildings)
+    :param term:      string containing the name of the term to count classrooms within (every term if None)
+    :return:          list holding the time blocks and the number of classrooms used during each block
+    """
+    time_blocks = calculate_time_blocks(buildings, term)
+    if not time_blocks:
+        return [{}, {}]
+    all_num_classes = {}
+    for day, day_block_list in time_blocks.items():
+        day_num_classes = {}
+        for block_start_time, block_end_time in day_block_list:
+            block_courses = (term_courses(term).filter(day__contains=day, start_time__lte=block_start_time,
+                                                       end_time__gte=block_end_time)
+                             .exclude(classroom__isnull=True).exclude(classroom__building="Unknown")
+                             .exclude(classroom__building="OFCP"))
+            if buildings != 'all':
+                block_courses = block_courses.filter(classroom__building__in=buildings)
+            unique_classrooms = []
+            for course in block_courses:
+                if course.classroom.name not in unique_classrooms:
+                    unique_classrooms.append(course.classroom.name)
+            day_num_classes[block_start_time] = len(unique_classrooms)
+        all_num_classes[day] = day_num_classes
+    return [time_blocks, all_num_classes]
+
+
+def find_used_classrooms(day: str, start_time: str, end_time: str, buildings, term: str = None) -> {}:
+    """
+    Finds the classrooms used during a time block, reading the classroom and instructor of every course separately.
+
+    :param day:        string specifying which day to search within for used classrooms
+    :param start_time: string specifying the start time in which to search for used classrooms
+    :param end_time:   string specifying the time in which searching for used classrooms stops
+    :param buildings:  list of buildings to search within ('all' includes all buildings)
+    :param term:       string containing the name of the term to search within (every term if None)
+    :return:           dictionary mapping the name of every used classroom to the courses held in it
+    """
+    current_courses = (term_courses(term).filter(day__contains=day, start_time__lte=start_time,
+                                                   end_time__gte=end_time)
+                       .exclude(classroom__isnull=True).exclude(classroom__building__exact="OFCP"))
+    if buildings != 'all':
+        current_courses = current_courses.filter(classroom__building__in=buildings)
+    classrooms_dict = {}
+    for course in current_courses.order_by('classroom__building', 'classroom__room_num'):
+        instructor = course.instructor.name if course.instructor is not None else None
+        classrooms_dict.setdefault(course.classroom.name, []).append(
+            [course.name, instructor, course.classroom.occupancy, course.enrolled])
+    return classrooms_dict
+
+
+def calculate_classroom_time_blocks(classroom: str, term: str = None) -> {}:
+    """
+    Finds all possible time blocks used in the specified classroom, reading the start and end times of every day with
+    separate queries.
+
+    :param classroom: string representing the name of the classroom to be queried
+    :param term:      string containing the name of the term to look within (every term if None)
+    :return:          dictionary mapping every day to a list of its time blocks
+    """
+    classroom_time_blocks = {}
+    for day in DAYS:
+        courses = term_courses(term).filter(classroom__name=classroom, day__contains=day).exclude(start_time=None)
+        start_times = [time[0].strftime("%H:%M:%S") for time in courses.values_list('start_time').distinct()]
+        end_times = [time[0].strftime("%H:%M:%S") for time in courses.values_list('end_time').distinct()
+                     if time[0] is not None]
+        start_end_times = sorted(set(start_times + end_times + ['06:00:00', '23:59:00']))
+        classroom_time_blocks[day] = [[start_end_times[i], start_end_times[i + 1]]
+                                      for i in range(0, len(start_end_times) - 1)]
+    return classroom_time_blocks
+
+
+def find_classroom_courses(classroom: str, term: str = None) -> []:
+    """
+    Finds all courses taking place in the specified classroom, querying the courses running during every time block
+    separately.
+
+    :param classroom: string representing the name of the classroom to be queried
+    :param term:      string containing the name of the term to search within (every term if None)
+    :return:          list holding the time blocks and the courses running during each block
+    """
+    time_blocks = calculate_classroom_time_blocks(classroom, term)
+    classroom_courses = {}
+    for day, day_block_list in time_blocks.items():
+        day_courses = {}
+        for block_start_time, block_end_time in day_block_list:
+            running_courses = term_courses(term).filter(day__contains=day, start_time__lte=block_start_time,
+                                                        end_time__gte=block_end_time, classroom__name=classroom)
+            if len(running_courses) == 0:
+                day_courses[block_start_time] = ["", "", 0]
+            else:
+                day_courses[block_start_time] = [
+                    [course.name, course.instructor.name if course.instructor is not None else None, course.enrolled]
+                    for course in running_courses.order_by('id')]
+        classroom_courses[day] = day_courses
+    return [time_blocks, classroom_courses]
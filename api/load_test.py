@@ -0,0 +1,261 @@
+import logging
+import random
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from api import services
+from api.models import Classroom, Course
+
+logger = logging.getLogger("load_test")
+
+"""
+Replays a weighted mix of the requests made by the front end against the API, with several simulated users making
+requests at once. Requests are either handled in-process through Django's test client or sent to a running server, and
+the throughput and response time percentiles of every endpoint are collected into a report that later runs can be
+compared against.
+
+Author: Ryan Johnson
+"""
+
+# Version of the load test report layout, increased whenever the layout changes
+REPORT_VERSION = 3
+
+# Share of the requests made to each endpoint. Users open the heatmap page, load the heatmap for a set of buildings, then
+# spend most of their time paging between blocks and their used classrooms, and opening a classroom's weekly schedule.
+# The separate used classroom and paging endpoints replaced by get_block_page are still requested by older clients.
+ENDPOINT_WEIGHTS = {
+    "get_bootstrap": 0.05,
+    "get_number_classes": 0.15,
+    "get_block_page": 0.35,
+    "get_used_classrooms": 0.10,
+    "get_past_time": 0.05,
+    "get_next_time": 0.05,
+    "get_classroom_data": 0.25,
+}
+
+# Percentiles reported for the response times of every endpoint
+PERCENTILES = [50, 95, 99]
+
+
+def build_request_pool(seed: int) -> {}:
+    """
+    Creates the requests that can be made to each endpoint from the data currently in the database. Requests cover every
+    time block of the active term, every classroom holding courses, and the whole campus along with a few random
+    groups of buildings.
+
+    :param seed: seed for choosing the groups of buildings
+    :return:     dictionary mapping the name of each endpoint to a list of dictionaries holding its query parameters
+    """
+    rng = random.Random(seed)
+    buildings = sorted(Course.objects.exclude(classroom__isnull=True).exclude(classroom__building="OFCP")
+                       .values_list("classroom__building", flat=True).distinct())
+    building_groups = [[]] + [rng.sample(buildings, min(len(buildings), rng.randint(1, 3)))
+                              for _ in range(5) if buildings]
+    classrooms = list(Course.objects.exclude(classroom__isnull=True).values_list("classroom__name", flat=True)
+                      .distinct())
+    time_blocks = services.calculate_time_blocks("all", services.resolve_term()[0])
+
+    pool = {endpoint: [] for endpoint in ENDPOINT_WEIGHTS}
+    for group in building_groups:
+        pool["get_number_classes"].append({"buildings[]": group})
+        for day, blocks in time_blocks.items():
+            for start_time, end_time in blocks:
+                block = {"day": day, "buildings": ", ".join(group)}
+                pool["get_used_classrooms"].append({**block, "startTime": start_time[:5], "endTime": end_time[:5]})
+                pool["get_block_page"].append({**block, "time": start_time[:5], "direction": "next"})
+                pool["get_past_time"].append({**block, "currentStartTime": start_time[:5]})
+                pool["get_next_time"].append({**block, "currentEndTime": end_time[:5]})
+    pool["get_bootstrap"] = [{}]
+    pool["get_classroom_data"] = [{"classroom": classroom} for classroom in classrooms]
+    return {endpoint: requests for endpoint, requests in pool.items() if requests}
+
+
+def percentile(timings: [], percent: float) -> float:
+    """
+    Finds a percentile of a sorted list of timings using the nearest-rank method.
+
+    :param timings: sorted list of timings
+    :param percent: percentile to find, between 0 and 100
+    :return:        timing at the percentile
+    """
+    rank = max(int(-(-percent * len(timings) // 100)), 1)
+    return timings[rank - 1]
+
+
+def summarize(timings: [], errors: int, elapsed: float) -> {}:
+    """
+    Summarizes the response times of the requests made to a single endpoint.
+
+    :param timings: list holding the number of seconds taken by each request
+    :param errors:  number of requests that didn't succeed
+    :param elapsed: number of seconds the load test ran for
+    :return:        dictionary holding the number of requests, errors, throughput, and response time percentiles
+    """
+    timings = sorted(timings)
+    summary = {
+        "requests": len(timings),
+        "errors": errors,
+        "throughput": round(len(timings) / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+    if timings:
+        summary["meanMs"] = round(statistics.mean(timings) * 1000, 3)
+        for percent in PERCENTILES:
+            summary[f"p{percent}Ms"] = round(percentile(timings, percent) * 1000, 3)
+        summary["maxMs"] = round(timings[-1] * 1000, 3)
+    return summary
+
+
+class LoadTestWorker:
+    """
+    Simulates a single user, making requests chosen at random from the request pool until the shared number of
+    requests has been made.
+    """
+
+    def __init__(self, pool: {}, seed: int, url: str, remaining: [], lock: threading.Lock):
+        self.pool = pool
+        self.rng = random.Random(seed)
+        self.url = url
+        self.remaining = remaining
+        self.lock = lock
+        self.endpoints = list(pool)
+        self.weights = [ENDPOINT_WEIGHTS[endpoint] for endpoint in self.endpoints]
+        self.results = []
+
+    def send(self, client: Client, endpoint: str, params: {}) -> bool:
+        """
+        Makes a single request, either through the test client or to the running server.
+
+        :param client:   test client used when no server URL was given
+        :param endpoint: name of the endpoint being requested
+        :param params:   dictionary holding the query parameters of the request
+        :return:         boolean specifying whether the request succeeded
+        """
+        if self.url is None:
+            return client.get(reverse(endpoint), params).status_code == 200
+        query = urllib.parse.urlencode(params, doseq=True)
+        try:
+            with urllib.request.urlopen(f"{self.url.rstrip('/')}{reverse(endpoint)}?{query}") as response:
+                response.read()
+                return response.status == 200
+        except urllib.error.URLError:
+            return False
+
+    def run(self) -> []:
+        """
+        Makes requests until none remain.
+
+        :return: list of tuples holding the endpoint, duration, and success of every request made
+        """
+        client = Client(HTTP_HOST="localhost", raise_request_exception=False) if self.url is None else None
+        try:
+            while True:
+                with self.lock:
+                    if self.remaining[0] <= 0:
+                        break
+                    self.remaining[0] -= 1
+                endpoint = self.rng.choices(self.endpoints, weights=self.weights)[0]
+                params = self.rng.choice(self.pool[endpoint])
+                start = time.perf_counter()
+                success = self.send(client, endpoint, params)
+                self.results.append((endpoint, time.perf_counter() - start, success))
+        finally:
+            # Every worker thread opens its own database connection, which is closed once the worker finishes
+            connection.close()
+        return self.results
+
+
+def replay(pool: {}, requests: int, concurrency: int, seed: int, url: str = None) -> ([], float):
+    """
+    Makes the given number of requests, shared between several simulated users making requests at once.
+
+    :param pool:        dictionary mapping the name of each endpoint to the requests that can be made to it
+    :param requests:    total number of requests made
+    :param concurrency: number of simulated users
+    :param seed:        seed for choosing the requests made
+    :param url:         base URL of a running server, or None to handle requests in-process
+    :return:            list holding the result of every request, and the number of seconds taken
+    """
+    remaining = [requests]
+    lock = threading.Lock()
+    workers = [LoadTestWorker(pool, seed + number, url, remaining, lock) for number in range(concurrency)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = [result for worker_results in executor.map(LoadTestWorker.run, workers)
+                   for result in worker_results]
+    return results, time.perf_counter() - start
+
+
+def run_load_test(requests: int, concurrency: int, seed: int = 0, url: str = None, warmup: int = 0) -> {}:
+    """
+    Replays a weighted mix of the front end's requests against the data currently in the database, reporting the
+    throughput and response time percentiles of every endpoint along with the load test as a whole.
+
+    :param requests:    total number of requests made
+    :param concurrency: number of simulated users making requests at once
+    :param seed:        seed for choosing the requests made
+    :param url:         base URL of a running server, or None to handle requests in-process
+    :param warmup:      number of requests made before the timed requests, filling the cache
+    :return:            dictionary holding the report
+    """
+    pool = build_request_pool(seed)
+    if not pool:
+        raise ValueError("The database holds no courses to make requests for")
+    if warmup > 0:
+        replay(pool, warmup, concurrency, seed + concurrency, url)
+    results, elapsed = replay(pool, requests, concurrency, seed, url)
+
+    report = {
+        "version": REPORT_VERSION,
+        "createdAt": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "database": connection.vendor,
+        "target": url or "in-process",
+        "requests": requests,
+        "concurrency": concurrency,
+        "warmup": warmup,
+        "seed": seed,
+        "campus": {"classrooms": Classroom.objects.count(), "courses": Course.objects.count()},
+        "elapsedSeconds": round(elapsed, 3),
+        "overall": summarize([duration for _, duration, _ in results],
+                             sum(1 for _, _, success in results if not success), elapsed),
+        "endpoints": {},
+    }
+    for endpoint in sorted(pool):
+        timings = [duration for name, duration, _ in results if name == endpoint]
+        errors = sum(1 for name, _, success in results if name == endpoint and not success)
+        report["endpoints"][endpoint] = summarize(timings, errors, elapsed)
+    logger.info("run_load_test - %s requests made by %s users in %.2f seconds", requests, concurrency, elapsed)
+    return report
+
+
+def compare_reports(report: {}, baseline: {}) -> {}:
+    """
+    Adds the throughput and response time percentiles of an earlier report to the matching endpoints of the new report,
+    along with the ratio between the new and earlier values. Ratios above 1 mean the percentile has become slower, or
+    the throughput has increased.
+
+    :param report:   dictionary holding the new report
+    :param baseline: dictionary holding the earlier report
+    :return:         the new report, with the earlier values added
+    """
+    summaries = [(report["overall"], baseline.get("overall", {}))]
+    summaries += [(summary, baseline.get("endpoints", {}).get(endpoint, {}))
+                  for endpoint, summary in report["endpoints"].items()]
+    for summary, baseline_summary in summaries:
+        changes = {}
+        for key in ["throughput"] + [f"p{percent}Ms" for percent in PERCENTILES]:
+            if baseline_summary.get(key) and key in summary:
+                changes[key] = {"baseline": baseline_summary[key],
+                                "change": round(summary[key] / baseline_summary[key], 3)}
+        if changes:
+            summary["baseline"] = changes
+    return report
@@ -0,0 +1,42 @@
+import reprlib
+
+"""
+Contains helpers for logging large values, such as the dictionaries returned by the services. Values are passed to the
+logger as message arguments wrapped in Truncated, so they are only ever formatted if the message is actually emitted,
+and are then cut down to a bounded size rather than being formatted in full.
+
+Author: Ryan Johnson
+"""
+
+# Maximum number of characters written to the log for a single logged value
+MAX_LOGGED_LENGTH = 1000
+
+_repr = reprlib.Repr()
+_repr.maxlevel = 4
+_repr.maxdict = 20
+_repr.maxlist = 20
+_repr.maxtuple = 20
+_repr.maxset = 20
+_repr.maxstring = 200
+_repr.maxother = 200
+
+
+class Truncated:
+    """
+    Wraps a value passed to the logger as a message argument. The value is only formatted once the logger formats the
+    message, and only the first few items of any nested dictionaries or lists are included, so logging a large result
+    costs nothing unless the message is emitted.
+    """
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value, limit: int = MAX_LOGGED_LENGTH):
+        self.value = value
+        self.limit = limit
+
+    def __str__(self):
+        text = self.value if isinstance(self.value, str) else _repr.repr(self.value)
+        if len(text) > self.limit:
+            return f"{text[:self.limit]}... ({len(text) - self.limit} more characters)"
+        return text
+
+    __repr__ = __str__
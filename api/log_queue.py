@@ -0,0 +1,149 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from django.conf import settings
+
+"""
+Moves the writing of log messages off the threads handling requests. Messages are placed on a bounded queue by a
+QueueHandler and written to the console and log file by a QueueListener running in its own thread. Once the queue is
+full, new messages are dropped rather than slowing down requests, and messages logged very frequently are sampled, with
+the number of dropped and sampled messages periodically reported in the log.
+
+Author: Ryan Johnson
+"""
+
+# Name of the logger reporting the number of dropped and sampled messages
+REPORT_LOGGER = "log_queue"
+
+
+class MessageSampler:
+    """
+    Limits how often each message is logged. Every message may be logged a set number of times within each interval,
+    after which only one in every few is logged until the next interval begins. Messages are told apart by their logger
+    and unformatted message, so messages logged by the same line with different arguments are sampled together. Warnings
+    and errors are never sampled.
+    """
+
+    def __init__(self, interval: float, burst: int, rate: int):
+        self.interval = interval
+        self.burst = burst
+        self.rate = max(rate, 1)
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._interval_start = time.monotonic()
+
+    def allow(self, record: logging.LogRecord) -> bool:
+        """
+        Counts a message and decides whether it is logged.
+
+        :param record: LogRecord holding the message
+        :return:       boolean specifying whether the message is logged
+        """
+        if record.levelno >= logging.WARNING:
+            return True
+        key = (record.name, record.msg)
+        with self._lock:
+            now = time.monotonic()
+            if now - self._interval_start >= self.interval:
+                self._counts = {}
+                self._interval_start = now
+            count = self._counts.get(key, 0) + 1
+            self._counts[key] = count
+        return count <= self.burst or (count - self.burst) % self.rate == 0
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Places log messages on a queue holding a limited number of messages. Messages are dropped when the queue is full or
+    when the sampler decides against logging them, and the number of messages lost either way is reported once per
+    report interval.
+    """
+
+    def __init__(self, queue_size: int, sampler: MessageSampler = None, report_interval: float = 60):
+        super().__init__(queue.Queue(queue_size))
+        self.sampler = sampler
+        self.report_interval = report_interval
+        self.dropped = 0
+        self.sampled = 0
+        self._lock = threading.Lock()
+        self._unreported_dropped = 0
+        self._unreported_sampled = 0
+        self._last_report = time.monotonic()
+
+    def emit(self, record: logging.LogRecord):
+        if self.sampler is not None and not self.sampler.allow(record):
+            with self._lock:
+                self.sampled += 1
+                self._unreported_sampled += 1
+            return
+        try:
+            self.enqueue(self.prepare(record))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                self._unreported_dropped += 1
+            return
+        except Exception:
+            self.handleError(record)
+            return
+        self.report_losses()
+
+    def report_losses(self, force: bool = False):
+        """
+        Logs the number of messages dropped or sampled since the last report, if any were lost and the report interval
+        has passed.
+
+        :param force: whether the report is made before the report interval has passed
+        """
+        with self._lock:
+            due = force or time.monotonic() - self._last_report >= self.report_interval
+            if not due or (self._unreported_dropped == 0 and self._unreported_sampled == 0):
+                return
+            dropped, sampled = self._unreported_dropped, self._unreported_sampled
+            self._unreported_dropped = self._unreported_sampled = 0
+            self._last_report = time.monotonic()
+        record = logging.getLogger(REPORT_LOGGER).makeRecord(
+            REPORT_LOGGER, logging.WARNING, __file__, 0,
+            "report_losses - %s log messages dropped because the log queue was full and %s frequent messages sampled "
+            "out since the last report (%s dropped and %s sampled in total)",
+            (dropped, sampled, self.dropped, self.sampled), None)
+        try:
+            self.enqueue(self.prepare(record))
+        except queue.Full:
+            with self._lock:
+                self._unreported_dropped += dropped + 1
+                self._unreported_sampled += sampled
+                self.dropped += 1
+
+
+def start_queue_logging() -> QueueListener:
+    """
+    Replaces the handlers of the root logger with a BoundedQueueHandler and starts a QueueListener passing the queued
+    messages to the replaced handlers. The listener is stopped when the process exits, writing any messages still on the
+    queue. Nothing is changed if the LOG_QUEUE_SIZE setting is 0 or queue logging has already been started.
+
+    :return: QueueListener writing the queued messages, or None if queue logging wasn't started
+    """
+    root = logging.getLogger()
+    if settings.LOG_QUEUE_SIZE <= 0 or any(isinstance(handler, BoundedQueueHandler) for handler in root.handlers):
+        return None
+
+    handlers = list(root.handlers)
+    sampler = MessageSampler(settings.LOG_SAMPLING_INTERVAL, settings.LOG_SAMPLING_BURST, settings.LOG_SAMPLING_RATE)
+    queue_handler = BoundedQueueHandler(settings.LOG_QUEUE_SIZE, sampler, settings.LOG_SAMPLING_INTERVAL)
+    listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    listener.start()
+
+    def stop_queue_logging():
+        queue_handler.report_losses(force=True)
+        listener.stop()
+
+    atexit.register(stop_queue_logging)
+    return listener
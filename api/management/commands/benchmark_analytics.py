@@ -0,0 +1,66 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api import benchmarks
+
+"""
+Times every service function and upload path against synthetic campuses of increasing size, writing the results as a
+JSON report. The benchmarks are run within a separate test database created for the run, leaving the real data
+untouched. The plan of every distinct query is stored alongside the timings, and an earlier report may be provided for
+comparing each timing against.
+
+Author: Ryan Johnson
+"""
+
+
+class Command(BaseCommand):
+    help = "Times the analytics services and uploads against synthetic campuses, writing a JSON report"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scales", default="500,2000",
+                            help="Comma-separated number of course sections within each campus")
+        parser.add_argument("--buildings", type=int, default=13, help="Number of buildings on each campus")
+        parser.add_argument("--rooms-per-building", type=int, default=20,
+                            help="Number of classrooms within each building")
+        parser.add_argument("--repeat", type=int, default=3, help="Number of times each function is run")
+        parser.add_argument("--seed", type=int, default=0, help="Seed for the random campus data")
+        parser.add_argument("--skip-uploads", action="store_true", help="Only time the read services")
+        parser.add_argument("--skip-explain", action="store_true",
+                            help="Don't capture the plans of the queries made by each benchmark")
+        parser.add_argument("--baseline", default=None, help="Path of an earlier report to compare against")
+        parser.add_argument("--output", default=None, help="Path the report is written to (printed if omitted)")
+
+    def handle(self, *args, **options):
+        try:
+            scales = [int(scale) for scale in options["scales"].split(",")]
+        except ValueError:
+            raise CommandError(f"Scales must be comma-separated numbers: {options['scales']}")
+        if options["repeat"] < 1:
+            raise CommandError("Each function must be run at least once")
+
+        baseline = None
+        if options["baseline"] is not None:
+            with open(options["baseline"]) as file:
+                baseline = json.load(file)
+
+        # The campuses replace every course and classroom, so they are only ever created within a test database
+        old_database_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            report = benchmarks.run_benchmarks(scales, options["buildings"], options["rooms_per_building"],
+                                               options["repeat"], options["seed"], not options["skip_uploads"],
+                                               not options["skip_explain"])
+        finally:
+            connection.creation.destroy_test_db(old_database_name, verbosity=0)
+
+        if baseline is not None:
+            report = benchmarks.compare_reports(report, baseline)
+        output = json.dumps(report, indent=2)
+        if options["output"] is None:
+            self.stdout.write(output)
+        else:
+            with open(options["output"], "w") as file:
+                file.write(output)
+            self.stdout.write(f"Benchmark report written to {options['output']}")
@@ -0,0 +1,62 @@
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import services
+from api.synthetic import build_schedule_frame
+
+"""
+Compares how quickly uploaded schedule spreadsheets are parsed when provided as an Excel spreadsheet versus a CSV file.
+The same randomly generated schedule is written in both formats, and each file is parsed several times using the same
+reader used during uploads.
+
+Author: Ryan Johnson
+"""
+
+
+class Command(BaseCommand):
+    help = "Times parsing the same schedule data from .xlsx and .csv files"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=5000, help="Number of course sections in the schedule")
+        parser.add_argument("--repeat", type=int, default=5, help="Number of times each file is parsed")
+        parser.add_argument("--seed", type=int, default=0, help="Seed for the random schedule data")
+
+    def handle(self, *args, **options):
+        df = build_schedule_frame(options["rows"], random.Random(options["seed"]))
+        results = {"rows": options["rows"], "repeat": options["repeat"], "formats": {}}
+
+        with tempfile.TemporaryDirectory() as directory:
+            for extension in [".xlsx", ".csv"]:
+                file_path = os.path.join(directory, f"schedule{extension}")
+                if extension == ".xlsx":
+                    df.to_excel(file_path, index=False)
+                else:
+                    df.to_csv(file_path, index=False)
+
+                timings = []
+                for _ in range(options["repeat"]):
+                    with open(file_path, "rb") as file:
+                        start = time.perf_counter()
+                        parsed = services.read_spreadsheet(file, services.SCHEDULE_CSV_COLUMNS)
+                        timings.append(time.perf_counter() - start)
+                    if len(parsed.index) != options["rows"]:
+                        raise CommandError(f"Read {len(parsed.index)} rows from the {extension} file instead of "
+                                           f"{options['rows']}")
+
+                results["formats"][extension] = {
+                    "fileBytes": os.path.getsize(file_path),
+                    "medianSeconds": round(statistics.median(timings), 4),
+                    "minSeconds": round(min(timings), 4),
+                    "rowsPerSecond": round(options["rows"] / statistics.median(timings), 1),
+                }
+
+        results["csvSpeedup"] = round(results["formats"][".xlsx"]["medianSeconds"] /
+                                      results["formats"][".csv"]["medianSeconds"], 2)
+        self.stdout.write(json.dumps(results, indent=2))
+
@@ -0,0 +1,74 @@
+import json
+import os
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import synthetic
+
+"""
+Generates a synthetic campus of the requested size, either replacing the data within the database or saving the campus
+as classroom and schedule spreadsheets that can be uploaded through the application.
+
+Author: Ryan Johnson
+"""
+
+
+class Command(BaseCommand):
+    help = "Generates a synthetic campus with buildings, classrooms, instructors, and course sections"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sections", type=int, default=2000, help="Number of course sections in each term")
+        parser.add_argument("--buildings", type=int, default=13, help="Number of buildings on the campus")
+        parser.add_argument("--rooms-per-building", type=int, default=20,
+                            help="Number of classrooms within each building")
+        parser.add_argument("--instructors", type=int, default=None,
+                            help="Number of instructors (one for every four sections by default)")
+        parser.add_argument("--terms", default="2024SP", help="Comma-separated names of the terms to generate")
+        parser.add_argument("--seed", type=int, default=0, help="Seed for the random campus data")
+        parser.add_argument("--output", default=None,
+                            help="Directory to save the campus spreadsheets to instead of writing to the database")
+        parser.add_argument("--no-input", action="store_false", dest="interactive",
+                            help="Replace the data within the database without asking for confirmation")
+
+    def handle(self, *args, **options):
+        terms = [term.strip() for term in options["terms"].split(",") if term.strip()]
+        if options["sections"] < 0 or options["buildings"] < 1 or options["rooms_per_building"] < 1:
+            raise CommandError("The campus must hold at least one building and one classroom")
+
+        if options["output"] is not None:
+            self.write_spreadsheets(options, terms)
+            return
+
+        if options["interactive"]:
+            confirm = input("This will replace ALL classroom, instructor, and course data within the database with a "
+                            "synthetic campus. Type 'yes' to continue: ")
+            if confirm != "yes":
+                self.stdout.write("Campus generation cancelled.")
+                return
+
+        campus = synthetic.generate_campus(options["sections"], options["buildings"], options["rooms_per_building"],
+                                           options["instructors"], terms, options["seed"])
+        self.stdout.write(json.dumps(campus, indent=2))
+
+    def write_spreadsheets(self, options, terms):
+        """
+        Saves the classroom spreadsheet and a schedule spreadsheet for every term of the campus as CSV files.
+
+        :param options: dictionary of the options passed to the command
+        :param terms:   list of the names of the terms to generate
+        """
+        rng = random.Random(options["seed"])
+        os.makedirs(options["output"], exist_ok=True)
+        buildings = synthetic.campus_buildings(options["buildings"])
+
+        classroom_path = os.path.join(options["output"], "classrooms.csv")
+        synthetic.build_classroom_sheet(buildings, options["rooms_per_building"], rng).to_csv(classroom_path,
+                                                                                              index=False)
+        self.stdout.write(f"Classrooms saved to {classroom_path}")
+        for term in terms:
+            schedule_path = os.path.join(options["output"], f"schedule-{term}.csv")
+            df = synthetic.build_schedule_frame(options["sections"], rng, buildings, options["rooms_per_building"],
+                                                options["instructors"], term)
+            df.to_csv(schedule_path, index=False)
+            self.stdout.write(f"Schedule for {term} saved to {schedule_path}")
@@ -0,0 +1,83 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api import load_test, synthetic
+
+"""
+Replays a weighted mix of the front end's requests against the API with several simulated users at once, writing the
+throughput and response time percentiles of every endpoint as a JSON report. Requests are made against the data within
+the database, which can be populated beforehand with the generate_campus command, or against a synthetic campus
+generated within a separate test database for the run. An earlier report may be provided for comparing against.
+
+Author: Ryan Johnson
+"""
+
+
+class Command(BaseCommand):
+    help = "Load tests the analytics endpoints with a weighted mix of requests, writing a JSON report"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000, help="Total number of requests made")
+        parser.add_argument("--concurrency", type=int, default=8, help="Number of simulated users making requests")
+        parser.add_argument("--warmup", type=int, default=0,
+                            help="Number of untimed requests made first, filling the cache")
+        parser.add_argument("--seed", type=int, default=0, help="Seed for choosing the requests made")
+        parser.add_argument("--url", default=None,
+                            help="Base URL of a running server to send requests to (handled in-process if omitted)")
+        parser.add_argument("--generate", type=int, default=None, metavar="SECTIONS",
+                            help="Generate a synthetic campus with this many sections within a test database first")
+        parser.add_argument("--buildings", type=int, default=13, help="Number of buildings on a generated campus")
+        parser.add_argument("--rooms-per-building", type=int, default=20,
+                            help="Number of classrooms within each building of a generated campus")
+        parser.add_argument("--baseline", default=None, help="Path of an earlier report to compare against")
+        parser.add_argument("--output", default=None, help="Path the report is written to (printed if omitted)")
+
+    def handle(self, *args, **options):
+        if options["requests"] < 1 or options["concurrency"] < 1:
+            raise CommandError("At least one request must be made by at least one user")
+        if options["generate"] is not None and options["url"] is not None:
+            raise CommandError("A generated campus is only visible to requests handled in-process")
+
+        baseline = None
+        if options["baseline"] is not None:
+            with open(options["baseline"]) as file:
+                baseline = json.load(file)
+
+        if options["generate"] is None:
+            report = self.run(options)
+        else:
+            # The generated campus replaces every course and classroom, so it is only ever created within a test
+            # database
+            old_database_name = connection.settings_dict["NAME"]
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                synthetic.generate_campus(options["generate"], options["buildings"], options["rooms_per_building"],
+                                          seed=options["seed"])
+                report = self.run(options)
+            finally:
+                connection.creation.destroy_test_db(old_database_name, verbosity=0)
+
+        if baseline is not None:
+            report = load_test.compare_reports(report, baseline)
+        output = json.dumps(report, indent=2)
+        if options["output"] is None:
+            self.stdout.write(output)
+        else:
+            with open(options["output"], "w") as file:
+                file.write(output)
+            self.stdout.write(f"Load test report written to {options['output']}")
+
+    def run(self, options) -> {}:
+        """
+        Runs the load test against the data currently within the database.
+
+        :param options: dictionary of the options passed to the command
+        :return:        dictionary holding the load test report
+        """
+        try:
+            return load_test.run_load_test(options["requests"], options["concurrency"], options["seed"],
+                                           options["url"], options["warmup"])
+        except ValueError as e:
+            raise CommandError(str(e))
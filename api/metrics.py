@@ -0,0 +1,246 @@
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+
+from api.shadow import merge_snapshots, shadow_log
+from api.slow_queries import merge_summaries, slow_query_log
+
+logger = logging.getLogger("metrics")
+
+"""
+Collects performance metrics for every API view, including a histogram of response times, the number of database
+queries made, the time spent within the database, and the size of each response. Metrics are held in memory by each
+server process and periodically written to a file within a directory shared by every process, along with the slow
+queries and shadow comparisons seen by the process, allowing the metrics of all gunicorn workers to be merged and
+exposed in the Prometheus text format.
+
+Author: Ryan Johnson
+"""
+
+# Upper bounds of the response time histogram buckets, in seconds
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+
+class MetricsRegistry:
+    """
+    Holds the metrics recorded for every view by the current process. Each view's metrics are kept as a dictionary of
+    running totals, so that the metrics written by several processes can be merged by adding them together.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+        self._last_flush = 0.0
+        # The start time keeps the file of a new process from replacing the file of an earlier process with the same ID
+        self._file_name = f"metrics-{os.getpid()}-{time.time_ns()}.json"
+
+    def record(self, view: str, status_code: int, duration: float, queries: int, db_duration: float,
+               response_bytes: int):
+        """
+        Adds a single request to the metrics of the specified view, writing the metrics of the process to the shared
+        directory if they haven't been written recently.
+
+        :param view:           string naming the view that handled the request
+        :param status_code:    HTTP status code of the response
+        :param duration:       number of seconds taken to respond to the request
+        :param queries:        number of database queries made while responding
+        :param db_duration:    number of seconds spent running database queries
+        :param response_bytes: size of the response body in bytes
+        """
+        with self._lock:
+            metrics = self._views.setdefault(view, new_view_metrics())
+            metrics["count"] += 1
+            metrics["durationSum"] += duration
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if duration <= bound:
+                    metrics["buckets"][index] += 1
+            status = str(status_code)
+            metrics["statuses"][status] = metrics["statuses"].get(status, 0) + 1
+            metrics["queries"] += queries
+            metrics["dbDurationSum"] += db_duration
+            metrics["responseBytes"] += response_bytes
+            flush_due = time.monotonic() - self._last_flush >= settings.METRICS_FLUSH_INTERVAL
+        if flush_due:
+            self.flush()
+
+    def snapshot(self) -> {}:
+        """
+        Returns a copy of the metrics recorded by the current process.
+
+        :return: dictionary mapping the name of each view to its metrics
+        """
+        with self._lock:
+            return json.loads(json.dumps(self._views))
+
+    def flush(self):
+        """
+        Writes the metrics, slow queries, and shadow comparisons of the current process to its file within the shared
+        metrics directory. The file is replaced in a single step, so other processes never read a partially written
+        file.
+        """
+        directory = settings.METRICS_DIRECTORY
+        snapshot = {"views": self.snapshot(), "slowQueries": slow_query_log.summary(), "shadow": shadow_log.snapshot()}
+        try:
+            os.makedirs(directory, exist_ok=True)
+            temporary_path = os.path.join(directory, f".{self._file_name}.tmp")
+            with open(temporary_path, "w") as file:
+                json.dump(snapshot, file)
+            os.replace(temporary_path, os.path.join(directory, self._file_name))
+        except OSError:
+            logger.exception("flush - Metrics could not be written to %s", directory)
+        with self._lock:
+            self._last_flush = time.monotonic()
+
+    def collect(self) -> {}:
+        """
+        Merges the metrics written by every process into a single set of metrics. The metrics of the current process are
+        written first, so they are always up to date. Files that haven't been written to within METRICS_RETENTION
+        seconds are left out and removed, so the files of exited processes don't accumulate in the directory.
+
+        :return: dictionary holding the metrics of each view, the totals of each slow query fingerprint, and the
+                 totals of each shadowed function, across every process
+        """
+        self.flush()
+        merged = {}
+        slow_query_summaries = []
+        shadow_snapshots = []
+        oldest_write = time.time() - settings.METRICS_RETENTION
+        for file_path in glob.glob(os.path.join(settings.METRICS_DIRECTORY, "metrics-*.json")):
+            try:
+                if os.path.getmtime(file_path) < oldest_write:
+                    os.remove(file_path)
+                    logger.info("collect - Removed stale metrics file %s", file_path)
+                    continue
+                with open(file_path) as file:
+                    process_metrics = json.load(file)
+            except (OSError, ValueError):
+                logger.warning("collect - Skipping unreadable metrics file %s", file_path)
+                continue
+            for view, metrics in process_metrics.get("views", {}).items():
+                merge_view_metrics(merged.setdefault(view, new_view_metrics()), metrics)
+            slow_query_summaries.append(process_metrics.get("slowQueries", []))
+            shadow_snapshots.append(process_metrics.get("shadow", {}))
+        return {"views": merged, "slowQueries": merge_summaries(slow_query_summaries),
+                "shadow": merge_snapshots(shadow_snapshots)}
+
+    def reset(self):
+        """
+        Removes every metric recorded by the current process.
+        """
+        with self._lock:
+            self._views = {}
+            self._last_flush = 0.0
+
+
+def new_view_metrics() -> {}:
+    """
+    Creates the running totals kept for a single view.
+
+    :return: dictionary holding the request count, response time histogram, status codes, queries, database time, and
+             response size of the view
+    """
+    return {
+        "count": 0,
+        "durationSum": 0.0,
+        "buckets": [0] * len(LATENCY_BUCKETS),
+        "statuses": {},
+        "queries": 0,
+        "dbDurationSum": 0.0,
+        "responseBytes": 0,
+    }
+
+
+def merge_view_metrics(total: {}, metrics: {}):
+    """
+    Adds the metrics of a view recorded by one process to the running totals for the view.
+
+    :param total:   dictionary holding the running totals, updated in place
+    :param metrics: dictionary holding the metrics being added
+    """
+    for key in ["count", "durationSum", "queries", "dbDurationSum", "responseBytes"]:
+        total[key] += metrics.get(key, 0)
+    for index, count in enumerate(metrics.get("buckets", [])[:len(LATENCY_BUCKETS)]):
+        total["buckets"][index] += count
+    for status, count in metrics.get("statuses", {}).items():
+        total["statuses"][status] = total["statuses"].get(status, 0) + count
+
+
+def escape_label(value: str) -> str:
+    """
+    Escapes a Prometheus label value, so that the SQL of a query can be used as a label.
+
+    :param value: string holding the value of the label
+    :return:      string holding the escaped value
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus(views: {}, slow_queries: [] = (), shadow: {} = None) -> str:
+    """
+    Formats the metrics of every view using the Prometheus text exposition format, followed by the number of slow runs
+    and total time of every slow query fingerprint and the comparisons made for every shadowed function.
+
+    :param views:        dictionary mapping the name of each view to its metrics
+    :param slow_queries: list of dictionaries holding the totals of each slow query fingerprint
+    :param shadow:       dictionary mapping the name of each shadowed function to its totals
+    :return:             string holding the metrics in the Prometheus text format
+    """
+    lines = ["# HELP api_request_duration_seconds Time taken to respond to API requests.",
+             "# TYPE api_request_duration_seconds histogram"]
+    for view, metrics in sorted(views.items()):
+        for bound, count in zip(LATENCY_BUCKETS, metrics["buckets"]):
+            lines.append(f'api_request_duration_seconds_bucket{{view="{view}",le="{bound}"}} {count}')
+        lines.append(f'api_request_duration_seconds_bucket{{view="{view}",le="+Inf"}} {metrics["count"]}')
+        lines.append(f'api_request_duration_seconds_sum{{view="{view}"}} {metrics["durationSum"]}')
+        lines.append(f'api_request_duration_seconds_count{{view="{view}"}} {metrics["count"]}')
+
+    lines += ["# HELP api_requests_total API requests by response status.", "# TYPE api_requests_total counter"]
+    for view, metrics in sorted(views.items()):
+        for status, count in sorted(metrics["statuses"].items()):
+            lines.append(f'api_requests_total{{view="{view}",status="{status}"}} {count}')
+
+    counters = [
+        ("api_db_queries_total", "Database queries made while responding to API requests.", "queries"),
+        ("api_db_duration_seconds_total", "Time spent running database queries for API requests.", "dbDurationSum"),
+        ("api_response_bytes_total", "Size of the responses returned by the API.", "responseBytes"),
+    ]
+    for name, description, key in counters:
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} counter"]
+        for view, metrics in sorted(views.items()):
+            lines.append(f'{name}{{view="{view}"}} {metrics[key]}')
+
+    slow_query_counters = [
+        ("api_slow_queries_total", "Database queries slower than SLOW_QUERY_THRESHOLD by fingerprint.", "count"),
+        ("api_slow_query_duration_seconds_total", "Time spent running slow queries by fingerprint.", "totalSeconds"),
+    ]
+    for name, description, key in slow_query_counters:
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} counter"]
+        for query in slow_queries:
+            lines.append(f'{name}{{fingerprint="{escape_label(query["fingerprint"])}"}} {query[key]}')
+
+    shadow_metrics = [
+        ("api_shadow_comparisons_total", "Served results compared with the shadow calculation.", "counter",
+         "comparisons"),
+        ("api_shadow_divergences_total", "Shadow calculations differing from the served result.", "counter",
+         "divergences"),
+        ("api_shadow_failures_total", "Shadow calculations raising an exception.", "counter", "failures"),
+        ("api_shadow_skipped_total", "Sampled requests skipped while too many comparisons were waiting.", "counter",
+         "skipped"),
+        ("api_shadow_served_seconds_total", "Time taken to serve the compared results.", "counter", "servedSeconds"),
+        ("api_shadow_seconds_total", "Time taken by the shadow calculations.", "counter", "shadowSeconds"),
+        ("api_shadow_served_max_seconds", "Slowest compared result served.", "gauge", "servedMaxSeconds"),
+        ("api_shadow_max_seconds", "Slowest shadow calculation.", "gauge", "shadowMaxSeconds"),
+    ]
+    for name, description, metric_type, key in shadow_metrics:
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} {metric_type}"]
+        for function_name, totals in sorted((shadow or {}).items()):
+            lines.append(f'{name}{{function="{function_name}"}} {totals[key]}')
+    return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
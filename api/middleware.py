@@ -0,0 +1,213 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import re
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.db import connection
+
+from api.metrics import registry
+from api.server_timing import ServerTiming, current_timing
+from api.slow_queries import SlowQueryRecorder
+
+logger = logging.getLogger("middleware")
+
+"""
+Contains the middleware measuring the performance of requests handled by the API views, both by recording metrics for
+every request, reporting the breakdown of each request's time to the browser, profiling individual requests on
+demand, and logging the slow queries they make. Every middleware here is synchronous only, since the execute wrappers
+timing each request's queries are installed on the database connection of the thread handling the request.
+
+Author: Ryan Johnson
+"""
+
+
+class QueryTimer:
+    """
+    Counts and times the queries executed through a database connection while installed as one of its execute
+    wrappers.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class MetricsMiddleware:
+    """
+    Records the response time, database queries, database time, and response size of every request handled by a view
+    within api/urls.py. Requests for any other page, including the metrics themselves, aren't recorded.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        query_timer = QueryTimer()
+        start = time.perf_counter()
+        with connection.execute_wrapper(query_timer):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        match = request.resolver_match
+        if match is None or not match.route.startswith("api/") or match.url_name == "metrics":
+            return response
+        if response.streaming:
+            # The body of a streamed response is only produced while it is sent, so it is recorded once sent
+            response.streaming_content = record_streamed_response(response.streaming_content, match.url_name,
+                                                                  response.status_code, start, query_timer)
+            return response
+        registry.record(match.url_name, response.status_code, duration, query_timer.count, query_timer.duration,
+                        len(response.content))
+        return response
+
+
+def record_streamed_response(content, view: str, status_code: int, start: float, query_timer: QueryTimer):
+    """
+    Passes along every chunk of a streamed response while counting its size, recording the request once the last chunk
+    has been sent or the response is closed. The recorded duration includes the time taken to send the response, while
+    the queries only include those made before the view returned.
+
+    :param content:     iterator of the byte strings making up the body of the response
+    :param view:        string naming the view that handled the request
+    :param status_code: HTTP status code of the response
+    :param start:       performance counter value from when the request started
+    :param query_timer: QueryTimer holding the queries made while the view ran
+    :return:            generator yielding every chunk of the response
+    """
+    response_bytes = 0
+    try:
+        for chunk in content:
+            response_bytes += len(chunk)
+            yield chunk
+    finally:
+        registry.record(view, status_code, time.perf_counter() - start, query_timer.count, query_timer.duration,
+                        response_bytes)
+
+
+class SlowQueryMiddleware:
+    """
+    Records every database query made while handling a request that takes longer than the SLOW_QUERY_THRESHOLD
+    setting, along with the path of the request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with connection.execute_wrapper(SlowQueryRecorder(request.path)):
+            return self.get_response(request)
+
+
+class ServerTimingMiddleware:
+    """
+    Adds the Server-Timing header to the responses of every view within api/urls.py, breaking down the time taken into
+    the time spent within the database, the cache, the services, and rendering the response.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timing = ServerTiming()
+        token = current_timing.set(timing)
+        try:
+            with connection.execute_wrapper(timing):
+                response = self.get_response(request)
+        finally:
+            current_timing.reset(token)
+        # Views returning a plain HttpResponse have nothing to render, so their view ends once the response is returned
+        timing.end_view()
+
+        match = request.resolver_match
+        if match is not None and match.route.startswith("api/"):
+            response["Server-Timing"] = timing.header()
+            response["Timing-Allow-Origin"] = "*"
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        current_timing.get().start_view()
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after this point, so the render time runs until the post-render callback
+        timing = current_timing.get()
+        timing.end_view()
+        response.add_post_render_callback(lambda rendered_response: timing.end_render())
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a single request when asked to by a staff member, either through the X-Profile header or the profile query
+    parameter. The request is run under cProfile while its database queries are counted and timed, after which the
+    profile is saved as a .prof file alongside a text summary of the slowest functions. Requests that don't ask to be
+    profiled are passed straight through.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if "HTTP_X_PROFILE" not in request.META and "profile" not in request.GET:
+            return self.get_response(request)
+        if not request.user.is_staff:
+            logger.warning("ProfilingMiddleware - Profiling refused for %s, requested by a non-staff user",
+                           request.path)
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        query_timer = QueryTimer()
+        start = time.perf_counter()
+        with connection.execute_wrapper(query_timer):
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        duration = time.perf_counter() - start
+
+        file_name = save_profile(request, profiler, duration, query_timer)
+        response["X-Profile-File"] = file_name
+        return response
+
+
+def save_profile(request, profiler: cProfile.Profile, duration: float, query_timer: QueryTimer) -> str:
+    """
+    Saves the profile of a request to the profiling directory, writing both the raw profile (readable by pstats or
+    snakeviz) and a summary listing the functions taking the most time.
+
+    :param request:     HTTP request object that was profiled
+    :param profiler:    profiler holding the profile of the request
+    :param duration:    number of seconds taken to respond to the request
+    :param query_timer: QueryTimer holding the number of queries made and time spent within the database
+    :return:            string holding the name of the saved files, without their extensions
+    """
+    path_name = re.sub(r"[^A-Za-z0-9]+", "_", request.path).strip("_") or "root"
+    file_name = f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{path_name}"
+    directory = settings.PROFILING_DIRECTORY
+    os.makedirs(directory, exist_ok=True)
+    profiler.dump_stats(os.path.join(directory, f"{file_name}.prof"))
+
+    summary = io.StringIO()
+    summary.write(f"Path: {request.get_full_path()}\n")
+    summary.write(f"Duration: {duration:.4f} seconds\n")
+    summary.write(f"Database queries: {query_timer.count} ({query_timer.duration:.4f} seconds)\n\n")
+    pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(settings.PROFILING_TOP_FUNCTIONS)
+    with open(os.path.join(directory, f"{file_name}.txt"), "w") as file:
+        file.write(summary.getvalue())
+
+    logger.info("save_profile - Profile of %s saved to %s (%.4f seconds, %s queries)", request.path, file_name,
+                duration, query_timer.count)
+    return file_name
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.1 on 2026-10-19 11:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadJob',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('data_type', models.CharField(choices=[('schedule', 'Course Schedule'), ('classroom', 'Classroom Data')], max_length=255)),
+                ('file_name', models.CharField(max_length=255)),
+                ('file_path', models.CharField(max_length=1024)),
+                ('phase', models.CharField(choices=[('queued', 'Queued'), ('reading', 'Reading File'), ('importing', 'Importing Rows'), ('complete', 'Complete'), ('failed', 'Failed')], default='queued', max_length=255)),
+                ('rows_total', models.IntegerField(default=0)),
+                ('rows_processed', models.IntegerField(default=0)),
+                ('success', models.BooleanField(null=True)),
+                ('missing_columns', models.JSONField(default=list)),
+                ('errors', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, default=None, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, default=None, null=True)),
+            ],
+        ),
+    ]
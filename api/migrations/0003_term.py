@@ -0,0 +1,31 @@
+# Generated by Django 5.0.1 on 2026-10-19 11:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_uploadjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Term',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('is_active', models.BooleanField(default=False)),
+                ('generation', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['term', 'start_time', 'end_time'], name='course_term_times_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['term', 'classroom'], name='course_term_classroom_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 11:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_term'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadjob',
+            name='summary',
+            field=models.JSONField(default=dict),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-19 11:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadjob',
+            name='file_paths',
+            field=models.JSONField(default=list),
+        ),
+        migrations.AlterField(
+            model_name='uploadjob',
+            name='data_type',
+            field=models.CharField(choices=[('schedule', 'Course Schedule'), ('classroom', 'Classroom Data'), ('schedule_batch', 'Course Schedule Batch')], max_length=255),
+        ),
+    ]
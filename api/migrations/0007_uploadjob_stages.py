@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 12:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_uploadjob_file_paths'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadjob',
+            name='stages',
+            field=models.JSONField(default=list),
+        ),
+    ]
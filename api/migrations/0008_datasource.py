@@ -0,0 +1,29 @@
+# Generated by Django 5.0.1 on 2026-10-19 12:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_uploadjob_stages'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataSource',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('data_type', models.CharField(choices=[('schedule', 'Course Schedule'), ('classroom', 'Classroom Data')], max_length=255)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('terms', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('job', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='api.uploadjob')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='datasource',
+            constraint=models.UniqueConstraint(fields=('data_type', 'content_hash'), name='data_source_type_hash_unique'),
+        ),
+    ]
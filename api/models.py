@@ -2,7 +2,7 @@ from django.db import models
 
 """
 Contains all ORM models for the Carroll College classroom analytics software. The models for Classes, Courses, 
-and Instructors are all included here.
+Instructors, Terms, spreadsheet upload jobs, and the files the loaded data was read from are all included here.
 
 Author: Adrian Rincon Jimenez, Ryan Johnson
 """
@@ -107,5 +107,105 @@ class Course(models.Model):
     enrolled = models.IntegerField(null=True)
     capacity = models.IntegerField(null=True)
 
+    class Meta:
+        # Every query made when viewing the data is restricted to a single term, so each index leads with the term to
+        # keep the courses of other loaded terms out of the way
+        indexes = [
+            models.Index(fields=["term", "start_time", "end_time"], name="course_term_times_idx"),
+            models.Index(fields=["term", "classroom"], name="course_term_classroom_idx"),
+        ]
+
     def __str__(self):
         return self.name
+
+
+class Term(models.Model):
+    """
+    Holds data for a term whose course schedule has been uploaded. Several terms may be loaded at once, but only the
+    active term is shown unless another term is requested. The generation is increased every time the data for the
+    term changes, allowing any cached results calculated for an older generation of the term's data to be ignored. The
+    content hash identifies the uploaded file the current generation of the term's data was read from.
+    """
+    id = models.AutoField(primary_key=True)
+    name = models.CharField(max_length=255, unique=True)
+    is_active = models.BooleanField(default=False)
+    generation = models.IntegerField(default=0)
+    content_hash = models.CharField(max_length=64, default="", blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+
+class UploadJob(models.Model):
+    """
+    Holds the status of a spreadsheet upload being processed in the background. Each upload is saved to disk, along with
+    the SHA-256 hash of its contents, and then imported by a worker thread, which records the current phase of the
+    import and the number of rows processed so far. Batch uploads of several schedule files list every saved file in
+    file_paths. Once the import finishes, the job stores whether it succeeded, a summary of the rows created or updated,
+    any missing columns or errors found, and the time and memory taken by each stage of the import.
+    """
+    DATA_TYPES = {
+        "schedule": "Course Schedule",
+        "classroom": "Classroom Data",
+        "schedule_batch": "Course Schedule Batch",
+    }
+    PHASES = {
+        "queued": "Queued",
+        "reading": "Reading File",
+        "importing": "Importing Rows",
+        "complete": "Complete",
+        "failed": "Failed",
+    }
+
+    id = models.AutoField(primary_key=True)
+    data_type = models.CharField(max_length=255, choices=DATA_TYPES)
+    file_name = models.CharField(max_length=255)
+    file_path = models.CharField(max_length=1024)
+    file_paths = models.JSONField(default=list)
+    content_hash = models.CharField(max_length=64, default="", blank=True)
+
+    phase = models.CharField(max_length=255, choices=PHASES, default="queued")
+    rows_total = models.IntegerField(default=0)
+    rows_processed = models.IntegerField(default=0)
+    success = models.BooleanField(null=True)
+    missing_columns = models.JSONField(default=list)
+    summary = models.JSONField(default=dict)
+    errors = models.JSONField(default=list)
+    stages = models.JSONField(default=list)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(default=None, blank=True, null=True)
+    finished_at = models.DateTimeField(default=None, blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.data_type} upload #{self.id} ({self.file_name})"
+
+
+class DataSource(models.Model):
+    """
+    Records an uploaded file that currently loaded data was read from, identified by the SHA-256 hash of its contents.
+    Only the latest classroom file is kept, since each classroom upload may change any classroom. Course data is
+    tracked per term instead: the terms read from a schedule file are listed here, and each of those terms stores the
+    file's hash for as long as its data still comes from that file. The job that imported the file is kept while it
+    exists.
+    """
+    DATA_TYPES = {
+        "schedule": "Course Schedule",
+        "classroom": "Classroom Data",
+    }
+
+    id = models.AutoField(primary_key=True)
+    data_type = models.CharField(max_length=255, choices=DATA_TYPES)
+    content_hash = models.CharField(max_length=64)
+    terms = models.JSONField(default=list)
+    job = models.ForeignKey(UploadJob, on_delete=models.SET_NULL, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["data_type", "content_hash"], name="data_source_type_hash_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.data_type} file {self.content_hash[:12]}"
@@ -0,0 +1,103 @@
+import contextvars
+import time
+from contextlib import contextmanager
+
+"""
+Breaks down the time taken to respond to a request into the time spent within the database, reading and writing cached
+results, running the services, and rendering the response. The breakdown is returned to the browser within the
+Server-Timing header, where it is shown alongside the request in the developer tools.
+
+Author: Ryan Johnson
+"""
+
+# Timings of the request being handled by the current thread, or None outside of a request
+current_timing = contextvars.ContextVar("server_timing", default=None)
+
+
+class ServerTiming:
+    """
+    Holds the time spent within each part of a single request. Database and cache time are added as each query or cache
+    lookup finishes, while the service and render time are calculated from when the view starts, when it returns its
+    response, and when the response has been rendered.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db = 0.0
+        self.queries = 0
+        self.cache = 0.0
+        self.view_start = None
+        self.view_end = None
+        self.render_end = None
+        self._db_before_view = 0.0
+        self._db_after_view = 0.0
+        self._cache_before_view = 0.0
+        self._cache_after_view = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - start
+            self.queries += 1
+
+    def start_view(self):
+        """
+        Marks the start of the view.
+        """
+        self.view_start = time.perf_counter()
+        self._db_before_view, self._cache_before_view = self.db, self.cache
+
+    def end_view(self):
+        """
+        Marks the end of the view, unless its end has already been marked.
+        """
+        if self.view_start is not None and self.view_end is None:
+            self.view_end = time.perf_counter()
+            self._db_after_view, self._cache_after_view = self.db, self.cache
+
+    def end_render(self):
+        """
+        Marks the end of rendering the response.
+        """
+        self.render_end = time.perf_counter()
+
+    def header(self) -> str:
+        """
+        Formats the timings as the value of the Server-Timing header, with each duration given in milliseconds.
+
+        :return: string holding the value of the Server-Timing header
+        """
+        total = time.perf_counter() - self.start
+        service = 0.0
+        if self.view_end is not None:
+            view = self.view_end - self.view_start
+            service = max(view - (self._db_after_view - self._db_before_view)
+                          - (self._cache_after_view - self._cache_before_view), 0.0)
+        render = self.render_end - self.view_end if self.render_end is not None else 0.0
+        metrics = [
+            f'db;dur={self.db * 1000:.2f};desc="{self.queries} queries"',
+            f"cache;dur={self.cache * 1000:.2f}",
+            f"service;dur={service * 1000:.2f}",
+            f"render;dur={render * 1000:.2f}",
+            f"total;dur={total * 1000:.2f}",
+        ]
+        return ", ".join(metrics)
+
+
+@contextmanager
+def timed_cache():
+    """
+    Adds the time taken by the enclosed cache lookup to the timings of the current request. Nothing is recorded outside
+    of a request.
+    """
+    timing = current_timing.get()
+    if timing is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.cache += time.perf_counter() - start
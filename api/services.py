@@ -1,13 +1,76 @@
+import bisect
+import hashlib
 import logging
+import multiprocessing
+import os
 import re
-from datetime import datetime
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
+import django
 import pandas as pd
-
-from api.models import Course, Classroom, Instructor
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F
+
+from api import legacy_engine, shadow
+from api.log_format import Truncated
+from api.models import Course, Classroom, Instructor, Term
+from api.server_timing import timed_cache
+from api.upload_handlers import MappedFile
+from api.upload_stages import UploadStages, measure_stage
 
 logger = logging.getLogger("services")
 
+# File extensions of the spreadsheet formats accepted when uploading schedule or classroom data
+UPLOAD_EXTENSIONS = ['.xlsx', '.csv']
+
+# Columns read from uploaded schedule CSV files and the type each column is parsed as. Any other columns in the file
+# are skipped by the parser.
+SCHEDULE_CSV_COLUMNS = {
+    'SEC_TERM': 'string', 'COURSE_SECTIONS_ID': 'Int64', 'SEC_STATUS': 'string', 'SEC_START_DATE': 'string',
+    'SEC_END_DATE': 'string', 'SEC_SUBJECT': 'string', 'SEC_COURSE_NO': 'string', 'SEC_NO': 'string',
+    'SEC_SHORT_TITLE': 'string', 'SEC_MIN_CRED': 'float64', 'CSM_START_TIME': 'string', 'CSM_END_TIME': 'string',
+    'CSM_MONDAY': 'string', 'CSM_TUESDAY': 'string', 'CSM_WEDNESDAY': 'string', 'CSM_THURSDAY': 'string',
+    'CSM_FRIDAY': 'string', 'CSM_BLDG': 'string', 'CSM_ROOM': 'string', 'CSM_INSTR_METHOD': 'string',
+    'SEC_FACULTY_INFO': 'string', 'STUDENTS_AND_RESERVED_SEATS': 'Int64', 'SEC_CAPACITY': 'Int64',
+}
+
+# Columns that must be present within uploaded schedule spreadsheets
+SCHEDULE_NECESSARY_COLUMNS = ['SEC_FACULTY_INFO', 'CSM_BLDG', 'CSM_ROOM', 'COURSE_SECTIONS_ID', 'SEC_COURSE_NO', 'SEC_NO',
+                              'SEC_TERM', 'SEC_START_DATE', 'SEC_END_DATE', 'SEC_SHORT_TITLE', 'SEC_SUBJECT',
+                              'SEC_MIN_CRED', 'SEC_STATUS', 'CSM_START_TIME', 'CSM_END_TIME', 'CSM_INSTR_METHOD',
+                              'STUDENTS_AND_RESERVED_SEATS', 'SEC_CAPACITY']
+
+# Columns that must be present within uploaded classroom spreadsheets
+CLASSROOM_NECESSARY_COLUMNS = ['Building Information', 'Room Number', 'Number of Student Seats in Room',
+                               'Width of Room', 'Length of Room', 'Number of Projectors in Room',
+                               'Does room have any of the following?',
+                               'Any other things of note in Room (TV or Periodic Table poster)', 'Notes']
+
+# Maximum number of row-level errors reported after validating an uploaded spreadsheet
+MAX_REPORTED_ERRORS = 500
+
+# Number of courses created by each bulk insert during batch schedule uploads
+SCHEDULE_BATCH_SIZE = 1000
+
+# Number of courses read from the database at a time while streaming a response
+STREAMING_BATCH_SIZE = 2000
+
+# Fields of the Classroom model that are set using the uploaded classroom data
+CLASSROOM_FIELDS = ['building', 'room_num', 'occupancy', 'width', 'length', 'projector_num', 'features', 'notes']
+
+# Columns read from uploaded classroom CSV files and the type each column is parsed as
+CLASSROOM_CSV_COLUMNS = {
+    'Building Information': 'string', 'Room Number': 'string', 'Number of Student Seats in Room': 'float64',
+    'Width of Room': 'Int64', 'Length of Room': 'Int64', 'Number of Projectors in Room': 'Int64',
+    'Does room have any of the following?': 'string',
+    'Any other things of note in Room (TV or Periodic Table poster)': 'string', 'Notes': 'string',
+}
+
 """
 Contains all business logic for the Carroll College classroom analytics software. Conducts all database queries and 
 returns the results to the corresponding view.
@@ -15,188 +78,509 @@ returns the results to the corresponding view.
 Author: Ryan Johnson
 """
 
+# Pool of worker processes reading the files of batch schedule uploads, started by the first batch that needs it
+_batch_executor = None
+_batch_executor_lock = threading.Lock()
+
+
+def resolve_term(term: str = None) -> (str, int):
+    """
+    Finds the term whose data should be used, along with the current generation of that term's data. If no term is
+    specified, the active term is used. Should no terms have been recorded (such as when no schedule has been uploaded
+    since terms were introduced), no term is returned and courses from every term are used.
 
-def calculate_time_blocks(buildings):
+    :param term: string containing the name of the requested term, or None to use the active term
+    :return:     tuple holding the name of the term and the generation of its data. The generation is None if the term
+                 has not been recorded.
+    """
+    if term is None:
+        active_term = Term.objects.filter(is_active=True).values_list("name", "generation").first()
+        logger.debug("resolve_term - Active term: %s", active_term)
+        return active_term if active_term is not None else (None, None)
+    generation = Term.objects.filter(name=term).values_list("generation", flat=True).first()
+    return term, generation
+
+
+def is_held_on(course_days: str, day: str) -> bool:
+    """
+    Determines whether a course is held on the specified day. Matches the course's day string in the same way as the
+    case-sensitive day__contains lookup used on MySQL, so 'T' matches 'Tth' but not 'th'.
+
+    :param course_days: string representing the days a course is held on, as built by calculate_day_string()
+    :param day:         abbreviation of the weekday ('M', 'T', 'W', 'th', or 'F')
+    :return:            True if the course is held on the day; False otherwise
+    """
+    return course_days is not None and day in course_days
+
+
+def group_time_blocks(times: set) -> []:
+    """
+    Orders a set of start and end times from earliest to latest and pairs every time with the following time, creating
+    the series of time blocks for a day. The start and end of the day are always included.
+
+    :param times: set of strings holding start and end times in HH:MM:SS format
+    :return:      list of lists holding the start and end time of every block
+    """
+    start_end_times = sorted(times | {'06:00:00', '23:59:00'})
+    return [[start_end_times[i], start_end_times[i + 1]] for i in range(0, len(start_end_times) - 1)]
+
+
+def term_courses(term: str = None):
+    """
+    Returns a queryset containing all courses held during the specified term. If no term is specified, every course is
+    included.
+
+    :param term: string containing the name of the term, or None to include courses from every term
+    :return:     queryset holding the courses held during the term
+    """
+    if term is None:
+        return Course.objects.all()
+    return Course.objects.filter(term=term)
+
+
+def get_cached_result(function_name: str, term: str, generation: int, arguments: [], calculate):
+    """
+    Returns the cached result of a calculation made for a term, calculating and caching the result if it hasn't been
+    cached already. The term and the generation of its data form part of the cache key, so uploading new data for one
+    term leaves the cached results for every other term in place, while the term's outdated results are never used
+    again and are left to expire. Results are only cached for recorded terms, since only these have a generation.
+
+    :param function_name: string naming the calculation being cached
+    :param term:          string containing the name of the term the calculation was made for
+    :param generation:    generation of the term's data the calculation was made from
+    :param arguments:     list of any other arguments the result of the calculation depends on
+    :param calculate:     callable making the calculation if no result is cached
+    :return:              result of the calculation
+    """
+    if term is None or generation is None:
+        return calculate()
+    cache_key = build_cache_key(function_name, term, generation, arguments)
+    with timed_cache():
+        result = cache.get(cache_key)
+    if result is None:
+        result = calculate()
+        with timed_cache():
+            cache.set(cache_key, result)
+    else:
+        logger.debug("get_cached_result - Using cached result for %s", cache_key)
+    return result
+
+
+def get_cached_snapshot(function_name: str, term: str, generation: int, arguments: []):
+    """
+    Returns the cached result of a calculation made for a term, as described in get_cached_result(), without making the
+    calculation if no result is cached.
+
+    :param function_name: string naming the cached calculation
+    :param term:          string containing the name of the term the calculation was made for
+    :param generation:    generation of the term's data the calculation was made from
+    :param arguments:     list of any other arguments the result of the calculation depends on
+    :return:              cached result of the calculation, or None if no result is cached
+    """
+    if term is None or generation is None:
+        return None
+    with timed_cache():
+        return cache.get(build_cache_key(function_name, term, generation, arguments))
+
+
+def build_cache_key(function_name: str, term: str, generation: int, arguments: []) -> str:
+    """
+    Builds the key a calculation's result is cached under, as described in get_cached_result().
+
+    :param function_name: string naming the calculation being cached
+    :param term:          string containing the name of the term the calculation was made for
+    :param generation:    generation of the term's data the calculation was made from
+    :param arguments:     list of any other arguments the result of the calculation depends on
+    :return:              string holding the cache key
+    """
+    arguments_hash = hashlib.md5(repr(arguments).encode()).hexdigest()
+    return f"{function_name}:{term}:{generation}:{arguments_hash}"
+
+
+def calculate_time_blocks(buildings, term=None):
     """
     Given a set of buildings, calculates every block of time in which there could be a different number of utilized
     classrooms and then returns this information in a dictionary. This dictionary uses the abbreviation for every
     weekday ('M', 'T', etc.) as the keys and an array of arrays as the values. Each of these value arrays contains
     many sub-arrays containing the start and end times for the block. If no time blocks are found for the specified
-    buildings, an empty dictionary is returned.
+    buildings, an empty dictionary is returned. The distinct meeting times of every course are read in a single query.
 
     :param  buildings:       list of buildings to look within for possible time blocks
+    :param  term:            string containing the name of the term to look within (every term if None)
     :return                  dictionary containing every possible time block in which there could be a different
                              number of utilized classrooms
     """
+    return group_building_time_blocks(buildings, list(time_block_meeting_times(buildings, term)))
+
+
+def time_block_meeting_times(buildings, term):
+    """
+    Returns a queryset holding the distinct meeting times of the courses held within the specified buildings, from which
+    the time blocks are calculated.
+
+    :param buildings: list of buildings to look within for possible time blocks ('all' includes all buildings)
+    :param term:      string containing the name of the term to look within (every term if None)
+    :return:          queryset of tuples holding the day string, start time, and end time of every meeting time
+    """
+    courses = term_courses(term).exclude(classroom__building__in=["Unknown", "OFCP"])
+    if buildings != 'all':
+        # Finds the start/end times in the specified buildings only
+        courses = courses.filter(classroom__building__in=buildings)
+    return courses.values_list('day', 'start_time', 'end_time').distinct()
+
+
+def group_building_time_blocks(buildings, meeting_times: []) -> {}:
+    """
+    Groups the meeting times of the courses held within the specified buildings into the time blocks of every day, as
+    described in calculate_time_blocks().
+
+    :param buildings:     list of buildings the courses are held in
+    :param meeting_times: list of tuples holding the day string, start time, and end time of every meeting time
+    :return:              dictionary containing every possible time block in which there could be a different number
+                          of utilized classrooms
+    """
     days_list = ['M', 'T', 'W', 'th', 'F']
     building_time_blocks = {}
     for day in days_list:
-        if buildings == 'all':
-            # Finds all start/end times on the current day from ALL buildings and converts them from datetime objects
-            # to strings
-            start_times = [time[0].strftime("%H:%M:%S") for time in
-                           Course.objects.filter(day__contains=day).values_list(
-                               'start_time').distinct().exclude(start_time__isnull=True).exclude(
-                               classroom__building__in=["Unknown", "OFCP"])]
-            end_times = [time[0].strftime("%H:%M:%S") for time in
-                         Course.objects.values_list('end_time').filter(day__contains=day).distinct()
-                         .exclude(end_time__isnull=True).exclude(classroom__building__in=["Unknown", "OFCP"])]
-        else:
-            # Finds all start/end times in the specified building on the current day
-            start_times = [time[0].strftime("%H:%M:%S") for time in
-                           Course.objects.all().filter(classroom__building__in=buildings, day__contains=day).
-                           values_list('start_time').distinct().exclude(start_time__isnull=True)
-                           .exclude(classroom__building__in=["Unknown", "OFCP"])]
-            end_times = [time[0].strftime("%H:%M:%S") for time in
-                         Course.objects.all().filter(classroom__building__in=buildings, day__contains=day).
-                         values_list('end_time').distinct().exclude(end_time__isnull=True)
-                         .exclude(classroom__building__in=["Unknown", "OFCP"])]
-
-        all_times = start_times + end_times + ['06:00:00', '23:59:00']
-        start_end_times = sorted(set(all_times))  # Organizes unique times from earliest to latest
-        logger.debug(
-            f"calculate_time_blocks - Day: {day}, Building(s): {buildings}, Possible Start/End Times: {start_end_times}")
-        time_blocks = []  # Stores the time block tuples for a given day
-
-        if len(start_end_times) > 0:
-            # Group the time blocks together if any courses take place on this day
-            for i in range(0, len(start_end_times) - 1):
-                # Pair every time with the following time to create a series of time blocks
-                time_block = [start_end_times[i], start_end_times[i + 1]]
-                time_blocks.append(time_block)
-            building_time_blocks[day] = time_blocks
-            logger.debug(
-                f"calculate_time_blocks - List of Time Blocks for {buildings} on {day}: {building_time_blocks}")
-    logger.info(f"calculate_time_blocks - Time blocks calculated for {buildings} buildings")
+        day_times = set()
+        for course_days, start_time, end_time in meeting_times:
+            if not is_held_on(course_days, day):
+                continue
+            if start_time is not None:
+                day_times.add(start_time.strftime("%H:%M:%S"))
+            if end_time is not None:
+                day_times.add(end_time.strftime("%H:%M:%S"))
+        building_time_blocks[day] = group_time_blocks(day_times)
+        logger.debug("calculate_time_blocks - List of Time Blocks for %s on %s: %s", buildings, day,
+                     Truncated(building_time_blocks[day]))
+    logger.info("calculate_time_blocks - Time blocks calculated for %s buildings", buildings)
     return building_time_blocks
 
 
-def calculate_number_classes(buildings='all'):
+def calculate_number_classes(buildings='all', term=None):
     """
     Queries the number of classrooms used during each time block and then stores this information in a dictionary.
     Returns an array containing two dictionaries, the first of which containing the time blocks in which a course is
     running inside the specified building and the second containing the recently calculated number of classrooms used
-    during each time block.
+    during each time block. Results are cached for the term until its data changes. The result is calculated by the
+    legacy engine, while count_block_classrooms() is checked against it in the shadow of sampled requests.
+
+    :param buildings: specifies which building(s) to return the number of courses for ('all' includes all
+    buildings)
+    :param term:      string containing the name of the term to return the number of courses for (active term if None)
+    :return           array holding two dictionaries, the first storing time blocks
+                      and the second the number of courses running during those time blocks
+    """
+    term, generation = resolve_term(term)
+    start = time.perf_counter()
+    result = get_cached_result("calculate_number_classes", term, generation, [buildings],
+                               lambda: legacy_engine.count_block_classrooms(buildings, term))
+    shadow.maybe_shadow("calculate_number_classes", result, time.perf_counter() - start, count_block_classrooms,
+                        buildings, term)
+    return result
+
+
+def count_block_classrooms(buildings, term):
+    """
+    Counts the number of classrooms used during each time block of the specified term, as described in
+    calculate_number_classes(). The meeting times and classroom of every course are read in a single query, after which
+    each course is added to every block it spans.
 
     :param buildings: specifies which building(s) to return the number of courses for ('all' includes all
     buildings)
+    :param term:      string containing the name of the term to count classrooms within (every term if None)
     :return           array holding two dictionaries, the first storing time blocks
                       and the second the number of courses running during those time blocks
     """
-    time_blocks = calculate_time_blocks(buildings)
+    time_blocks = calculate_time_blocks(buildings, term)
+    return count_meeting_classrooms(buildings, time_blocks, list(classroom_meetings(buildings, term)))
+
+
+def classroom_meetings(buildings, term):
+    """
+    Returns a queryset holding the meeting times and classroom of every course held within the specified buildings,
+    from which the number of classrooms used during each time block is counted.
+
+    :param buildings: list of buildings to count classrooms within ('all' includes all buildings)
+    :param term:      string containing the name of the term to count classrooms within (every term if None)
+    :return:          queryset of tuples holding the day string, start time, end time, and classroom ID of every course
+    """
+    courses = (term_courses(term).exclude(classroom__isnull=True).exclude(classroom__building="Unknown")
+               .exclude(classroom__building="OFCP").exclude(start_time__isnull=True).exclude(end_time__isnull=True))
+    if buildings != 'all':
+        # Counts the courses within the specified buildings only
+        courses = courses.filter(classroom__building__in=buildings)
+    return courses.values_list('day', 'start_time', 'end_time', 'classroom_id')
+
+
+def count_meeting_classrooms(buildings, time_blocks: {}, course_meetings: []) -> []:
+    """
+    Adds every course to each time block it spans, counting the unique classrooms used during every block, as described
+    in calculate_number_classes().
+
+    :param buildings:       list of buildings the courses are held in
+    :param time_blocks:     dictionary holding the time blocks of every day
+    :param course_meetings: list of tuples holding the day string, start time, end time, and classroom ID of every course
+    :return                 array holding two dictionaries, the first storing time blocks
+                            and the second the number of courses running during those time blocks
+    """
     if not time_blocks:
-        logger.debug(f"calculate_number_classes - No time blocks found for {buildings}")
+        logger.debug("calculate_number_classes - No time blocks found for %s", buildings)
         return [{}, {}]
-    logger.debug(f"calculate_number_classes - Time blocks found for {buildings}: {time_blocks}")
+    meetings = [(course_days, start_time.strftime("%H:%M:%S"), end_time.strftime("%H:%M:%S"), classroom_id)
+                for course_days, start_time, end_time, classroom_id in course_meetings]
+
     all_num_classes = {}  # Dictionary to hold ALL the classroom number data
     for day, day_block_list in time_blocks.items():
-        day_num_classes = {}  # Dictionary to hold the classroom number data for a single day
-        for block in day_block_list:
-            block_start_time = block[0]
-            block_end_time = block[1]
-            if buildings == 'all':
-                # Counts the number of courses (campus-wide) running between the current block's start/end times
-                block_num_classes = (Course.objects.all().filter(day__contains=day,
-                                                                 start_time__lte=block_start_time,
-                                                                 end_time__gte=block_end_time)
-                .exclude(classroom__isnull=True).exclude(classroom__building="Unknown").exclude(
-                    classroom__building="OFCP"))
-            else:
-                # Counts the number of courses (within specified buildings) running between the current block's
-                # start/end times for a subset of buildings
-                block_num_classes = (Course.objects.all().filter(day__contains=day,
-                                                                 start_time__lte=block_start_time,
-                                                                 end_time__gte=block_end_time,
-                                                                 classroom__building__in=buildings)
-                .exclude(classroom__isnull=True).exclude(classroom__building="Unknown").exclude(
-                    classroom__building="OFCP"))
-            logger.debug(f"calculate_number_classes - Buildings: {buildings}, "
-                         f"Number of courses held from {block_start_time} - {block_end_time} on {day}: {block_num_classes}")
-            # Account for the possibility of several courses in a single classroom by only counting the unique
-            # classrooms in use
-            unique_classrooms = []
-            for course in block_num_classes:
-                if course.classroom.name not in unique_classrooms:
-                    unique_classrooms.append(course.classroom.name)
-
-            day_num_classes[block_start_time] = len(unique_classrooms)
-            logger.debug(f"calculate_number_classes - Number of used classrooms found between "
-                         f"{block_start_time} - {block_end_time} on {day}: {unique_classrooms}")
-        logger.debug(
-            f"calculate_number_classes - Number Classes List for {day} in {buildings} buildings: {day_num_classes}")
+        block_start_times = [block[0] for block in day_block_list]
+        # Account for the possibility of several courses in a single classroom by only counting the unique
+        # classrooms in use during each block
+        block_classrooms = [set() for _ in day_block_list]
+        for course_days, start_time, end_time, classroom_id in meetings:
+            if not is_held_on(course_days, day):
+                continue
+            # A course runs during every block starting at or after its start time that ends by its end time
+            block_index = bisect.bisect_left(block_start_times, start_time)
+            while block_index < len(day_block_list) and day_block_list[block_index][1] <= end_time:
+                block_classrooms[block_index].add(classroom_id)
+                block_index += 1
+        day_num_classes = {block[0]: len(classrooms) for block, classrooms in zip(day_block_list, block_classrooms)}
+        logger.debug("calculate_number_classes - Number Classes List for %s in %s buildings: %s", day, buildings,
+                     Truncated(day_num_classes))
         all_num_classes[day] = day_num_classes
-    logger.debug(
-        f"calculate_number_classes - Number of used classrooms calculated for time blocks in {buildings} buildings: {all_num_classes}")
-    logger.info(f"calculate_number_classes - Number of used classrooms calculated for {buildings} buildings")
+    logger.info("calculate_number_classes - Number of used classrooms calculated for %s buildings", buildings)
     return [time_blocks, all_num_classes]
 
 
+def to_minutes(time_string: str) -> int:
+    """
+    Converts a time in HH:MM:SS format to the number of minutes since midnight.
+
+    :param time_string: string holding a time in HH:MM:SS format
+    :return:            number of minutes since midnight
+    """
+    hours, minutes = time_string.split(":")[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def compact_number_classes(number_classes: []) -> {}:
+    """
+    Converts the time blocks and classroom counts returned by calculate_number_classes() into the compact layout. Every
+    day is given as a list of the boundaries between its time blocks, in minutes since midnight, alongside a list
+    holding the number of classrooms used during each block. Block i runs from boundaries[i] to boundaries[i + 1], so
+    each day has one more boundary than it has counts.
+
+    :param number_classes: array holding the time blocks and the number of classrooms used during each block
+    :return:               dictionary mapping every day to its boundaries and counts
+    """
+    time_blocks, all_num_classes = number_classes
+    compact = {}
+    for day, day_block_list in time_blocks.items():
+        if not day_block_list:
+            compact[day] = {"boundaries": [], "counts": []}
+            continue
+        day_num_classes = all_num_classes.get(day, {})
+        compact[day] = {
+            "boundaries": [to_minutes(block[0]) for block in day_block_list] + [to_minutes(day_block_list[-1][1])],
+            "counts": [day_num_classes.get(block[0], 0) for block in day_block_list],
+        }
+    return compact
+
+
 def get_all_buildings():
     """
     Returns a dictionary storing the names of all buildings in the Classroom model.
     """
     buildings_list = Classroom.BUILDINGS
-    logger.debug(f"get_all_buildings - Possible Buildings: {buildings_list}")
+    logger.debug("get_all_buildings - Possible Buildings: %s", buildings_list)
     return buildings_list
 
 
-def get_used_classrooms(day: str, start_time: str, end_time: str, buildings: [] = "all") -> {}:
+def get_buildings_with_courses(term: str = None) -> {}:
+    """
+    Returns the buildings holding at least one course during the specified term, leaving out off-campus and unknown
+    locations.
+
+    :param term: string containing the name of the term to look within (every term if None)
+    :return:     dictionary mapping the abbreviation of every building holding courses to its full name
+    """
+    building_codes = (term_courses(term).exclude(classroom__isnull=True)
+                      .exclude(classroom__building__in=["", "Unknown", "OFCP"])
+                      .values_list('classroom__building', flat=True).distinct())
+    buildings = {code: Classroom.BUILDINGS.get(code, code) for code in sorted(building_codes)}
+    logger.debug("get_buildings_with_courses - Buildings holding courses: %s", buildings)
+    return buildings
+
+
+def get_bootstrap(term: str = None) -> {}:
+    """
+    Gathers everything the heatmap page needs when it first loads: the buildings holding courses, the number of
+    classrooms used during each time block across the whole campus, and the term and generation of the data these were
+    calculated from. The heatmap shares its cached result with calculate_number_classes(), and the whole bundle is
+    cached for the term until its data changes.
+
+    :param term: string containing the name of the term to load (active term if None)
+    :return:     dictionary holding the term, generation, buildings, and heatmap data
+    """
+    term, generation = resolve_term(term)
+
+    def build_bootstrap():
+        return {
+            "term": term,
+            "generation": generation,
+            "buildings": get_buildings_with_courses(term),
+            "numberClasses": get_cached_result("calculate_number_classes", term, generation, ['all'],
+                                               lambda: legacy_engine.count_block_classrooms('all', term)),
+        }
+
+    return get_cached_result("get_bootstrap", term, generation, [], build_bootstrap)
+
+
+def get_used_classrooms(day: str, start_time: str, end_time: str, buildings: [] = "all", term: str = None) -> {}:
     """
     Returns a list of all classrooms used during a specified time block and data about the course being held in the
-    classroom during that specified time block.
+    classroom during that specified time block. The result is calculated by the legacy engine, while
+    find_used_classrooms() is checked against it in the shadow of sampled requests.
 
     :param day: string specifying which day to search within for used classrooms
     :param start_time: string specifying the start time in which to search for used classrooms
     :param end_time:   string specifying the time in which searching for used classrooms stops
     :param buildings:  string indicating which buildings should be searched for used classrooms
+    :param term:       string containing the name of the term to search within (active term if None)
     :return            dictionary containing the data for every classroom being used within the specified time block and
                        building
     """
     # Start/end times must be in HH:MM format
     if not re.match(r'^\d{2}:\d{2}$', start_time) or not re.match(r'^\d{2}:\d{2}$', end_time):
-        logger.error(
-            f"get_used_classrooms - No classrooms found: Either {start_time} or {end_time} are not in HH:MM format")
+        logger.error("get_used_classrooms - No classrooms found: Either %s or %s are not in HH:MM format", start_time,
+                     end_time)
         return {}
 
-    if buildings == 'all':
-        # Searches for used classrooms within all buildings
-        current_courses = (Course.objects.all().filter(day__contains=day,
-                                                       start_time__lte=start_time,
-                                                       end_time__gte=end_time)
-                           .exclude(classroom__isnull=True).exclude(classroom__building__exact="OFCP")).order_by(
-            'classroom__building', 'classroom__room_num')
-    else:
+    term, generation = resolve_term(term)
+    start = time.perf_counter()
+    result = get_cached_result("get_used_classrooms", term, generation, [day, start_time, end_time, buildings],
+                               lambda: legacy_engine.find_used_classrooms(day, start_time, end_time, buildings, term))
+    shadow.maybe_shadow("get_used_classrooms", result, time.perf_counter() - start, find_used_classrooms, day,
+                        start_time, end_time, buildings, term)
+    return result
+
+
+def find_used_classrooms(day: str, start_time: str, end_time: str, buildings, term: str) -> {}:
+    """
+    Finds the classrooms used during a time block of the specified term, as described in get_used_classrooms().
+
+    :param day: string specifying which day to search within for used classrooms
+    :param start_time: string specifying the start time in which to search for used classrooms
+    :param end_time:   string specifying the time in which searching for used classrooms stops
+    :param buildings:  string indicating which buildings should be searched for used classrooms
+    :param term:       string containing the name of the term to search within (every term if None)
+    :return            dictionary containing the data for every classroom being used within the specified time block and
+                       building
+    """
+    return group_used_classrooms(day, start_time, end_time, buildings,
+                                 list(used_classroom_courses(day, start_time, end_time, buildings, term)))
+
+
+def used_classroom_courses(day: str, start_time: str, end_time: str, buildings, term: str):
+    """
+    Returns a queryset holding every course running during a time block, ordered by the classroom it is held in. The
+    classroom and instructor of every course are read within the same query as the courses.
+
+    :param day:        string specifying which day to search within for used classrooms
+    :param start_time: string specifying the start time in which to search for used classrooms
+    :param end_time:   string specifying the time in which searching for used classrooms stops
+    :param buildings:  string indicating which buildings should be searched for used classrooms
+    :param term:       string containing the name of the term to search within (every term if None)
+    :return:           queryset holding the courses running during the time block
+    """
+    current_courses = (term_courses(term).filter(day__contains=day,
+                                                   start_time__lte=start_time,
+                                                   end_time__gte=end_time)
+                       .exclude(classroom__isnull=True).exclude(classroom__building__exact="OFCP"))
+    if buildings != 'all':
         # Searches for used classrooms within only buildings specified by the filter
-        current_courses = (Course.objects.all().filter(day__contains=day,
-                                                       start_time__lte=start_time,
-                                                       end_time__gte=end_time,
-                                                       classroom__building__in=buildings)
-                           .exclude(classroom__isnull=True).exclude(classroom__building__exact="OFCP")).order_by(
-            'classroom__building', 'classroom__room_num')
-    logger.debug(f"get_used_classrooms - Courses found running between {start_time} and {end_time} on {day} "
-                 f"within {buildings} buildings: {current_courses}")
-    courses_data = [
-        [course.name, course.classroom.name, course.instructor.name, course.classroom.occupancy, course.enrolled]
-        for course in current_courses]
-    logger.debug(f"get_used_classrooms - Course Data: {courses_data}")
+        current_courses = current_courses.filter(classroom__building__in=buildings)
+    return (current_courses.select_related('classroom', 'instructor')
+            .order_by('classroom__building', 'classroom__room_num'))
+
 
+def group_used_classrooms(day: str, start_time: str, end_time: str, buildings, current_courses: []) -> {}:
+    """
+    Attaches the data of every course running during a time block to the classroom it is held in, as described in
+    get_used_classrooms().
+
+    :param day:             string specifying the day the courses are held on
+    :param start_time:      string specifying the start time of the time block
+    :param end_time:        string specifying the end time of the time block
+    :param buildings:       string indicating which buildings were searched for used classrooms
+    :param current_courses: list of the courses running during the time block, ordered by classroom
+    :return                 dictionary containing the data for every classroom being used within the specified time
+                            block and building
+    """
     # Attach the course data to the classroom it is hosted in
     classrooms_dict = {}
-    for course_data in courses_data:
-        classroom = course_data.pop(1)
-        if classroom not in classrooms_dict.keys():
-            classrooms_dict[classroom] = [course_data]
-        else:
-            classrooms_dict[classroom] += [course_data]
-
-    logger.debug(
-        f"get_used_classrooms - Classroom data found for {buildings} from {start_time} to {end_time} on {day}: "
-        f"{classrooms_dict}")
-    logger.info(f"get_used_classrooms - Used Classrooms found from {start_time} to {end_time} on {day}")
+    for course in current_courses:
+        classrooms_dict.setdefault(course.classroom.name, []).append(used_course_data(course))
+
+    logger.debug("get_used_classrooms - Classroom data found for %s from %s to %s on %s: %s", buildings, start_time,
+                 end_time, day, Truncated(classrooms_dict))
+    logger.info("get_used_classrooms - Used Classrooms found from %s to %s on %s", start_time, end_time, day)
     return classrooms_dict
 
 
-def calculate_classroom_time_blocks(classroom: str):
+def used_course_data(course: Course) -> []:
+    """
+    Lists the data shown for a course held in a used classroom.
+
+    :param course: course running during the time block, with its classroom and instructor
+    :return:       list holding the name, instructor, and enrollment of the course along with the seats in its classroom
+    """
+    instructor = course.instructor.name if course.instructor is not None else None
+    return [course.name, instructor, course.classroom.occupancy, course.enrolled]
+
+
+def iter_used_classrooms(day: str, start_time: str, end_time: str, buildings='all', term: str = None):
+    """
+    Yields every classroom used during a time block along with the courses held in it, one classroom at a time, for
+    streaming the result of get_used_classrooms() to the client. A result that has already been cached is streamed from
+    the cache. Otherwise, the courses are read in batches ordered by classroom name, and each classroom is yielded once
+    all its courses have been read, so model instances are only built for a single batch at a time. On MySQL, the
+    database driver still reads every row of the query into memory first, as Django doesn't use server-side cursors
+    there. Streamed results aren't cached, since this would need the whole result to be held in memory.
+
+    :param day:        string specifying which day to search within for used classrooms
+    :param start_time: string specifying the start time in which to search for used classrooms
+    :param end_time:   string specifying the time in which searching for used classrooms stops
+    :param buildings:  list indicating which buildings should be searched for used classrooms
+    :param term:       string containing the name of the term to search within (active term if None)
+    :return:           generator of tuples holding the name of every used classroom and the data of its courses
+    """
+    # Start/end times must be in HH:MM format
+    if not re.match(r'^\d{2}:\d{2}$', start_time) or not re.match(r'^\d{2}:\d{2}$', end_time):
+        logger.error("iter_used_classrooms - No classrooms found: Either %s or %s are not in HH:MM format", start_time,
+                     end_time)
+        return
+    term, generation = resolve_term(term)
+    cached = get_cached_snapshot("get_used_classrooms", term, generation, [day, start_time, end_time, buildings])
+    if cached is not None:
+        yield from cached.items()
+        return
+
+    # Classrooms are keyed by name, which isn't unique, so the courses are ordered by the name to read each key together
+    classroom, classroom_courses = None, []
+    courses = used_classroom_courses(day, start_time, end_time, buildings, term).order_by('classroom__name', 'id')
+    for course in courses.iterator(chunk_size=STREAMING_BATCH_SIZE):
+        if course.classroom.name != classroom and classroom_courses:
+            yield classroom, classroom_courses
+            classroom_courses = []
+        classroom = course.classroom.name
+        classroom_courses.append(used_course_data(course))
+    if classroom_courses:
+        yield classroom, classroom_courses
+    logger.info("iter_used_classrooms - Used Classrooms streamed from %s to %s on %s", start_time, end_time, day)
+
+
+def calculate_classroom_time_blocks(classroom: str, term: str = None):
     """
     Finds all possible time blocks used in the specified classroom and then returns this information in a dictionary.
     This dictionary uses the abbreviation for every weekday ('M', 'T', etc.) as the keys and an array of arrays as
@@ -204,75 +588,149 @@ def calculate_classroom_time_blocks(classroom: str):
     If no time blocks are found for the specified classroom, an empty dictionary is returned.
 
     :param  classroom: string representing the name of the classroom to be queried
+    :param  term:      string containing the name of the term to look within (every term if None)
     :return            dictionary containing every possible time block in which there could be a different course
     """
+    meeting_times = list(term_courses(term).filter(classroom__name=classroom).exclude(start_time=None)
+                         .values_list('day', 'start_time', 'end_time').distinct())
+    return group_classroom_time_blocks(classroom, meeting_times)
+
+
+def group_classroom_time_blocks(classroom: str, meeting_times: []) -> {}:
+    """
+    Groups the meeting times of the courses held in a classroom into the time blocks of every day, as described in
+    calculate_classroom_time_blocks().
+
+    :param classroom:     string representing the name of the classroom the courses are held in
+    :param meeting_times: list of tuples holding the day string, start time, and end time of every course
+    :return:              dictionary containing every possible time block in which there could be a different course
+    """
     days_list = ['M', 'T', 'W', 'th', 'F']
     classroom_time_blocks = {}
-
     for day in days_list:
-        # Finds all start/end times in the specified building on the current day
-        start_times = [time[0].strftime("%H:%M:%S") for time in
-                       Course.objects.filter(classroom__name=classroom, day__contains=day).values_list('start_time')
-                       .distinct().exclude(start_time=None)]
-        end_times = [time[0].strftime("%H:%M:%S") for time in
-                     Course.objects.filter(classroom__name=classroom, day__contains=day).values_list('end_time')
-                     .distinct().exclude(start_time=None)]
-        all_times = start_times + end_times + ['06:00:00', '23:59:00']
-        start_end_times = sorted(set(all_times))  # Organizes times from earliest to latest
-        logger.debug(
-            f"calculate_classroom_time_blocks - Start/End Times for courses in {classroom} on {day}: {start_end_times}")
-        time_blocks = []  # Stores the time block tuples for a given day
-
-        # Group the time blocks together
-        for i in range(0, len(start_end_times) - 1):
-            time_block = [start_end_times[i], start_end_times[i + 1]]
-            time_blocks.append(time_block)
-        classroom_time_blocks[day] = time_blocks
-        logger.debug(f"calculate_classroom_time_blocks - Grouped time blocks for {classroom} on {day}: {time_blocks}")
-
-    logger.debug(f"calculate_classroom_time_blocks - List of Time Blocks for {classroom}: {classroom_time_blocks}")
-    logger.info(f"calculate_classroom_time_blocks - Time blocks calculated for {classroom}")
+        day_times = set()
+        for course_days, start_time, end_time in meeting_times:
+            if is_held_on(course_days, day):
+                day_times.add(start_time.strftime("%H:%M:%S"))
+                if end_time is not None:
+                    day_times.add(end_time.strftime("%H:%M:%S"))
+        classroom_time_blocks[day] = group_time_blocks(day_times)
+        logger.debug("calculate_classroom_time_blocks - Grouped time blocks for %s on %s: %s", classroom, day,
+                     Truncated(classroom_time_blocks[day]))
+    logger.info("calculate_classroom_time_blocks - Time blocks calculated for %s", classroom)
     return classroom_time_blocks
 
 
-def get_classroom_courses(classroom: str) -> {}:
+def get_classroom_courses(classroom: str, term: str = None) -> {}:
     """
     Finds all courses taking place in the specified classroom. These courses are stored in a dictionary, with all possible
     time periods used as the keys and the name of the course being held during the time block being the value. If there
     are no courses being held in the classroom during a time block, the value for the time block is an empty string.
+    The result is calculated by the legacy engine, while find_classroom_courses() is checked against it in the shadow of
+    sampled requests.
 
     :param classroom: string representing the name of the classroom to be queried
+    :param term:      string containing the name of the term to search within (active term if None)
     :return           list holding two dictionaries, the first storing time blocks and the second the courses running during
     those time blocks
     """
-    time_blocks = calculate_classroom_time_blocks(classroom)
-    if not time_blocks:
-        logger.debug(f"get_classroom_courses - No time blocks found for {classroom}")
-        return [{}, {}]
+    term, generation = resolve_term(term)
+    start = time.perf_counter()
+    result = get_cached_result("get_classroom_courses", term, generation, [classroom],
+                               lambda: legacy_engine.find_classroom_courses(classroom, term))
+    shadow.maybe_shadow("get_classroom_courses", result, time.perf_counter() - start, find_classroom_courses, classroom,
+                        term)
+    return result
+
+
+def find_classroom_courses(classroom: str, term: str) -> {}:
+    """
+    Finds all courses taking place in the specified classroom during a term, as described in get_classroom_courses().
+    Every course held in the classroom is read in a single query, along with its instructor, and the time blocks are
+    grouped from the same courses.
+
+    :param classroom: string representing the name of the classroom to be queried
+    :param term:      string containing the name of the term to search within (every term if None)
+    :return           list holding two dictionaries, the first storing time blocks and the second the courses running during
+    those time blocks
+    """
+    return group_classroom_courses(classroom, list(classroom_courses_query(classroom, term)))
+
+
+def classroom_courses_query(classroom: str, term: str):
+    """
+    Returns a queryset holding every course taking place in the specified classroom during a term, along with its
+    instructor.
+
+    :param classroom: string representing the name of the classroom to be queried
+    :param term:      string containing the name of the term to search within (every term if None)
+    :return:          queryset holding the courses held in the classroom
+    """
+    return (term_courses(term).filter(classroom__name=classroom).exclude(start_time=None)
+            .select_related('instructor').order_by('id'))
+
+
+def group_classroom_courses(classroom: str, courses: []) -> []:
+    """
+    Groups the courses held in a classroom into the time blocks of every day, listing the courses running during each
+    block, as described in get_classroom_courses().
+
+    :param classroom: string representing the name of the classroom the courses are held in
+    :param courses:   list of the courses held in the classroom
+    :return           list holding two dictionaries, the first storing time blocks and the second the courses running
+                      during those time blocks
+    """
+    time_blocks = group_classroom_time_blocks(classroom, {(course.day, course.start_time, course.end_time)
+                                                          for course in courses})
     classroom_courses = {}  # Dictionary to hold all the courses data
     for day, day_block_list in time_blocks.items():
         day_courses = {}  # Dictionary to hold the classroom's courses during a single day
         for block in day_block_list:
             block_start_time = block[0]
             block_end_time = block[1]
-            running_course = Course.objects.all().filter(day__contains=day,
-                                                         start_time__lte=block_start_time,
-                                                         end_time__gte=block_end_time,
-                                                         classroom__name=classroom)
+            running_course = [course for course in courses
+                              if is_held_on(course.day, day) and course.end_time is not None
+                              and course.start_time.strftime("%H:%M:%S") <= block_start_time
+                              and course.end_time.strftime("%H:%M:%S") >= block_end_time]
             if len(running_course) == 0:
                 courses_data = ["", "", 0]
             else:
-                courses_data = [[course.name, course.instructor.name, course.enrolled] for course in running_course]
+                courses_data = [[course.name, course.instructor.name if course.instructor is not None else None,
+                                 course.enrolled] for course in running_course]
             day_courses[block_start_time] = courses_data
-        logger.debug(f"get_classroom_courses - Courses for {classroom} on {day}: {day_courses}")
+        logger.debug("get_classroom_courses - Courses for %s on %s: %s", classroom, day, Truncated(day_courses))
         classroom_courses[day] = day_courses
 
-    logger.debug(f"get_classroom_courses - Courses found in {classroom}: {classroom_courses}")
-    logger.info(f"get_classroom_courses - Courses found in {classroom}")
+    logger.info("get_classroom_courses - Courses found in %s", classroom)
     return [time_blocks, classroom_courses]
 
 
-def get_past_time(day, current_time, buildings='all'):
+def iter_classroom_schedules(term: str):
+    """
+    Yields the schedule of every classroom holding courses during a term, one classroom at a time, for exporting the
+    schedules of the whole campus. Each schedule is the same as the one returned by get_classroom_courses() for the
+    classroom. The courses are read from the database in batches ordered by classroom name, so model instances are only
+    built for a single batch and the courses of a single classroom at a time. On MySQL, the database driver still reads
+    every row of the query into memory first, as Django doesn't use server-side cursors there.
+
+    :param term: string containing the name of the term to export (every term if None)
+    :return:     generator of tuples holding the name of every classroom and its schedule
+    """
+    courses = (term_courses(term).exclude(classroom__isnull=True).exclude(start_time=None)
+               .select_related('classroom', 'instructor').order_by('classroom__name', 'id'))
+    classroom, classroom_courses = None, []
+    for course in courses.iterator(chunk_size=STREAMING_BATCH_SIZE):
+        if course.classroom.name != classroom and classroom_courses:
+            yield classroom, group_classroom_courses(classroom, classroom_courses)
+            classroom_courses = []
+        classroom = course.classroom.name
+        classroom_courses.append(course)
+    if classroom_courses:
+        yield classroom, group_classroom_courses(classroom, classroom_courses)
+    logger.info("iter_classroom_schedules - Classroom schedules exported for %s", term)
+
+
+def get_past_time(day, current_time, buildings='all', term=None):
     """
     Finds the starting time given an ending time for a given day and list of buildings. This is used when paging through
     different times while viewing the used classroom lists.
@@ -280,32 +738,35 @@ def get_past_time(day, current_time, buildings='all'):
     :param day:          string specifying which day to look within for time blocks
     :param buildings:    list of buildings to look within for possible time blocks
     :param current_time: string specifying the end time for a block; the paired start time is the desired output
+    :param term:         string containing the name of the term to look within (active term if None)
     :return              string detailing the start time associated with the specified end time
     """
     # The day must be M,T,W,th, or F
     if day not in ['M', 'T', 'W', 'th', 'F']:
-        logger.error(f"get_past_time - {day} is not a valid day")
+        logger.error("get_past_time - %s is not a valid day", day)
         return ''
     # Convert HH:MM format to HH:MM:SS format
     if re.match(r'^\d{2}:\d{2}$', current_time):
-        logger.debug(f"Time format of {current_time} changed to HH:MM:SS")
+        logger.debug("Time format of %s changed to HH:MM:SS", current_time)
         current_time = f"{current_time}:00"
     # The time must be in HH:MM:SS format for comparison with the times from calculate_time_blocks()
     if not re.match(r'^\d{2}:\d{2}:\d{2}$', current_time):
-        logger.error(f"get_past_time - {current_time} is not in HH:MM:SS format")
+        logger.error("get_past_time - %s is not in HH:MM:SS format", current_time)
         return ''
-    time_blocks = calculate_time_blocks(buildings)
+    term, generation = resolve_term(term)
+    time_blocks = get_cached_result("calculate_time_blocks", term, generation, [buildings],
+                                    lambda: calculate_time_blocks(buildings, term))
     for block in time_blocks[day]:
         if block[1] == current_time:
-            logger.debug(f"get_past_time - Start Time found: {block[0][:-3]}, Supplied End Time: {current_time}, "
-                         f"Day: {day}, Buildings: {buildings}")
+            logger.debug("get_past_time - Start Time found: %s, Supplied End Time: %s, Day: %s, Buildings: %s",
+                         block[0][:-3], current_time, day, buildings)
             return block[0][:-3]
     # If the time is not found within the time blocks list, return empty string
-    logger.debug(f"{current_time} not found on {day} in {buildings} buildings")
+    logger.debug("%s not found on %s in %s buildings", current_time, day, buildings)
     return ''
 
 
-def get_next_time(day, current_time, buildings='all'):
+def get_next_time(day, current_time, buildings='all', term=None):
     """
     Finds the ending time given a start time for a given day and list of buildings. This is used when paging through
     different times while viewing the used classroom lists.
@@ -313,31 +774,88 @@ def get_next_time(day, current_time, buildings='all'):
     :param day:          string specifying which day to look within for time blocks
     :param  buildings    list of buildings to look within for possible time blocks
     :param current_time: string specifying the start time which starts the block; the paired end time is the desired output
+    :param term:         string containing the name of the term to look within (active term if None)
     :return              string detailing the end time associated with the specified start time
     """
     # The day must be M,T,W,th, or F
     if day not in ['M', 'T', 'W', 'th', 'F']:
-        logger.debug(f"get_next_time - {day} is not a valid day")
+        logger.debug("get_next_time - %s is not a valid day", day)
         return ''
     # Convert HH:MM format to HH:MM:SS format
     if re.match(r'^\d{2}:\d{2}$', current_time):
-        logger.debug(f"get_next_time - Time format of {current_time} changed to HH:MM:SS")
+        logger.debug("get_next_time - Time format of %s changed to HH:MM:SS", current_time)
         current_time = f"{current_time}:00"
     # The time must be in HH:MM:SS format for comparison with the times from calculate_time_blocks()
     if not re.match(r'^\d{2}:\d{2}:\d{2}$', current_time):
-        logger.error(f"get_next_time - {current_time} is not in HH:MM:SS format")
+        logger.error("get_next_time - %s is not in HH:MM:SS format", current_time)
         return ''
-    time_blocks = calculate_time_blocks(buildings)
+    term, generation = resolve_term(term)
+    time_blocks = get_cached_result("calculate_time_blocks", term, generation, [buildings],
+                                    lambda: calculate_time_blocks(buildings, term))
     for block in time_blocks[day]:
         if block[0] == current_time:
-            logger.debug(f"get_next_time - End Time found: {block[1][:-3]}, Supplied Start Time: {current_time}, "
-                         f"Day: {day}, Buildings: {buildings}")
+            logger.debug("get_next_time - End Time found: %s, Supplied Start Time: %s, Day: %s, Buildings: %s",
+                         block[1][:-3], current_time, day, buildings)
             return block[1][:-3]
     # If the time is not found within the time blocks list, return empty string
-    logger.debug(f"{current_time} not found on {day} in {buildings} buildings")
+    logger.debug("%s not found on %s in %s buildings", current_time, day, buildings)
     return ''
 
 
+def get_block_page(day: str, current_time: str, direction: str, buildings='all', term: str = None) -> {}:
+    """
+    Finds the time block reached by paging from the current block along with the classrooms used during it, combining
+    get_next_time(), get_past_time(), and get_used_classrooms() into a single call. Paging to the next block finds the
+    block starting at the given time, while paging to the previous block finds the block ending at the given time. The
+    neighbouring blocks on either side of the block found are also returned, allowing them to be fetched in advance.
+
+    :param day:          string specifying which day to look within for time blocks
+    :param current_time: string specifying the start time of the block to find when paging to the next block, or its
+                         end time when paging to the previous block
+    :param direction:    string specifying whether to page to the 'next' or 'previous' block
+    :param buildings:    list of buildings to look within for time blocks and used classrooms
+    :param term:         string containing the name of the term to look within (active term if None)
+    :return              dictionary holding the day, start and end time of the block, the classrooms used during it,
+                         and the neighbouring blocks (None where the day has no neighbouring block). An empty dictionary
+                         is returned if no such block is found.
+    """
+    # The day must be M,T,W,th, or F
+    if day not in ['M', 'T', 'W', 'th', 'F'] or direction not in ['next', 'previous']:
+        logger.error("get_block_page - Can't page to the %s block on %s", direction, day)
+        return {}
+    # Convert HH:MM format to HH:MM:SS format
+    if re.match(r'^\d{2}:\d{2}$', current_time):
+        current_time = f"{current_time}:00"
+    if not re.match(r'^\d{2}:\d{2}:\d{2}$', current_time):
+        logger.error("get_block_page - %s is not in HH:MM:SS format", current_time)
+        return {}
+    term, generation = resolve_term(term)
+    day_block_list = get_cached_result("calculate_time_blocks", term, generation, [buildings],
+                                       lambda: calculate_time_blocks(buildings, term))[day]
+    # The time blocks of a day are contiguous, so the block found is the one sharing the current time as a boundary
+    boundary = 0 if direction == 'next' else 1
+    block_index = next((index for index, block in enumerate(day_block_list) if block[boundary] == current_time), None)
+    if block_index is None:
+        logger.debug("get_block_page - %s not found on %s in %s buildings", current_time, day, buildings)
+        return {}
+
+    # Times are returned in the HH:MM format sent by the front end
+    start_time, end_time = [time[:-3] for time in day_block_list[block_index]]
+    previous_block = [time[:-3] for time in day_block_list[block_index - 1]] if block_index > 0 else None
+    next_block = ([time[:-3] for time in day_block_list[block_index + 1]]
+                  if block_index + 1 < len(day_block_list) else None)
+    logger.debug("get_block_page - Paged to the %s block from %s on %s: %s to %s", direction, current_time, day,
+                 start_time, end_time)
+    return {
+        "day": day,
+        "startTime": start_time,
+        "endTime": end_time,
+        "usedClassrooms": get_used_classrooms(day, start_time, end_time, buildings, term),
+        "previousBlock": previous_block,
+        "nextBlock": next_block,
+    }
+
+
 def calculate_day_string(row):
     """
     Creates a string representing the days a class is held on.
@@ -356,159 +874,678 @@ def calculate_day_string(row):
     if row['CSM_FRIDAY'] == 'Y':
         days += 'F'
 
-    logger.debug(f"calculate_day_string - Day String calculated for {row}: {days}")
+    if logger.isEnabledFor(logging.DEBUG):
+        # Called for every row of an upload, so even building the log arguments is skipped unless debugging
+        logger.debug("calculate_day_string - Day String calculated for %s: %s", Truncated(row.to_dict()), days)
     return days
 
 
-def upload_schedule_data(file):
+def report_progress(progress, phase: str, rows_processed: int = 0, rows_total: int = 0):
     """
-    Creates classroom, instructor, and course objects from the uploaded schedule Excel file and populates the database.
-    Any data already present within the database for the term being currently uploaded is replaced.
+    Passes the current state of an upload along to the given progress callback. Uploads run without a callback (such as
+    those made directly from the shell) skip the reporting entirely.
+
+    :param progress:       callable accepting the phase, rows processed, and total rows, or None
+    :param phase:          string naming the current phase of the upload ('reading', 'importing')
+    :param rows_processed: number of spreadsheet rows imported so far
+    :param rows_total:     total number of rows within the spreadsheet
+    """
+    if progress is not None:
+        progress(phase, rows_processed, rows_total)
+
+
+def is_upload_file_type(file_name: str) -> bool:
+    """
+    Determines whether the specified file is one of the spreadsheet formats accepted for uploads (.xlsx or .csv).
+
+    :param file_name: string containing the name of the uploaded file
+    :return:          True if the file is an accepted spreadsheet format; False otherwise
+    """
+    return any(file_name.lower().endswith(extension) for extension in UPLOAD_EXTENSIONS)
+
+
+def read_spreadsheet(file, csv_columns: {}) -> pd.DataFrame:
+    """
+    Reads an uploaded spreadsheet into a DataFrame. Excel spreadsheets are read in full using openpyxl. CSV files are
+    instead read in a single pass by pandas' C parser, which only keeps the specified columns and parses each of them
+    directly into its declared type, avoiding the cost of building an Excel workbook.
+
+    :param file:        uploaded .xlsx or .csv file
+    :param csv_columns: dictionary mapping the name of every column read from a CSV file to its type
+    :return:            DataFrame holding the contents of the spreadsheet
+    """
+    if file.name.lower().endswith('.csv'):
+        try:
+            return pd.read_csv(file, usecols=lambda column: column in csv_columns, dtype=csv_columns, engine='c')
+        except (ValueError, TypeError):
+            # A value in one of the numeric columns couldn't be parsed (or, for integer columns, held a fraction), so
+            # every column is read as text instead, leaving the invalid value to be reported when the spreadsheet is
+            # validated
+            logger.debug("read_spreadsheet - Numeric columns of %s could not be parsed, reading as text", file.name)
+            file.seek(0)
+            return pd.read_csv(file, usecols=lambda column: column in csv_columns, dtype='string', engine='c')
+    return pd.read_excel(file)
+
+
+def find_missing_columns(df: pd.DataFrame, necessary_columns: []) -> []:
+    """
+    Finds any necessary columns that are missing from an uploaded spreadsheet.
+
+    :param df:                DataFrame holding the contents of the uploaded spreadsheet
+    :param necessary_columns: list of the columns the spreadsheet must contain
+    :return:                  list of the names of the missing columns
+    """
+    return [column_name for column_name in necessary_columns if column_name not in df.columns]
+
+
+def describe_invalid_values(df: pd.DataFrame, invalid: pd.Series, column: str, message: str) -> []:
+    """
+    Creates an error for every row of a spreadsheet column holding an invalid value. Rows are numbered as they appear
+    in the spreadsheet, where the first row holds the column names.
+
+    :param df:      DataFrame holding the contents of the uploaded spreadsheet
+    :param invalid: boolean Series marking the rows holding an invalid value
+    :param column:  string containing the name of the column being checked
+    :param message: string describing why the values are invalid
+    :return:        list of dictionaries holding the row, column, value, and description of every error
+    """
+    return [{"row": int(index) + 2, "column": column, "value": str(value), "message": message}
+            for index, value in df.loc[invalid, column].items()]
+
 
-    :param file: Excel spreadsheet containing the scheduled course data for populating the database
-    :return: boolean specifying whether the upload was successful and a list of missing columns. If an invalid file is
-             provided or the upload is successful, the missing columns list will be empty.
+def find_format_errors(df: pd.DataFrame, column: str, date_format: str, example: str, required: bool) -> []:
+    """
+    Finds every value in a spreadsheet column that can't be read using the specified date/time format. The entire
+    column is checked at once, rather than parsing one row at a time.
+
+    :param df:          DataFrame holding the contents of the uploaded spreadsheet
+    :param column:      string containing the name of the column being checked
+    :param date_format: strptime format the values must be written in
+    :param example:     string containing an example of a correctly formatted value
+    :param required:    True if every row must have a value in the column
+    :return:            list of dictionaries describing every invalid value
+    """
+    parsed = pd.to_datetime(df[column].astype(str), format=date_format, errors='coerce')
+    errors = describe_invalid_values(df, parsed.isna() & df[column].notna(), column,
+                                     f"Expected a value formatted like '{example}'")
+    if required:
+        errors += describe_invalid_values(df, df[column].isna(), column, "Missing value")
+    return errors
+
+
+def find_number_errors(df: pd.DataFrame, column: str, whole: bool = False) -> []:
+    """
+    Finds every value in a spreadsheet column that isn't a number, or that isn't a whole number for columns stored as
+    integers. Empty values are allowed.
+
+    :param df:     DataFrame holding the contents of the uploaded spreadsheet
+    :param column: string containing the name of the column being checked
+    :param whole:  True if every value in the column must be a whole number
+    :return:       list of dictionaries describing every invalid value
+    """
+    numbers = pd.to_numeric(df[column], errors='coerce')
+    errors = describe_invalid_values(df, numbers.isna() & df[column].notna(), column, "Expected a number")
+    if whole:
+        errors += describe_invalid_values(df, (numbers.fillna(0) % 1 != 0).astype(bool), column,
+                                          "Expected a whole number")
+    return errors
+
+
+def find_schedule_errors(df: pd.DataFrame) -> []:
+    """
+    Checks every row of an uploaded schedule spreadsheet for values that would prevent its course from being created,
+    including missing values for required fields, dates or times in the wrong format, non-numeric values in numeric
+    columns, and fractions in columns stored as whole numbers. The instruction method is optional, as the registrar
+    leaves it blank for some sections.
+
+    :param df: DataFrame holding the contents of the uploaded schedule spreadsheet
+    :return:   list of dictionaries describing every invalid value, ordered by row
+    """
+    errors = []
+    for column in ['SEC_TERM', 'COURSE_SECTIONS_ID', 'SEC_COURSE_NO', 'SEC_NO', 'SEC_SHORT_TITLE', 'SEC_SUBJECT',
+                   'SEC_STATUS']:
+        errors += describe_invalid_values(df, df[column].isna(), column, "Missing value")
+    for column in ['SEC_START_DATE', 'SEC_END_DATE']:
+        errors += find_format_errors(df, column, '%b %d %Y', 'Jan 17 2024', True)
+    for column in ['CSM_START_TIME', 'CSM_END_TIME']:
+        errors += find_format_errors(df, column, '%I:%M%p', '9:00AM', False)
+    errors += find_number_errors(df, 'SEC_MIN_CRED')
+    for column in ['COURSE_SECTIONS_ID', 'STUDENTS_AND_RESERVED_SEATS', 'SEC_CAPACITY']:
+        errors += find_number_errors(df, column, True)
+    return sorted(errors, key=lambda error: error["row"])
+
+
+def find_classroom_errors(df: pd.DataFrame) -> []:
+    """
+    Checks every row of an uploaded classroom spreadsheet for missing building or room numbers, for non-numeric values
+    in the numeric columns, and for fractions in the columns stored as whole numbers.
+
+    :param df: DataFrame holding the contents of the uploaded classroom spreadsheet
+    :return:   list of dictionaries describing every invalid value, ordered by row
+    """
+    errors = []
+    for column in ['Building Information', 'Room Number']:
+        errors += describe_invalid_values(df, df[column].isna(), column, "Missing value")
+    errors += find_number_errors(df, 'Number of Student Seats in Room')
+    for column in ['Width of Room', 'Length of Room', 'Number of Projectors in Room']:
+        errors += find_number_errors(df, column, True)
+    return sorted(errors, key=lambda error: error["row"])
+
+
+def validate_upload(file, data_type: str) -> {}:
+    """
+    Checks an uploaded spreadsheet without writing anything to the database. Every row of the spreadsheet is checked
+    for the same problems that would cause the real upload to fail, and a summary of the spreadsheet's contents is
+    returned alongside any errors found.
+
+    :param file:      Excel spreadsheet or CSV file containing schedule or classroom data
+    :param data_type: string specifying the type of data within the file ('schedule' or 'classroom')
+    :return:          dictionary holding whether the file is valid, any missing columns, the row-level errors, and
+                      summary statistics for the file
+    """
+    result = {"success": False, "missingColumns": [], "errors": [], "errorCount": 0, "stats": {}}
+    if file is None or not is_upload_file_type(file.name):
+        logger.info("validate_upload - Attempt to validate a file that was not an .xlsx or .csv file")
+        return result
+
+    if data_type == "schedule":
+        df = read_spreadsheet(file, SCHEDULE_CSV_COLUMNS)
+        result["missingColumns"] = find_missing_columns(df, SCHEDULE_NECESSARY_COLUMNS)
+    else:
+        df = read_spreadsheet(file, CLASSROOM_CSV_COLUMNS)
+        result["missingColumns"] = find_missing_columns(df, CLASSROOM_NECESSARY_COLUMNS)
+    if len(result["missingColumns"]) > 0:
+        logger.info("validate_upload - %s is missing columns: %s", file.name, result['missingColumns'])
+        return result
+
+    if data_type == "schedule":
+        errors = find_schedule_errors(df)
+        result["stats"] = {
+            "rows": len(df.index),
+            "terms": {str(term): int(count) for term, count in df['SEC_TERM'].value_counts().items()},
+            "buildings": int(df['CSM_BLDG'].nunique()),
+            "classrooms": int((df['CSM_BLDG'].astype(str) + "-" + df['CSM_ROOM'].astype(str))[
+                                  df['CSM_BLDG'].notna()].nunique()),
+            "instructors": int(df['SEC_FACULTY_INFO'].nunique()),
+            "scheduledSections": int(df['CSM_START_TIME'].notna().sum()),
+        }
+    else:
+        errors = find_classroom_errors(df)
+        names = df['Building Information'].astype(str) + "-" + df['Room Number'].astype(str)
+        result["stats"] = {
+            "rows": len(df.index),
+            "buildings": int(df['Building Information'].nunique()),
+            "classrooms": int(names.nunique()),
+            "duplicateClassrooms": int(names.duplicated().sum()),
+        }
+
+    result["success"] = len(errors) == 0
+    result["errors"] = errors[:MAX_REPORTED_ERRORS]
+    result["errorCount"] = len(errors)
+    result["stats"]["rowsWithErrors"] = len({error["row"] for error in errors})
+    logger.info("validate_upload - %s validated with %s errors", file.name, len(errors))
+    return result
+
+
+def upload_schedule_data(file, progress=None, stages=None):
+    """
+    Creates classroom, instructor, and course objects from the uploaded schedule Excel file and populates the database.
+    Any data already present within the database for the term being currently uploaded is replaced, while the data for
+    any other terms is kept. The uploaded term becomes the active term. The rows are parsed and written in bulk by the
+    same functions used for batch uploads.
+
+    :param file: Excel spreadsheet or CSV file containing the scheduled course data for populating the database
+    :param progress: optional callable receiving the phase, rows processed, and total rows as the upload runs
+    :param stages: optional UploadStages recording the time and memory taken by each stage of the upload
+    :return: boolean specifying whether the upload was successful, a list of missing columns, and a dictionary holding
+             the number of courses created and the terms uploaded. If an invalid file is provided or the upload is successful, the missing
+             columns list will be empty.
     """
     missing_columns = []
 
     # File cannot be empty
     if file is None:
         logger.info("upload_schedule_data - Attempt to upload a schedule without specifying a file")
-        return False, missing_columns
+        return False, missing_columns, {}
+
+    # The file must be an Excel spreadsheet or CSV file to be uploaded to the DB
+    if not is_upload_file_type(file.name):
+        logger.error("upload_schedule_data - Attempt to upload file that was not an .xlsx or .csv file: %s", file.name)
+        return False, missing_columns, {}
+
+    with measure_stage(stages, "read") as stage:
+        df = read_spreadsheet(file, SCHEDULE_CSV_COLUMNS)
+        stage["rows"] = len(df.index)
+
+    with measure_stage(stages, "validate", len(df.index)):
+        # Make sure all the necessary columns are in the uploaded spreadsheet
+        missing_columns = find_missing_columns(df, SCHEDULE_NECESSARY_COLUMNS)
+        # Check every row before any data is deleted, so that a malformed spreadsheet leaves the current data in place
+        errors = find_schedule_errors(df) if len(missing_columns) == 0 else []
+    if len(missing_columns) > 0:
+        logger.error("upload_schedule_data - SCHEDULE UPLOAD ABORTED - Schedule spreadsheet upload (%s) was missing "
+                     "columns: %s",
+                     file.name, missing_columns)
+        return False, missing_columns, {}
+    if len(errors) > 0:
+        logger.error("upload_schedule_data - SCHEDULE UPLOAD ABORTED - Schedule spreadsheet upload (%s) had %s "
+                     "invalid values",
+                     file.name, len(errors))
+        return False, missing_columns, {"errors": errors[:MAX_REPORTED_ERRORS], "errorCount": len(errors)}
+
+    with measure_stage(stages, "parse", len(df.index)):
+        records = build_schedule_records(df)
+        uploaded_terms = df['SEC_TERM'].dropna().astype(str).value_counts().index.tolist()
+
+    # Replace the data for the uploaded term(s) to prevent duplicate courses, keeping the data for any other terms
+    write_schedule_records(records, uploaded_terms, progress, stages)
+    with measure_stage(stages, "invalidate", len(uploaded_terms)):
+        record_uploaded_terms(uploaded_terms)
+    logger.info("New Course Schedule Spreadsheet Uploaded: %s", file.name)
+    return True, None, {"created": len(records), "terms": uploaded_terms}
+
+
+def read_spreadsheet_sheets(file, csv_columns: {}) -> {}:
+    """
+    Reads every sheet of an uploaded spreadsheet into its own DataFrame. CSV files only ever contain a single sheet,
+    which is read as described in read_spreadsheet().
+
+    :param file:        uploaded .xlsx or .csv file
+    :param csv_columns: dictionary mapping the name of every column read from a CSV file to its type
+    :return:            dictionary mapping the name of each sheet to a DataFrame holding its contents. The sheet of a
+                        CSV file is named with an empty string.
+    """
+    if file.name.lower().endswith('.csv'):
+        return {"": read_spreadsheet(file, csv_columns)}
+    return pd.read_excel(file, sheet_name=None)
+
+
+def build_schedule_records(df: pd.DataFrame) -> []:
+    """
+    Converts the rows of a validated schedule spreadsheet into the values used to create each course. Dates and times
+    are parsed for the whole sheet at once, and missing values are replaced with None, other than a missing instruction
+    method, which is left blank. The instructor and classroom of each course are kept by name, since they are only
+    matched with the rows in the database once every sheet of a batch has been read.
+
+    :param df: DataFrame holding the contents of a validated schedule spreadsheet
+    :return:   list of dictionaries holding the field values of every course, along with the names of its instructor,
+               building, and room
+    """
+    has_classroom = df['CSM_BLDG'].notna()
+    records = pd.DataFrame({
+        'section_id': df['COURSE_SECTIONS_ID'],
+        'course_num': df['SEC_COURSE_NO'],
+        'section_num': df['SEC_NO'],
+        'term': df['SEC_TERM'],
+        'start_date': pd.to_datetime(df['SEC_START_DATE'].astype(str), format='%b %d %Y').dt.date,
+        'end_date': pd.to_datetime(df['SEC_END_DATE'].astype(str), format='%b %d %Y').dt.date,
+        'name': df['SEC_SHORT_TITLE'],
+        'subject': df['SEC_SUBJECT'],
+        'min_credits': df['SEC_MIN_CRED'],
+        'status': df['SEC_STATUS'],
+        'start_time': pd.to_datetime(df['CSM_START_TIME'], format='%I:%M%p', errors='coerce').dt.time,
+        'end_time': pd.to_datetime(df['CSM_END_TIME'], format='%I:%M%p', errors='coerce').dt.time,
+        'day': df.apply(calculate_day_string, axis=1) if len(df.index) > 0 else pd.Series(dtype=str),
+        'instruction_method': df['CSM_INSTR_METHOD'].fillna(""),
+        'enrolled': df['STUDENTS_AND_RESERVED_SEATS'],
+        'capacity': df['SEC_CAPACITY'],
+        'instructor': df['SEC_FACULTY_INFO'],
+        'building': df['CSM_BLDG'].where(has_classroom),
+        'room_num': df['CSM_ROOM'].map(str).where(has_classroom),
+    }).astype(object)
+    return records.where(records.notna(), None).to_dict('records')
+
+
+def parse_schedule_file(file_name: str, file_path: str) -> {}:
+    """
+    Reads and validates every sheet of a saved schedule spreadsheet, converting the rows of each valid sheet into course
+    records. Runs within a separate worker process during larger batch uploads, so nothing here touches the database.
+    The stages of reading, validating, and parsing the file are measured wherever the file is parsed.
+
+    :param file_name: string containing the original name of the uploaded file
+    :param file_path: string containing the path of the saved file
+    :return:          dictionary holding a list describing each sheet of the file, with its missing columns, row-level
+                      errors, and course records, along with a list of the stages measured while parsing the file
+    """
+    stages = UploadStages()
+    with stages.measure("read", fileName=file_name) as stage:
+        with MappedFile(file_path) as file:
+            sheets = read_spreadsheet_sheets(file, SCHEDULE_CSV_COLUMNS)
+        stage["rows"] = sum(len(df.index) for df in sheets.values())
+
+    results = []
+    for sheet_name, df in sheets.items():
+        result = {"fileName": file_name, "sheet": str(sheet_name), "rows": len(df.index), "missingColumns": [],
+                  "errors": [], "errorCount": 0, "records": []}
+        with stages.measure("validate", len(df.index), fileName=file_name, sheet=str(sheet_name)):
+            result["missingColumns"] = find_missing_columns(df, SCHEDULE_NECESSARY_COLUMNS)
+            errors = find_schedule_errors(df) if len(result["missingColumns"]) == 0 else []
+        result["errors"] = errors[:MAX_REPORTED_ERRORS]
+        result["errorCount"] = len(errors)
+        if len(result["missingColumns"]) == 0 and len(errors) == 0:
+            with stages.measure("parse", len(df.index), fileName=file_name, sheet=str(sheet_name)):
+                result["records"] = build_schedule_records(df)
+        results.append(result)
+    return {"sheets": results, "stages": stages.stages}
+
+
+def get_batch_executor() -> ProcessPoolExecutor:
+    """
+    Returns the pool of worker processes used to read the files of batch schedule uploads, starting it on first use.
+    The pool is shared by every batch uploaded to this server process, so the cost of spawning the workers and setting
+    up Django within each of them is only paid once.
 
-    # The file must be an Excel spreadsheet to be uploaded to the DB
-    if file.name[-5:] != '.xlsx':
-        logger.error(f"upload_schedule_data - Attempt to upload file that was not an .xlsx file: {file.name}")
-        return False, missing_columns
+    :return: ProcessPoolExecutor reading batch schedule files
+    """
+    global _batch_executor
+    with _batch_executor_lock:
+        if _batch_executor is None:
+            # New processes are spawned rather than forked, so that the workers never share the server's database
+            # connections
+            _batch_executor = ProcessPoolExecutor(max_workers=settings.UPLOAD_BATCH_PROCESSES,
+                                                  mp_context=multiprocessing.get_context("spawn"),
+                                                  initializer=django.setup)
+        return _batch_executor
+
+
+def discard_batch_executor(executor: ProcessPoolExecutor):
+    """
+    Stops a pool of batch worker processes that can no longer be used, such as after one of its workers died, so that
+    the next batch starts a new pool.
+
+    :param executor: ProcessPoolExecutor that stopped working
+    """
+    global _batch_executor
+    with _batch_executor_lock:
+        if _batch_executor is executor:
+            _batch_executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
 
-    df = pd.read_excel(file)
 
-    # Make sure all the necessary columns are in the uploaded spreadsheet
-    necessary_columns = ['SEC_FACULTY_INFO', 'CSM_BLDG', 'CSM_ROOM', 'COURSE_SECTIONS_ID', 'SEC_COURSE_NO', 'SEC_NO',
-                         'SEC_TERM', 'SEC_START_DATE', 'SEC_END_DATE', 'SEC_SHORT_TITLE', 'SEC_SUBJECT', 'SEC_MIN_CRED',
-                         'SEC_STATUS', 'CSM_START_TIME', 'CSM_END_TIME', 'CSM_INSTR_METHOD',
-                         'STUDENTS_AND_RESERVED_SEATS', 'SEC_CAPACITY']
+def parse_schedule_files(files: []) -> []:
+    """
+    Reads, validates, and parses every file of a batch schedule upload. Batches holding a single file or only small
+    files are parsed one file at a time within the calling thread, while larger batches are spread across the shared
+    pool of worker processes.
+
+    :param files: list of tuples holding the original name and the saved path of every uploaded file
+    :return:      list holding the result of parse_schedule_file() for every file, in the order given
+    """
+    if len(files) == 1 or sum(os.path.getsize(path) for _, path in files) <= settings.UPLOAD_BATCH_IN_PROCESS_SIZE:
+        return [parse_schedule_file(file_name, file_path) for file_name, file_path in files]
+    executor = get_batch_executor()
+    try:
+        return list(executor.map(parse_schedule_file, *zip(*files)))
+    except BrokenProcessPool:
+        discard_batch_executor(executor)
+        raise
+
 
-    for column_name in necessary_columns:
-        if column_name not in df.columns:
-            missing_columns.append(column_name)
+def upload_schedule_batch(files: [], progress=None, stages=None):
+    """
+    Uploads several schedule spreadsheets at once, including every sheet of any Excel workbook. Reading and validating
+    the spreadsheets is CPU-bound, so the files of larger batches are parsed within separate worker processes, allowing
+    the batch to be read in roughly the time taken by its slowest file. Should any sheet be missing columns or contain invalid values, the
+    whole batch is rejected without changing any data. Otherwise, the courses from every sheet are written together in
+    bulk, replacing any data held for the uploaded terms, as in upload_schedule_data().
+
+    :param files:    list of tuples holding the original name and the saved path of every uploaded file
+    :param progress: optional callable receiving the phase, rows processed, and total rows as the upload runs
+    :param stages:   optional UploadStages recording the time and memory taken by each stage of the upload, including
+                     the stages measured while parsing every file
+    :return:         boolean specifying whether the upload was successful, a list of missing columns, and a dictionary
+                     holding the number of courses created, the terms uploaded, and a description of every sheet read
+    """
+    if len(files) == 0:
+        logger.info("upload_schedule_batch - Attempt to upload a batch without specifying any files")
+        return False, [], {}
+    invalid_files = [file_name for file_name, _ in files if not is_upload_file_type(file_name)]
+    if len(invalid_files) > 0:
+        logger.error("upload_schedule_batch - Attempt to upload files that were not .xlsx or .csv files: %s",
+                     invalid_files)
+        return False, [], {}
+
+    report_progress(progress, "reading")
+    with measure_stage(stages, "parse", fileCount=len(files)) as stage:
+        parsed_files = parse_schedule_files(files)
+        sheets = [sheet for parsed_file in parsed_files for sheet in parsed_file["sheets"]]
+        stage["rows"] = sum(sheet["rows"] for sheet in sheets)
+    if stages is not None:
+        stages.stages += [file_stage for parsed_file in parsed_files for file_stage in parsed_file["stages"]]
+
+    sheet_summaries = [{key: sheet[key] for key in ["fileName", "sheet", "rows", "missingColumns", "errorCount"]}
+                       for sheet in sheets]
+    missing_columns = sorted({column for sheet in sheets for column in sheet["missingColumns"]})
     if len(missing_columns) > 0:
-        logger.error(
-            f"upload_schedule_data - SCHEDULE UPLOAD ABORTED - Schedule spreadsheet upload ({file.name}) was missing columns: {missing_columns}")
-        return False, missing_columns
-
-    # Delete all data to prevent different semesters being present in the DB
-    Course.objects.all().delete()
-
-    # Create new courses from the uploaded file
-    for index, row in df.iterrows():
-        instructor, _ = Instructor.objects.get_or_create(
-            name=row['SEC_FACULTY_INFO'],
-        )
-        logger.debug(f"Instructor {instructor} present")
-
-        classroom = None
-        # Create a classroom object if it doesn't already exist
-        if not pd.isna(row['CSM_BLDG']):
-            classroom, created = Classroom.objects.get_or_create(
-                name=row['CSM_BLDG'] + "-" + str(row['CSM_ROOM']),
-                building=row['CSM_BLDG'],
-                room_num=row['CSM_ROOM'],
-            )
-            if created:
-                logger.debug(f"Classroom {classroom} created")
-
-        # Create the course object
-        day_string = calculate_day_string(row)
-        course = Course.objects.create(
-            section_id=None if pd.isna(row['COURSE_SECTIONS_ID']) else row['COURSE_SECTIONS_ID'],
-            course_num=None if pd.isna(row['SEC_COURSE_NO']) else row['SEC_COURSE_NO'],
-            section_num=None if pd.isna(row['SEC_NO']) else row['SEC_NO'],
-            term=None if pd.isna(row['SEC_TERM']) else row['SEC_TERM'],
-            start_date=datetime.strptime(row['SEC_START_DATE'], '%b %d %Y').date(),
-            end_date=datetime.strptime(row['SEC_END_DATE'], '%b %d %Y').date(),
-            name=row['SEC_SHORT_TITLE'],
-            subject=row['SEC_SUBJECT'],
-            min_credits=None if pd.isna(row['SEC_MIN_CRED']) else row['SEC_MIN_CRED'],
-            status=None if pd.isna(row['SEC_STATUS']) else row['SEC_STATUS'],
-            start_time=None if pd.isna(row['CSM_START_TIME']) else datetime.strptime(row['CSM_START_TIME'],
-                                                                                     '%I:%M%p').time(),
-            end_time=None if pd.isna(row['CSM_END_TIME']) else datetime.strptime(row['CSM_END_TIME'],
-                                                                                 '%I:%M%p').time(),
-            day=day_string,
-            classroom=classroom if classroom is not None else None,
-            instruction_method=row['CSM_INSTR_METHOD'],
-            instructor=instructor,
-            enrolled=None if pd.isna(row['STUDENTS_AND_RESERVED_SEATS']) else row['STUDENTS_AND_RESERVED_SEATS'],
-            capacity=None if pd.isna(row['SEC_CAPACITY']) else row['SEC_CAPACITY'],
-        )
-        logger.debug(f"Course {course} created")
-
-    logger.info(f"New Course Schedule Spreadsheet Uploaded: {file.name}")
-    return True, None
-
-
-def upload_classroom_data(file):
+        logger.error("upload_schedule_batch - SCHEDULE UPLOAD ABORTED - Batch was missing columns: %s", missing_columns)
+        return False, missing_columns, {"sheets": sheet_summaries}
+    errors = [dict(error, fileName=sheet["fileName"], sheet=sheet["sheet"]) for sheet in sheets
+              for error in sheet["errors"]]
+    error_count = sum(sheet["errorCount"] for sheet in sheets)
+    if error_count > 0:
+        logger.error("upload_schedule_batch - SCHEDULE UPLOAD ABORTED - Batch had %s invalid values", error_count)
+        return False, missing_columns, {"errors": errors[:MAX_REPORTED_ERRORS], "errorCount": error_count,
+                                        "sheets": sheet_summaries}
+
+    records = [record for sheet in sheets for record in sheet["records"]]
+    uploaded_terms = pd.Series([record['term'] for record in records], dtype=object).value_counts().index.tolist()
+    write_schedule_records(records, uploaded_terms, progress, stages)
+    with measure_stage(stages, "invalidate", len(uploaded_terms)):
+        record_uploaded_terms(uploaded_terms)
+    logger.info("upload_schedule_batch - Batch of %s schedule sheets uploaded with %s courses", len(sheets),
+                len(records))
+    return True, None, {"created": len(records), "terms": uploaded_terms, "sheets": sheet_summaries}
+
+
+def write_schedule_records(records: [], uploaded_terms: [], progress=None, stages=None):
     """
-    Creates new classroom objects using Dan Case's classroom data and populates the database. Any classrooms mentioned
-    in uploaded Excel spreadsheet replace the classroom data currently in the database.
+    Replaces the courses held for the uploaded terms with the specified course records within a single transaction. Any
+    instructors or classrooms not yet in the database are created in bulk, after which every course is created in
+    batches. Courses without an instructor are left without one.
+
+    :param records:        list of dictionaries holding the field values of every course, as built by
+                           build_schedule_records()
+    :param uploaded_terms: list of the names of the terms included within the records
+    :param progress:       optional callable receiving the phase, rows processed, and total rows as the upload runs
+    :param stages:         optional UploadStages recording the time and memory taken to resolve the instructors and
+                           classrooms and to write the courses
+    """
+    rows_total = len(records)
+    report_progress(progress, "importing", 0, rows_total)
+    with transaction.atomic():
+        with measure_stage(stages, "resolve", rows_total):
+            instructor_names = {record['instructor'] for record in records if record['instructor'] is not None}
+            instructors = {instructor.name: instructor for instructor in
+                           Instructor.objects.filter(name__in=instructor_names)}
+            new_instructors = [Instructor(name=name) for name in instructor_names if name not in instructors]
+            Instructor.objects.bulk_create(new_instructors, batch_size=SCHEDULE_BATCH_SIZE)
+            # IDs are only set on bulk created rows by some databases, so the instructors are read back after creation
+            instructors = {instructor.name: instructor for instructor in
+                           Instructor.objects.filter(name__in=instructor_names)}
+
+            classroom_names = {f"{record['building']}-{record['room_num']}": (record['building'], record['room_num'])
+                               for record in records if record['building'] is not None}
+            classrooms = {classroom.name: classroom for classroom in
+                          Classroom.objects.filter(name__in=classroom_names)}
+            new_classrooms = [Classroom(name=name, building=building, room_num=room_num)
+                              for name, (building, room_num) in classroom_names.items() if name not in classrooms]
+            Classroom.objects.bulk_create(new_classrooms, batch_size=SCHEDULE_BATCH_SIZE)
+            classrooms = {classroom.name: classroom for classroom in
+                          Classroom.objects.filter(name__in=classroom_names)}
+
+        with measure_stage(stages, "write", rows_total):
+            Course.objects.filter(term__in=uploaded_terms).delete()
+            for start in range(0, rows_total, SCHEDULE_BATCH_SIZE):
+                courses = []
+                for record in records[start:start + SCHEDULE_BATCH_SIZE]:
+                    fields = {key: value for key, value in record.items()
+                              if key not in ['instructor', 'building', 'room_num']}
+                    classroom = None
+                    if record['building'] is not None:
+                        classroom = classrooms[f"{record['building']}-{record['room_num']}"]
+                    courses.append(Course(**fields, classroom=classroom,
+                                          instructor=instructors.get(record['instructor'])))
+                Course.objects.bulk_create(courses)
+                report_progress(progress, "importing", min(start + SCHEDULE_BATCH_SIZE, rows_total), rows_total)
+    logger.debug("write_schedule_records - %s courses created for terms %s", rows_total, uploaded_terms)
+
+
+def record_uploaded_terms(uploaded_terms: []):
+    """
+    Records the terms included within an uploaded schedule, increasing the generation of each term's data so that any
+    results cached for the replaced data are no longer used. The term holding the most courses in the upload becomes the
+    active term.
+
+    :param uploaded_terms: list of the names of the uploaded terms, ordered from the most to the fewest courses
+    """
+    for term in uploaded_terms:
+        Term.objects.get_or_create(name=term)
+    Term.objects.filter(name__in=uploaded_terms).update(generation=F('generation') + 1)
+    if len(uploaded_terms) > 0:
+        set_active_term(uploaded_terms[0])
+    logger.info("record_uploaded_terms - Terms uploaded: %s", uploaded_terms)
+
 
-    :param file: Excel spreadsheet containing the classroom specification data for populating the database
-    :return: True if the specified file was successfully uploaded into the DB; False if the file was not a .xlsx file,
-             or if there were necessary columns missing from the spreadsheet
+def set_active_term(term: str) -> bool:
+    """
+    Sets the term shown whenever no term is specified when viewing the data.
+
+    :param term: string containing the name of the term to activate
+    :return:     True if the term was activated; False if no data has been uploaded for the term
+    """
+    if not Term.objects.filter(name=term).exists():
+        logger.error("set_active_term - No data has been uploaded for the term %s", term)
+        return False
+    with transaction.atomic():
+        Term.objects.exclude(name=term).update(is_active=False)
+        Term.objects.filter(name=term).update(is_active=True)
+    logger.info("set_active_term - Active term set to %s", term)
+    return True
+
+
+def get_terms() -> []:
+    """
+    Returns a list of every term whose data has been uploaded, along with whether it is the active term and the number
+    of courses held during the term.
+
+    :return: list of dictionaries holding the name, active status, and number of courses for every term
+    """
+    course_counts = {row['term']: row['count'] for row in Course.objects.values('term').annotate(count=Count('id'))}
+    terms = [{"name": term.name, "active": term.is_active, "courses": course_counts.get(term.name, 0)}
+             for term in Term.objects.order_by('name')]
+    logger.debug("get_terms - Terms: %s", Truncated(terms))
+    return terms
+
+
+def upload_classroom_data(file, progress=None, stages=None):
+    """
+    Creates new classroom objects using Dan Case's classroom data and populates the database. Any classrooms mentioned
+    in uploaded Excel spreadsheet replace the classroom data currently in the database. All classrooms are created and
+    updated in bulk within a single transaction, and classrooms whose data hasn't changed are left untouched.
+
+    :param file: Excel spreadsheet or CSV file containing the classroom specification data for populating the database
+    :param progress: optional callable receiving the phase, rows processed, and total rows as the upload runs
+    :param stages: optional UploadStages recording the time and memory taken by each stage of the upload
+    :return: True if the specified file was successfully uploaded into the DB; False if the file was not a .xlsx or
+             .csv file, or if there were necessary columns missing from the spreadsheet. Also returns the list of
+             missing columns and a dictionary holding the number of classrooms created, updated, and left unchanged.
     """
     missing_columns = []
 
     # File cannot be empty
     if file is None:
         logger.info("upload_classroom_data - Attempt to upload a schedule without specifying a file")
-        return False, missing_columns
+        return False, missing_columns, {}
 
-    # The file must be an Excel spreadsheet
-    if file.name[-5:] != '.xlsx':
-        logger.error(f"upload_classroom_data - Attempt to upload file that was not an .xlsx file: {file.name}")
-        return False, missing_columns
+    # The file must be an Excel spreadsheet or CSV file
+    if not is_upload_file_type(file.name):
+        logger.error("upload_classroom_data - Attempt to upload file that was not an .xlsx or .csv file: %s", file.name)
+        return False, missing_columns, {}
 
-    df = pd.read_excel(file)
+    with measure_stage(stages, "read") as stage:
+        df = read_spreadsheet(file, CLASSROOM_CSV_COLUMNS)
+        stage["rows"] = len(df.index)
 
-    # Make sure all the necessary columns are in the uploaded spreadsheet
-    necessary_columns = ['Building Information', 'Room Number', 'Number of Student Seats in Room', 'Width of Room',
-                         'Length of Room', 'Number of Projectors in Room', 'Does room have any of the following?',
-                         'Any other things of note in Room (TV or Periodic Table poster)', 'Notes']
-
-    for column_name in necessary_columns:
-        if column_name not in df.columns:
-            missing_columns.append(column_name)
+    with measure_stage(stages, "validate", len(df.index)):
+        # Make sure all the necessary columns are in the uploaded spreadsheet
+        missing_columns = find_missing_columns(df, CLASSROOM_NECESSARY_COLUMNS)
+        errors = find_classroom_errors(df) if len(missing_columns) == 0 else []
     if len(missing_columns) > 0:
-        logger.error(
-            f"CLASSROOM UPLOAD ABORTED - Classroom spreadsheet upload ({file.name}) was missing columns: {missing_columns}")
-        return False, missing_columns
-
-    for index, row in df.iterrows():
-        features = ""
-        features += row['Does room have any of the following?'] \
-            if not pd.isna(row['Does room have any of the following?']) else ""
-        features += row['Any other things of note in Room (TV or Periodic Table poster)'] \
-            if not pd.isna(row['Any other things of note in Room (TV or Periodic Table poster)']) else ""
-        logger.debug(f"upload_classroom_data: Classroom Features: {features}")
-
-        # Create the new updated classroom object
-        classroom, _ = Classroom.objects.update_or_create(
-            name=row['Building Information'] + "-" + str(row['Room Number']),
-            defaults={
-                'building': row['Building Information'].strip(),
-                'room_num': row['Room Number'],
-                'occupancy': row['Number of Student Seats in Room'] if not pd.isna(
-                    row['Number of Student Seats in Room']) else None,
-                'width': row['Width of Room'] if not pd.isna(row['Width of Room']) else None,
-                'length': row['Length of Room'] if not pd.isna(row['Length of Room']) else None,
-                'projector_num': row['Number of Projectors in Room'] if not pd.isna(
-                    row['Number of Projectors in Room']) else None,
-                'features': features,
-                'notes': row['Notes'] if not pd.isna(row['Notes']) else None,
-            }
-        )
-        logger.debug(f"Classroom {classroom} created/updated")
-
-    logger.info(f"Classroom spreadsheet uploaded successfully: {file.name}")
-    return True, missing_columns
+        logger.error("CLASSROOM UPLOAD ABORTED - Classroom spreadsheet upload (%s) was missing columns: %s", file.name,
+                     missing_columns)
+        return False, missing_columns, {}
+    if len(errors) > 0:
+        logger.error("CLASSROOM UPLOAD ABORTED - Classroom spreadsheet upload (%s) had %s invalid values", file.name,
+                     len(errors))
+        return False, missing_columns, {"errors": errors[:MAX_REPORTED_ERRORS], "errorCount": len(errors)}
+
+    rows_total = len(df.index)
+    report_progress(progress, "importing", 0, rows_total)
+    with measure_stage(stages, "parse", rows_total):
+        classrooms = build_classroom_frame(df)
+
+    with measure_stage(stages, "resolve", rows_total):
+        # Load every uploaded classroom already in the database with a single query, and then compare the old and new
+        # values of every field at once to find which classrooms have changed
+        existing = pd.DataFrame.from_records(
+            Classroom.objects.filter(name__in=classrooms.index.tolist()).values('id', 'name', *CLASSROOM_FIELDS),
+            columns=['id', 'name'] + CLASSROOM_FIELDS)
+        existing = existing.join(classrooms, on='name', rsuffix='_new')
+        changed = pd.Series(False, index=existing.index)
+        for field in CLASSROOM_FIELDS:
+            old_values = existing[field].astype(object)
+            new_values = existing[f"{field}_new"]
+            changed |= ~((old_values == new_values) | (old_values.isna() & new_values.isna()))
+
+        new_classrooms = [Classroom(name=name, **fields) for name, fields in
+                          classrooms[~classrooms.index.isin(existing['name'])].to_dict('index').items()]
+        updated_classrooms = [Classroom(id=row['id'], name=row['name'],
+                                        **{field: row[f"{field}_new"] for field in CLASSROOM_FIELDS})
+                              for row in existing[changed].to_dict('records')]
+
+    with transaction.atomic():
+        with measure_stage(stages, "write", len(new_classrooms) + len(updated_classrooms)):
+            Classroom.objects.bulk_create(new_classrooms, batch_size=500)
+            Classroom.objects.bulk_update(updated_classrooms, CLASSROOM_FIELDS, batch_size=500)
+        if len(new_classrooms) > 0 or len(updated_classrooms) > 0:
+            with measure_stage(stages, "invalidate"):
+                # Classroom data is shown for every term, so none of the results cached for any term can be used any
+                # longer
+                Term.objects.update(generation=F('generation') + 1)
+    report_progress(progress, "importing", rows_total, rows_total)
+
+    summary = {
+        "created": len(new_classrooms),
+        "updated": len(updated_classrooms),
+        "unchanged": len(classrooms.index) - len(new_classrooms) - len(updated_classrooms),
+    }
+    logger.info("Classroom spreadsheet uploaded successfully: %s, %s", file.name, summary)
+    return True, missing_columns, summary
+
+
+def build_classroom_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts the rows of an uploaded classroom spreadsheet into the values stored for each classroom, indexed by the
+    name of the classroom. Should a classroom be listed more than once, only its last row is used. Missing values are
+    stored as None.
+
+    :param df: DataFrame holding the contents of the uploaded classroom spreadsheet
+    :return:   DataFrame holding the values of every field of the uploaded classrooms
+    """
+    features_column = 'Does room have any of the following?'
+    other_features_column = 'Any other things of note in Room (TV or Periodic Table poster)'
+    classrooms = pd.DataFrame({
+        'name': df['Building Information'].astype(str) + "-" + df['Room Number'].astype(str),
+        'building': df['Building Information'].astype(str).str.strip(),
+        'room_num': df['Room Number'].astype(str),
+        'occupancy': pd.to_numeric(df['Number of Student Seats in Room'], errors='coerce'),
+        'width': pd.to_numeric(df['Width of Room'], errors='coerce'),
+        'length': pd.to_numeric(df['Length of Room'], errors='coerce'),
+        'projector_num': pd.to_numeric(df['Number of Projectors in Room'], errors='coerce'),
+        'features': df[features_column].fillna("").astype(str) + df[other_features_column].fillna("").astype(str),
+        'notes': df['Notes'].astype(object),
+    })
+    for field in ['width', 'length', 'projector_num']:
+        classrooms[field] = classrooms[field].apply(lambda value: None if pd.isna(value) else int(value))
+    classrooms = classrooms.drop_duplicates('name', keep='last').set_index('name').astype(object)
+    return classrooms.where(classrooms.notna(), None)
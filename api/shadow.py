@@ -0,0 +1,218 @@
+import copy
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+from api.log_format import Truncated
+
+logger = logging.getLogger("shadow")
+
+"""
+Runs the set-based services in the shadow of the legacy per-block engine for a sampled fraction of requests. Users are
+always served the result of the legacy engine, and a copy of the result served is compared with the result the
+services calculate from scratch in a background thread. Any divergence is logged along with the paths at which the
+results differ, and the latency of serving the result and of the shadow calculation is recorded for every comparison.
+A slow or failing shadow run never affects a response.
+
+Author: Ryan Johnson
+"""
+
+# Maximum number of differences listed when logging a divergence
+MAX_LOGGED_DIFFERENCES = 20
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+_pending_lock = threading.Lock()
+_pending = 0
+
+
+class ShadowLog:
+    """
+    Holds the number of comparisons, divergences, and failures of every shadowed function, along with the total and
+    slowest latency of serving the result and of the shadow calculation.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._functions = {}
+
+    def record(self, function_name: str, served_seconds: float, shadow_seconds: float, diverged: bool,
+               failed: bool = False):
+        """
+        Adds a single comparison to the totals of a shadowed function.
+
+        :param function_name:  string naming the shadowed function
+        :param served_seconds: number of seconds taken to serve the legacy engine's result, including any cache lookup
+        :param shadow_seconds: number of seconds taken by the services to calculate the result in the shadow
+        :param diverged:       whether the results of the engines differed
+        :param failed:         whether the shadow calculation raised an exception
+        """
+        with self._lock:
+            totals = self._functions.setdefault(function_name, {
+                "comparisons": 0, "divergences": 0, "failures": 0, "skipped": 0,
+                "servedSeconds": 0.0, "shadowSeconds": 0.0, "servedMaxSeconds": 0.0, "shadowMaxSeconds": 0.0,
+            })
+            totals["comparisons"] += 1
+            totals["divergences"] += int(diverged)
+            totals["failures"] += int(failed)
+            totals["servedSeconds"] += served_seconds
+            totals["shadowSeconds"] += shadow_seconds
+            totals["servedMaxSeconds"] = max(totals["servedMaxSeconds"], served_seconds)
+            totals["shadowMaxSeconds"] = max(totals["shadowMaxSeconds"], shadow_seconds)
+
+    def skip(self, function_name: str):
+        """
+        Counts a sampled request that wasn't compared because too many comparisons were already waiting.
+
+        :param function_name: string naming the shadowed function
+        """
+        with self._lock:
+            totals = self._functions.setdefault(function_name, {
+                "comparisons": 0, "divergences": 0, "failures": 0, "skipped": 0,
+                "servedSeconds": 0.0, "shadowSeconds": 0.0, "servedMaxSeconds": 0.0, "shadowMaxSeconds": 0.0,
+            })
+            totals["skipped"] += 1
+
+    def snapshot(self) -> {}:
+        """
+        Returns a copy of the totals of every shadowed function.
+
+        :return: dictionary mapping the name of each shadowed function to its totals
+        """
+        with self._lock:
+            return {function_name: dict(totals) for function_name, totals in self._functions.items()}
+
+    def reset(self):
+        """
+        Removes every comparison recorded by the current process.
+        """
+        with self._lock:
+            self._functions = {}
+
+
+def merge_snapshots(snapshots: []) -> {}:
+    """
+    Merges the shadow totals of several processes, adding together the counts and times of every shadowed function and
+    keeping the slowest latency seen by any process.
+
+    :param snapshots: list holding the snapshot returned by ShadowLog.snapshot() within each process
+    :return:          dictionary mapping the name of each shadowed function to its merged totals
+    """
+    merged = {}
+    for snapshot in snapshots:
+        for function_name, totals in snapshot.items():
+            merged_totals = merged.setdefault(function_name, {
+                "comparisons": 0, "divergences": 0, "failures": 0, "skipped": 0,
+                "servedSeconds": 0.0, "shadowSeconds": 0.0, "servedMaxSeconds": 0.0, "shadowMaxSeconds": 0.0,
+            })
+            for key in ["comparisons", "divergences", "failures", "skipped", "servedSeconds", "shadowSeconds"]:
+                merged_totals[key] += totals.get(key, 0)
+            for key in ["servedMaxSeconds", "shadowMaxSeconds"]:
+                merged_totals[key] = max(merged_totals[key], totals.get(key, 0.0))
+    return merged
+
+
+def find_differences(served, shadow, path: str = "result") -> []:
+    """
+    Compares two results, listing the paths at which they differ.
+
+    :param served: result served to users by the legacy engine
+    :param shadow: result calculated by the services in the shadow
+    :param path:   string describing where within the whole result the values being compared are found
+    :return:       list of strings describing every difference found
+    """
+    if isinstance(served, dict) and isinstance(shadow, dict):
+        differences = [f"{path}[{key!r}] only in shadow" for key in shadow if key not in served]
+        differences += [f"{path}[{key!r}] only in served" for key in served if key not in shadow]
+        for key in served:
+            if key in shadow:
+                differences += find_differences(served[key], shadow[key], f"{path}[{key!r}]")
+        return differences
+    if isinstance(served, (list, tuple)) and isinstance(shadow, (list, tuple)):
+        if len(served) != len(shadow):
+            return [f"{path} has {len(served)} items served and {len(shadow)} shadow"]
+        differences = []
+        for index, (served_item, shadow_item) in enumerate(zip(served, shadow)):
+            differences += find_differences(served_item, shadow_item, f"{path}[{index}]")
+        return differences
+    if served != shadow:
+        return [f"{path}: {served!r} served, {shadow!r} shadow"]
+    return []
+
+
+def compare(function_name: str, served, served_seconds: float, shadow_function, arguments: tuple) -> []:
+    """
+    Calculates a result with the services and compares it with the result served to users, recording the latency of
+    both and logging any divergence between them.
+
+    :param function_name:   string naming the shadowed function
+    :param served:          result served to users by the legacy engine
+    :param served_seconds:  number of seconds taken to serve the result
+    :param shadow_function: callable calculating the result with the services
+    :param arguments:       tuple of the arguments the result was served for
+    :return:                list of strings describing every difference found
+    """
+    start = time.perf_counter()
+    shadow = shadow_function(*arguments)
+    shadow_seconds = time.perf_counter() - start
+
+    differences = find_differences(served, shadow)
+    shadow_log.record(function_name, served_seconds, shadow_seconds, bool(differences))
+    if differences:
+        logger.warning("compare - %s%s diverged from the served result in %s places: %s", function_name, arguments,
+                       len(differences), Truncated(differences[:MAX_LOGGED_DIFFERENCES]))
+    else:
+        logger.debug("compare - %s%s matched the served result (%.4f seconds served, %.4f seconds shadow)",
+                     function_name, arguments, served_seconds, shadow_seconds)
+    return differences
+
+
+def _compare_in_worker(function_name: str, served, served_seconds: float, shadow_function, arguments: tuple):
+    """
+    Runs a comparison within the shadow thread, closing the thread's database connections once it finishes and never
+    letting an exception escape.
+    """
+    global _pending
+    try:
+        compare(function_name, served, served_seconds, shadow_function, arguments)
+    except Exception:
+        shadow_log.record(function_name, served_seconds, 0.0, False, failed=True)
+        logger.exception("_compare_in_worker - Shadow comparison of %s%s failed", function_name, arguments)
+    finally:
+        connections.close_all()
+        with _pending_lock:
+            _pending -= 1
+
+
+def maybe_shadow(function_name: str, served, served_seconds: float, shadow_function, *arguments):
+    """
+    Queues a comparison of the result served to users with the result of the services for a sampled fraction of
+    requests, as set by the SHADOW_SAMPLE_RATE setting. The served result is copied before it is queued, so the
+    comparison sees exactly what was returned even if the caller goes on to change it. Comparisons run in a background
+    thread, and sampled requests are skipped if SHADOW_MAX_PENDING comparisons are already waiting, so the request
+    itself is never slowed down.
+
+    :param function_name:   string naming the shadowed function
+    :param served:          result served to users by the legacy engine
+    :param served_seconds:  number of seconds taken to serve the result
+    :param shadow_function: callable calculating the result with the services
+    :param arguments:       arguments the result was served for
+    """
+    global _pending
+    sample_rate = settings.SHADOW_SAMPLE_RATE
+    if sample_rate <= 0 or random.random() >= sample_rate:
+        return
+    with _pending_lock:
+        if _pending >= settings.SHADOW_MAX_PENDING:
+            shadow_log.skip(function_name)
+            return
+        _pending += 1
+    _executor.submit(_compare_in_worker, function_name, copy.deepcopy(served), served_seconds, shadow_function,
+                     arguments)
+
+
+shadow_log = ShadowLog()
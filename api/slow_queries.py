@@ -0,0 +1,172 @@
+import logging
+import os
+import re
+import sys
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger("slow_queries")
+
+"""
+Records database queries taking longer than the SLOW_QUERY_THRESHOLD setting. Each slow query is logged with its
+duration, the service function that made it, and the path of the request being handled, and is grouped with similar
+queries by a fingerprint of its SQL so that the number of slow runs and total time of each kind of query can be seen.
+
+Author: Ryan Johnson
+"""
+
+# Patterns replaced when creating the fingerprint of a query, so that queries differing only by their values match
+STRING_PATTERN = re.compile(r"'(?:[^']|'')*'")
+NUMBER_PATTERN = re.compile(r"\b\d+(?:\.\d+)?\b")
+PLACEHOLDER_PATTERN = re.compile(r"%s|\?")
+VALUE_LIST_PATTERN = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# Directory holding the application's code, used for finding the function that made a query
+API_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def fingerprint(sql: str) -> str:
+    """
+    Normalizes the SQL of a query by replacing every value with a placeholder, collapsing lists of values, and removing
+    extra whitespace.
+
+    :param sql: string containing the SQL of a query
+    :return:    string containing the normalized SQL
+    """
+    sql = STRING_PATTERN.sub("?", sql)
+    sql = NUMBER_PATTERN.sub("?", sql)
+    sql = PLACEHOLDER_PATTERN.sub("?", sql)
+    sql = VALUE_LIST_PATTERN.sub("(...)", sql)
+    return WHITESPACE_PATTERN.sub(" ", sql).strip()
+
+
+def find_caller() -> str:
+    """
+    Finds the function within services.py or legacy_engine.py that made the current query. The first function within
+    the api package is used if the query wasn't made by either, such as a query made by a view.
+
+    :return: string naming the module and function that made the query, or "unknown" if it came from outside the api
+             package
+    """
+    caller = "unknown"
+    frame = sys._getframe(1)
+    while frame is not None:
+        file_name = frame.f_code.co_filename
+        if file_name.startswith(API_DIRECTORY) and not file_name.endswith(("slow_queries.py", "middleware.py")):
+            module = os.path.splitext(os.path.basename(file_name))[0]
+            if module in ["services", "legacy_engine"]:
+                return f"{module}.{frame.f_code.co_name}"
+            if caller == "unknown":
+                caller = f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return caller
+
+
+class SlowQueryLog:
+    """
+    Holds the number of slow runs and the total time of every query fingerprint seen by the current process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fingerprints = {}
+
+    def record(self, sql: str, duration: float, caller: str, path: str) -> {}:
+        """
+        Adds a slow query to the totals of its fingerprint.
+
+        :param sql:      string containing the SQL of the query
+        :param duration: number of seconds taken to run the query
+        :param caller:   string naming the function that made the query
+        :param path:     string containing the path of the request being handled
+        :return:         dictionary holding the updated totals of the query's fingerprint
+        """
+        query_fingerprint = fingerprint(sql)
+        with self._lock:
+            totals = self._fingerprints.setdefault(query_fingerprint, {
+                "fingerprint": query_fingerprint,
+                "count": 0,
+                "totalSeconds": 0.0,
+                "maxSeconds": 0.0,
+                "callers": [],
+                "paths": [],
+            })
+            totals["count"] += 1
+            totals["totalSeconds"] += duration
+            totals["maxSeconds"] = max(totals["maxSeconds"], duration)
+            if caller not in totals["callers"]:
+                totals["callers"].append(caller)
+            if path not in totals["paths"]:
+                totals["paths"].append(path)
+            return dict(totals)
+
+    def summary(self) -> []:
+        """
+        Returns the totals of every fingerprint seen, with the fingerprints taking the most total time first.
+
+        :return: list of dictionaries holding the totals of each fingerprint
+        """
+        with self._lock:
+            totals = [dict(totals, callers=list(totals["callers"]), paths=list(totals["paths"]))
+                      for totals in self._fingerprints.values()]
+        return sorted(totals, key=lambda query: query["totalSeconds"], reverse=True)
+
+    def reset(self):
+        """
+        Removes every slow query recorded by the current process.
+        """
+        with self._lock:
+            self._fingerprints = {}
+
+
+def merge_summaries(summaries: []) -> []:
+    """
+    Merges the slow query summaries of several processes, adding together the totals of every fingerprint seen by more
+    than one process.
+
+    :param summaries: list holding the summary returned by SlowQueryLog.summary() within each process
+    :return:          list of dictionaries holding the merged totals of each fingerprint, with the fingerprints taking
+                      the most total time first
+    """
+    merged = {}
+    for summary in summaries:
+        for query in summary:
+            totals = merged.setdefault(query["fingerprint"], {"fingerprint": query["fingerprint"], "count": 0,
+                                                              "totalSeconds": 0.0, "maxSeconds": 0.0, "callers": [],
+                                                              "paths": []})
+            totals["count"] += query["count"]
+            totals["totalSeconds"] += query["totalSeconds"]
+            totals["maxSeconds"] = max(totals["maxSeconds"], query["maxSeconds"])
+            totals["callers"] += [caller for caller in query["callers"] if caller not in totals["callers"]]
+            totals["paths"] += [path for path in query["paths"] if path not in totals["paths"]]
+    return sorted(merged.values(), key=lambda query: query["totalSeconds"], reverse=True)
+
+
+class SlowQueryRecorder:
+    """
+    Times the queries executed through a database connection while installed as one of its execute wrappers, recording
+    every query taking at least SLOW_QUERY_THRESHOLD seconds.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.threshold = settings.SLOW_QUERY_THRESHOLD
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            if duration >= self.threshold:
+                caller = find_caller()
+                totals = slow_query_log.record(sql, duration, caller, self.path)
+                logger.warning("SlowQueryRecorder - Slow query took %.4f seconds in %s for %s "
+                               "(%s slow runs, %.4f seconds in total): %s", duration, caller, self.path,
+                               totals["count"], totals["totalSeconds"], totals["fingerprint"])
+
+
+slow_query_log = SlowQueryLog()
@@ -0,0 +1,49 @@
+import json
+
+from rest_framework.utils.encoders import JSONEncoder
+
+"""
+Writes large JSON responses incrementally, encoding one member of an object at a time as it is produced rather than
+building the whole body in memory first. The JSON written matches the compact JSON rendered by Django REST Framework, so
+streamed responses can be read in the same way as any other response.
+
+Author: Ryan Johnson
+"""
+
+# Number of characters of JSON gathered before a chunk is written to the response
+CHUNK_SIZE = 64 * 1024
+
+
+def dumps(value) -> str:
+    """
+    Encodes a value as compact JSON, using the same encoder and options as Django REST Framework's JSON renderer.
+
+    :param value: value to encode
+    :return:      string holding the JSON
+    """
+    return json.dumps(value, cls=JSONEncoder, separators=(",", ":"), ensure_ascii=False)
+
+
+def stream_json_object(members, prefix: str = "", suffix: str = ""):
+    """
+    Yields the JSON of an object whose members are produced one at a time, gathering the members into chunks of about
+    CHUNK_SIZE characters. Only the current chunk and member are ever held in memory.
+
+    :param members: iterable of tuples holding the key and value of every member, in the order they are written
+    :param prefix:  string of JSON written before the object, such as the start of an enclosing object
+    :param suffix:  string of JSON written after the object, such as the end of an enclosing object
+    :return:        generator of strings holding the JSON
+    """
+    chunk = [prefix, "{"]
+    size = len(prefix) + 1
+    separator = ""
+    for key, value in members:
+        member = f"{separator}{dumps(str(key))}:{dumps(value)}"
+        separator = ","
+        chunk.append(member)
+        size += len(member)
+        if size >= CHUNK_SIZE:
+            yield "".join(chunk)
+            chunk, size = [], 0
+    chunk += ["}", suffix]
+    yield "".join(chunk)
@@ -0,0 +1,194 @@
+import logging
+import random
+
+import pandas as pd
+from django.core.cache import cache
+from django.db import transaction
+
+from api import services
+from api.models import Classroom, Course, Instructor, Term
+
+logger = logging.getLogger("synthetic")
+
+"""
+Generates synthetic campuses for measuring how the analytics scale with the size of the course schedule. Campuses are
+built from the same columns as the registrar's schedule export and Dan Case's classroom spreadsheet, with course
+sections following the usual MWF and TTh meeting patterns, so that generated data can either be written directly to the
+database or saved as spreadsheets and uploaded.
+
+Author: Ryan Johnson
+"""
+
+# Meeting times of 50-minute MWF sections, 75-minute TTh sections, and once-weekly evening sections
+MWF_TIME_SLOTS = [("8:00AM", "8:50AM"), ("9:00AM", "9:50AM"), ("10:00AM", "10:50AM"), ("11:00AM", "11:50AM"),
+                  ("12:00PM", "12:50PM"), ("1:00PM", "1:50PM"), ("2:00PM", "2:50PM"), ("3:00PM", "3:50PM")]
+TTH_TIME_SLOTS = [("8:00AM", "9:15AM"), ("9:30AM", "10:45AM"), ("11:00AM", "12:15PM"), ("12:30PM", "1:45PM"),
+                  ("2:00PM", "3:15PM"), ("3:30PM", "4:45PM")]
+EVENING_TIME_SLOTS = [("6:00PM", "8:50PM")]
+
+# Day columns of the schedule export, in the order they are named by the meeting patterns
+DAY_COLUMNS = ['CSM_MONDAY', 'CSM_TUESDAY', 'CSM_WEDNESDAY', 'CSM_THURSDAY', 'CSM_FRIDAY']
+
+# Days each meeting pattern is held on, along with the share of sections using the pattern and its meeting times
+MEETING_PATTERNS = [
+    ("MWF", ['CSM_MONDAY', 'CSM_WEDNESDAY', 'CSM_FRIDAY'], 0.55, MWF_TIME_SLOTS),
+    ("TTh", ['CSM_TUESDAY', 'CSM_THURSDAY'], 0.35, TTH_TIME_SLOTS),
+    ("Evening", None, 0.10, EVENING_TIME_SLOTS),
+]
+
+# Share of sections held online or off campus, without a classroom on campus
+ONLINE_SHARE = 0.08
+OFF_CAMPUS_SHARE = 0.02
+
+SUBJECTS = ['ACNU', 'BI', 'BU', 'CH', 'CS', 'EC', 'ED', 'EN', 'HI', 'MA', 'NU', 'PH', 'PS', 'TH']
+
+
+def campus_buildings(count: int) -> []:
+    """
+    Returns the building codes for a synthetic campus. The real campus buildings are used first, with numbered buildings
+    added for campuses larger than Carroll's.
+
+    :param count: number of buildings on the campus
+    :return:      list of building codes
+    """
+    buildings = [building for building in Classroom.BUILDINGS if building not in ["", "OFCP"]]
+    buildings += [f"B{number:03d}" for number in range(1, max(count - len(buildings), 0) + 1)]
+    return buildings[:count]
+
+
+def build_classroom_sheet(buildings: [], rooms_per_building: int, rng: random.Random) -> pd.DataFrame:
+    """
+    Creates a DataFrame of random classrooms using the same columns as the classroom spreadsheet.
+
+    :param buildings:          list of building codes on the campus
+    :param rooms_per_building: number of classrooms within each building
+    :param rng:                random number generator used for creating the classrooms
+    :return:                   DataFrame holding the classrooms
+    """
+    rooms = []
+    for building in buildings:
+        for room in range(rooms_per_building):
+            rooms.append({
+                'Building Information': building,
+                'Room Number': str(100 + room),
+                'Number of Student Seats in Room': rng.choice([12, 20, 24, 30, 40, 60, 90]),
+                'Width of Room': rng.randint(15, 40),
+                'Length of Room': rng.randint(20, 60),
+                'Number of Projectors in Room': rng.randint(0, 2),
+                'Notes': 'N/A',
+                'Does room have any of the following?': rng.choice(['Whiteboard', 'Chalkboard', 'N/A']),
+                'Any other things of note in Room (TV or Periodic Table poster)': 'N/A',
+            })
+    return pd.DataFrame(rooms)
+
+
+def build_schedule_frame(rows: int, rng: random.Random, buildings: [] = None, rooms_per_building: int = 50,
+                         instructors: int = None, term: str = '2024SP') -> pd.DataFrame:
+    """
+    Creates a DataFrame of random course sections using the same columns as the registrar's schedule export. Most
+    sections meet on MWF or TTh at the usual times, with a few evening sections meeting once a week and a few sections
+    held online or off campus.
+
+    :param rows:               number of course sections to create
+    :param rng:                random number generator used for creating the sections
+    :param buildings:          list of building codes the sections are held in (every campus building if None)
+    :param rooms_per_building: number of classrooms within each building
+    :param instructors:        number of instructors teaching the sections (one for every four sections if None)
+    :param term:               string containing the name of the term the sections are held during
+    :return:                   DataFrame holding the course sections
+    """
+    if buildings is None:
+        buildings = campus_buildings(len(Classroom.BUILDINGS) - 2)
+    if instructors is None:
+        instructors = max(rows // 4, 1)
+    pattern_weights = [weight for _, _, weight, _ in MEETING_PATTERNS]
+
+    sections = []
+    for section_id in range(rows):
+        _, days, _, time_slots = rng.choices(MEETING_PATTERNS, weights=pattern_weights)[0]
+        if days is None:
+            days = [rng.choice(DAY_COLUMNS[:4])]
+        start_time, end_time = rng.choice(time_slots)
+
+        location = rng.random()
+        building, room = rng.choice(buildings), str(100 + rng.randrange(rooms_per_building))
+        if location < ONLINE_SHARE:
+            building, room = None, None
+        elif location < ONLINE_SHARE + OFF_CAMPUS_SHARE:
+            building = 'OFCP'
+
+        sections.append({
+            'SEC_TERM': term,
+            'COURSE_SECTIONS_ID': 20000 + section_id,
+            'SEC_STATUS': 'A',
+            'SEC_START_DATE': 'Jan 17 2024',
+            'SEC_END_DATE': 'May 10 2024',
+            'SEC_SUBJECT': rng.choice(SUBJECTS),
+            'SEC_COURSE_NO': str(rng.randint(100, 499)),
+            'SEC_NO': rng.choice(['A', 'B', 'C']),
+            'SEC_SHORT_TITLE': f"Course Section {section_id}",
+            'SEC_MIN_CRED': rng.choice([1.0, 3.0, 4.0]),
+            'CSM_START_TIME': start_time,
+            'CSM_END_TIME': end_time,
+            **{column: 'Y' if column in days else '-' for column in DAY_COLUMNS},
+            'CSM_BLDG': building,
+            'CSM_ROOM': room,
+            'CSM_INSTR_METHOD': 'ONL' if building is None else rng.choice(['LEC', 'LAB', 'SEM']),
+            'SEC_FACULTY_INFO': f"Instructor {rng.randint(1, instructors)}",
+            'STUDENTS_AND_RESERVED_SEATS': rng.randint(5, 30),
+            'SEC_CAPACITY': 30,
+        })
+    return pd.DataFrame(sections)
+
+
+def generate_campus(sections: int, buildings: int, rooms_per_building: int, instructors: int = None,
+                    terms: [] = None, seed: int = 0) -> {}:
+    """
+    Replaces the data within the database with a synthetic campus. Every classroom and instructor is created, along
+    with the given number of course sections for each term, and the first term becomes the active term. Courses are
+    written using the same bulk writer used by batch schedule uploads, and any cached results are cleared.
+
+    :param sections:           number of course sections held during each term
+    :param buildings:          number of buildings on the campus
+    :param rooms_per_building: number of classrooms within each building
+    :param instructors:        number of instructors teaching the sections (one for every four sections if None)
+    :param terms:              list of the names of the terms to create (only 2024SP if None)
+    :param seed:               seed for the random campus data
+    :return:                   dictionary holding the number of buildings, classrooms, instructors, and courses created
+    """
+    rng = random.Random(seed)
+    terms = terms or ['2024SP']
+    building_codes = campus_buildings(buildings)
+    classroom_sheet = build_classroom_sheet(building_codes, rooms_per_building, rng)
+
+    with transaction.atomic():
+        Course.objects.all().delete()
+        Classroom.objects.all().delete()
+        Instructor.objects.all().delete()
+        Term.objects.all().delete()
+
+        Classroom.objects.bulk_create([
+            Classroom(name=f"{room['Building Information']}-{room['Room Number']}",
+                      building=room['Building Information'], room_num=room['Room Number'],
+                      occupancy=room['Number of Student Seats in Room'], width=room['Width of Room'],
+                      length=room['Length of Room'], projector_num=room['Number of Projectors in Room'],
+                      features=room['Does room have any of the following?'], notes=room['Notes'])
+            for room in classroom_sheet.to_dict('records')
+        ], batch_size=services.SCHEDULE_BATCH_SIZE)
+
+        for term in terms:
+            df = build_schedule_frame(sections, rng, building_codes, rooms_per_building, instructors, term)
+            services.write_schedule_records(services.build_schedule_records(df), [term])
+        services.record_uploaded_terms(terms)
+    # The generations of the new terms restart from the beginning, so results cached for any earlier data are cleared
+    cache.clear()
+
+    campus = {
+        "buildings": len(building_codes),
+        "classrooms": Classroom.objects.count(),
+        "instructors": Instructor.objects.count(),
+        "courses": Course.objects.count(),
+        "terms": terms,
+    }
+    logger.info("generate_campus - Synthetic campus generated: %s", campus)
+    return campus
@@ -0,0 +1,29 @@
+import tempfile
+
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+"""
+Contains the test runner used for every unit test, which keeps the metrics recorded while the tests run out of the
+project's metrics directory.
+
+Author: Ryan Johnson
+"""
+
+
+class MetricsDirectoryRunner(DiscoverRunner):
+    """
+    Runs the tests with their metrics written to a temporary directory, which is removed once the tests finish. Tests
+    checking the metrics themselves still override the directory with one of their own.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.metrics_directory = tempfile.TemporaryDirectory(prefix="classroom-analytics-metrics-")
+        self.metrics_override = override_settings(METRICS_DIRECTORY=self.metrics_directory.name)
+        self.metrics_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.metrics_override.disable()
+        self.metrics_directory.cleanup()
+        super().teardown_test_environment(**kwargs)
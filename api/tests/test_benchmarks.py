@@ -0,0 +1,51 @@
+from django.test import TestCase
+
+from api import benchmarks
+
+"""
+Contains unit tests for the service benchmarks in benchmarks.py.
+
+Author: Ryan Johnson
+"""
+
+
+class RunBenchmarks(TestCase):
+    # Ensures that every read service is timed for each scale, along with the number of queries it makes
+    def test_run_benchmarks(self):
+        report = benchmarks.run_benchmarks([20, 40], 2, 3, 1, 0, include_uploads=False)
+        self.assertEqual(list(report["scales"]), ["20", "40"])
+        self.assertEqual(report["scales"]["40"]["campus"]["courses"], 40)
+        results = report["scales"]["20"]["benchmarks"]
+        self.assertIn("calculate_number_classes", results)
+        self.assertIn("get_classroom_courses", results)
+        self.assertGreater(results["calculate_number_classes"]["queries"], 0)
+        self.assertEqual(results["calculate_number_classes_cached"]["queries"], 1)
+
+    # Ensures that the plan of every distinct query is stored with the timings, and that flagged queries are listed
+    def test_query_plans(self):
+        report = benchmarks.run_benchmarks([20], 2, 3, 1, 0, include_uploads=False)
+        scale = report["scales"]["20"]
+        plans = scale["benchmarks"]["calculate_number_classes"]["plans"]
+        self.assertTrue(plans)
+        self.assertTrue(all(plan["plan"] and "?" in plan["fingerprint"] for plan in plans))
+        self.assertTrue(all(plan["fullScans"] or plan["filesort"] for plan in scale["flaggedQueries"]))
+        self.assertNotIn("plans", benchmarks.run_benchmarks([20], 2, 3, 1, 0, False, False)["scales"]["20"]
+                         ["benchmarks"]["get_terms"])
+
+    # Ensures that full table scans and sorts made without an index are found within a query's plan
+    def test_explain_query(self):
+        plan = benchmarks.explain_query("SELECT * FROM api_course WHERE name = %s ORDER BY end_time", ["CS 120"])
+        self.assertEqual(plan["fullScans"], ["api_course"])
+        self.assertTrue(plan["filesort"])
+        plan = benchmarks.explain_query("SELECT * FROM api_course WHERE id = %s", [1])
+        self.assertEqual(plan["fullScans"], [])
+        self.assertFalse(plan["filesort"])
+
+    # Ensures that timings from an earlier report are added to the matching benchmarks
+    def test_compare_reports(self):
+        report = {"scales": {"20": {"benchmarks": {"get_terms": {"medianSeconds": 0.2},
+                                                   "get_all_buildings": {"medianSeconds": 0.1}}}}}
+        baseline = {"scales": {"20": {"benchmarks": {"get_terms": {"medianSeconds": 0.1}}}}}
+        report = benchmarks.compare_reports(report, baseline)
+        self.assertEqual(report["scales"]["20"]["benchmarks"]["get_terms"]["change"], 2.0)
+        self.assertNotIn("change", report["scales"]["20"]["benchmarks"]["get_all_buildings"])
@@ -0,0 +1,238 @@
+import os
+
+import pandas as pd
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from api import jobs
+from api.models import Classroom, Course, Term, UploadJob
+
+"""
+Contains unit tests for the background upload jobs in jobs.py.
+
+Author: Ryan Johnson
+"""
+
+
+class UploadJobs(TestCase):
+    # Creates an uploaded file holding a single valid classroom
+    @classmethod
+    def create_classroom_upload(cls, file_name="classrooms.xlsx", room_number="120", width="20"):
+        df = pd.DataFrame({'Building Information': ['SIMP'],
+                           'Room Number': [room_number],
+                           'Number of Student Seats in Room': ['15'],
+                           'Width of Room': [width],
+                           'Length of Room': ['30'],
+                           'Number of Projectors in Room': ['2'],
+                           'Notes': ['N/A'],
+                           'Does room have any of the following?': ['N/A'],
+                           'Any other things of note in Room (TV or Periodic Table poster)': ['N/A']})
+        df.to_excel('classrooms.xlsx', index=False)
+        with open('classrooms.xlsx', 'rb') as file:
+            uploaded_file = SimpleUploadedFile(file_name, file.read())
+        os.remove('classrooms.xlsx')
+        return uploaded_file
+
+    # Creates an uploaded CSV file holding a single course section for the specified term
+    @classmethod
+    def create_schedule_upload(cls, term="2024SP", room_number="120", enrolled="9"):
+        df = pd.DataFrame({'SEC_TERM': [term], 'COURSE_SECTIONS_ID': ['20185'], 'SEC_STATUS': ['A'],
+                           'SEC_START_DATE': ['Jan 17 2024'], 'SEC_END_DATE': ['Mar 10 2024'],
+                           'SEC_SUBJECT': ['CS'], 'SEC_COURSE_NO': ['301'], 'SEC_NO': ['A'],
+                           'SEC_SHORT_TITLE': ['Software Engineering'], 'SEC_MIN_CRED': ['3.00000'],
+                           'CSM_START_TIME': ['9:00AM'], 'CSM_END_TIME': ['9:50AM'], 'CSM_MONDAY': ['Y'],
+                           'CSM_TUESDAY': ['-'], 'CSM_WEDNESDAY': ['Y'], 'CSM_THURSDAY': ['-'],
+                           'CSM_FRIDAY': ['Y'], 'CSM_BLDG': ['SIMP'], 'CSM_ROOM': [room_number],
+                           'CSM_INSTR_METHOD': ['LEC'], 'SEC_FACULTY_INFO': ['Nathan Williams'],
+                           'STUDENTS_AND_RESERVED_SEATS': [enrolled], 'SEC_CAPACITY': ['10']})
+        return SimpleUploadedFile(f"{term}.csv", df.to_csv(index=False).encode())
+
+    # Ensures that submitting an upload saves the file and queues a job without importing any data
+    def test_submit_upload(self):
+        job, created = jobs.submit_upload("classroom", self.create_classroom_upload())
+        self.assertEqual(job.phase, "queued")
+        self.assertEqual(job.file_name, "classrooms.xlsx")
+        self.assertTrue(os.path.exists(job.file_path))
+        self.assertEqual(Classroom.objects.all().count(), 0)
+        os.remove(job.file_path)
+
+    # Ensures that running a job imports the data, records its progress, and removes the saved file
+    def test_run_upload_job(self):
+        job, created = jobs.submit_upload("classroom", self.create_classroom_upload())
+        jobs.run_upload_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual(job.phase, "complete")
+        self.assertTrue(job.success)
+        self.assertEqual(job.rows_processed, 1)
+        self.assertEqual(job.rows_total, 1)
+        self.assertIsNotNone(job.finished_at)
+        self.assertFalse(os.path.exists(job.file_path))
+        self.assertEqual(Classroom.objects.get(name="SIMP-120").width, 20)
+
+    # Ensures that each stage of the upload is measured, stored on the job, and included within its status
+    @override_settings(UPLOAD_TRACE_MEMORY=True)
+    def test_run_upload_job_stages(self):
+        job, created = jobs.submit_upload("classroom", self.create_classroom_upload())
+        jobs.run_upload_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual([stage["stage"] for stage in job.stages],
+                         ["read", "validate", "parse", "resolve", "write", "invalidate"])
+        self.assertEqual(job.stages[0]["rows"], 1)
+        self.assertTrue(all(stage["seconds"] >= 0 and stage["peakMemoryBytes"] > 0 for stage in job.stages))
+        self.assertEqual(jobs.get_job_status(job.id)["stages"], job.stages)
+
+    # Ensures that a job for a file that isn't an Excel spreadsheet fails
+    def test_run_upload_job_invalid_file(self):
+        job, created = jobs.submit_upload("classroom", self.create_classroom_upload("classrooms.txt"))
+        jobs.run_upload_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual(job.phase, "failed")
+        self.assertFalse(job.success)
+        self.assertEqual(Classroom.objects.all().count(), 0)
+
+    # Ensures that a dry run of a schedule holding a fractional enrollment reports the row instead of failing
+    def test_dry_run_fractional_enrollment(self):
+        response = self.client.post(reverse("upload_file"), {"dataType": "schedule", "dryRun": "true",
+                                                             "file": self.create_schedule_upload(enrolled="9.5")})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data["success"])
+        self.assertEqual([(error["row"], error["column"], error["message"]) for error in response.data["errors"]],
+                         [(2, "STUDENTS_AND_RESERVED_SEATS", "Expected a whole number")])
+
+    # Ensures that a job importing a schedule holding a fractional enrollment fails with the row, leaving no courses
+    def test_run_upload_job_fractional_enrollment(self):
+        job, created = jobs.submit_upload("schedule", self.create_schedule_upload(enrolled="9.5"))
+        jobs.run_upload_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual(job.phase, "failed")
+        self.assertEqual([(error["row"], error["column"]) for error in job.summary["errors"]],
+                         [(2, "STUDENTS_AND_RESERVED_SEATS")])
+        self.assertEqual(Course.objects.all().count(), 0)
+
+    # Ensures that a job importing an Excel classroom spreadsheet holding a fractional width fails with the row
+    def test_run_upload_job_fractional_width(self):
+        job, created = jobs.submit_upload("classroom", self.create_classroom_upload(width=20.5))
+        jobs.run_upload_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual(job.phase, "failed")
+        self.assertEqual([(error["row"], error["column"], error["value"]) for error in job.summary["errors"]],
+                         [(2, "Width of Room", "20.5")])
+        self.assertEqual(Classroom.objects.all().count(), 0)
+
+    # Ensures that the status of a finished job reports its progress and outcome
+    def test_get_job_status(self):
+        job, created = jobs.submit_upload("classroom", self.create_classroom_upload())
+        jobs.run_upload_job(job.id)
+        job_status = jobs.get_job_status(job.id)
+        self.assertEqual(job_status["jobId"], job.id)
+        self.assertEqual(job_status["phase"], "complete")
+        self.assertEqual(job_status["rowsProcessed"], 1)
+        self.assertTrue(job_status["success"])
+        self.assertEqual(job_status["missingColumns"], [])
+
+    # Ensures that uploading a file identical to the current data returns the earlier job without creating another
+    def test_identical_upload_skipped(self):
+        # The same bytes are uploaded twice, since spreadsheets written at different times hold different timestamps
+        upload = self.create_classroom_upload()
+        job, created = jobs.submit_upload("classroom", SimpleUploadedFile(upload.name, upload.read()))
+        jobs.run_upload_job(job.id)
+        upload.seek(0)
+        identical_job, identical_created = jobs.submit_upload("classroom", SimpleUploadedFile(upload.name,
+                                                                                             upload.read()))
+        self.assertTrue(created)
+        self.assertFalse(identical_created)
+        self.assertEqual(identical_job.id, job.id)
+        self.assertEqual(UploadJob.objects.all().count(), 1)
+
+    # Ensures that an identical file is uploaded again if the upload of the current data failed
+    def test_identical_upload_after_failure(self):
+        job, created = jobs.submit_upload("classroom", self.create_classroom_upload())
+        UploadJob.objects.filter(id=job.id).update(phase="failed")
+        os.remove(job.file_path)
+        retry_job, retry_created = jobs.submit_upload("classroom", self.create_classroom_upload())
+        self.assertTrue(retry_created)
+        self.assertNotEqual(retry_job.id, job.id)
+        os.remove(retry_job.file_path)
+
+    # Ensures that an identical file is uploaded again if different data was uploaded since
+    def test_identical_upload_after_other_upload(self):
+        job, created = jobs.submit_upload("classroom", self.create_classroom_upload())
+        jobs.run_upload_job(job.id)
+        other_job, other_created = jobs.submit_upload("classroom",
+                                                           self.create_classroom_upload(room_number="121"))
+        jobs.run_upload_job(other_job.id)
+        retry_job, retry_created = jobs.submit_upload("classroom", self.create_classroom_upload())
+        self.assertTrue(other_created)
+        self.assertTrue(retry_created)
+        os.remove(retry_job.file_path)
+
+    # Ensures that an identical file is still skipped once the jobs that uploaded the current data have been removed
+    def test_identical_upload_after_jobs_removed(self):
+        upload = self.create_classroom_upload()
+        job, created = jobs.submit_upload("classroom", SimpleUploadedFile(upload.name, upload.read()))
+        jobs.run_upload_job(job.id)
+        UploadJob.objects.all().delete()
+        upload.seek(0)
+        identical_job, identical_created = jobs.submit_upload("classroom", SimpleUploadedFile(upload.name,
+                                                                                             upload.read()))
+        self.assertFalse(identical_created)
+        self.assertIsNone(identical_job)
+        self.assertEqual(UploadJob.objects.all().count(), 0)
+
+    # Ensures that a schedule file is still skipped after a file for another term was uploaded
+    def test_identical_schedule_after_other_term(self):
+        job, created = jobs.submit_upload("schedule", self.create_schedule_upload("2024SP"))
+        jobs.run_upload_job(job.id)
+        other_job, other_created = jobs.submit_upload("schedule", self.create_schedule_upload("2024FA"))
+        jobs.run_upload_job(other_job.id)
+        identical_job, identical_created = jobs.submit_upload("schedule", self.create_schedule_upload("2024SP"))
+        self.assertTrue(other_created)
+        self.assertFalse(identical_created)
+        self.assertEqual(identical_job.id, job.id)
+
+    # Ensures that a schedule file is uploaded again once another file has replaced the data for its term
+    def test_identical_schedule_after_term_replaced(self):
+        job, created = jobs.submit_upload("schedule", self.create_schedule_upload("2024SP"))
+        jobs.run_upload_job(job.id)
+        other_job, other_created = jobs.submit_upload("schedule", self.create_schedule_upload("2024SP", "121"))
+        jobs.run_upload_job(other_job.id)
+        retry_job, retry_created = jobs.submit_upload("schedule", self.create_schedule_upload("2024SP"))
+        self.assertTrue(retry_created)
+        self.assertEqual(Term.objects.get(name="2024SP").content_hash, other_job.content_hash)
+        os.remove(retry_job.file_path)
+
+    # Ensures that a batch of schedule files is imported by a single job, removing every saved file afterwards
+    def test_run_batch_upload_job(self):
+        files = []
+        for term in ["2024SP", "2024FA"]:
+            df = pd.DataFrame({'SEC_TERM': [term], 'COURSE_SECTIONS_ID': ['20185'], 'SEC_STATUS': ['A'],
+                               'SEC_START_DATE': ['Jan 17 2024'], 'SEC_END_DATE': ['Mar 10 2024'],
+                               'SEC_SUBJECT': ['CS'], 'SEC_COURSE_NO': ['301'], 'SEC_NO': ['A'],
+                               'SEC_SHORT_TITLE': ['Software Engineering'], 'SEC_MIN_CRED': ['3.00000'],
+                               'CSM_START_TIME': ['9:00AM'], 'CSM_END_TIME': ['9:50AM'], 'CSM_MONDAY': ['Y'],
+                               'CSM_TUESDAY': ['-'], 'CSM_WEDNESDAY': ['Y'], 'CSM_THURSDAY': ['-'],
+                               'CSM_FRIDAY': ['Y'], 'CSM_BLDG': ['SIMP'], 'CSM_ROOM': ['120'],
+                               'CSM_INSTR_METHOD': ['LEC'], 'SEC_FACULTY_INFO': ['Nathan Williams'],
+                               'STUDENTS_AND_RESERVED_SEATS': ['9'], 'SEC_CAPACITY': ['10']})
+            files.append(SimpleUploadedFile(f"{term}.csv", df.to_csv(index=False).encode()))
+        job, created = jobs.submit_batch_upload(files)
+        jobs.run_upload_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual(job.data_type, "schedule_batch")
+        self.assertEqual(job.phase, "complete")
+        self.assertEqual(job.rows_processed, 2)
+        self.assertEqual(job.summary["created"], 2)
+        self.assertEqual(Course.objects.filter(day="MWF").count(), 2)
+        self.assertFalse(any(os.path.exists(file_path) for _, file_path in job.file_paths))
+        # The stages of reading, validating, and parsing each file are measured separately
+        file_stages = {(stage["stage"], stage["fileName"]) for stage in job.stages if "fileName" in stage}
+        self.assertEqual(file_stages, {(stage, f"{term}.csv") for stage in ["read", "validate", "parse"]
+                                       for term in ["2024SP", "2024FA"]})
+        self.assertEqual([stage["stage"] for stage in job.stages if "fileName" not in stage],
+                         ["parse", "resolve", "write", "invalidate"])
+
+    # Ensures that no status is returned for a job that doesn't exist
+    def test_get_job_status_missing_job(self):
+        self.assertIsNone(jobs.get_job_status(1))
+        self.assertEqual(UploadJob.objects.all().count(), 0)
@@ -0,0 +1,54 @@
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase
+
+from api import load_test, synthetic
+
+"""
+Contains unit tests for the load test in load_test.py.
+
+Author: Ryan Johnson
+"""
+
+
+class LoadTest(TransactionTestCase):
+    # Every test runs against a small synthetic campus, committed so that every simulated user can read it
+    def setUp(self):
+        cache.clear()
+        synthetic.generate_campus(60, 3, 4, seed=1)
+
+    # Ensures that every request is made and summarized by endpoint, with the percentiles in increasing order
+    def test_run_load_test(self):
+        report = load_test.run_load_test(40, 4, seed=2)
+        self.assertEqual(report["overall"]["requests"], 40)
+        self.assertEqual(report["overall"]["errors"], 0)
+        self.assertEqual(sum(summary["requests"] for summary in report["endpoints"].values()), 40)
+        self.assertEqual(set(report["endpoints"]), set(load_test.ENDPOINT_WEIGHTS))
+        for summary in report["endpoints"].values():
+            if summary["requests"]:
+                self.assertLessEqual(summary["p50Ms"], summary["p95Ms"])
+                self.assertLessEqual(summary["p95Ms"], summary["p99Ms"])
+
+    # Ensures that requests can be made for every endpoint from the campus within the database
+    def test_build_request_pool(self):
+        pool = load_test.build_request_pool(0)
+        self.assertEqual(set(pool), set(load_test.ENDPOINT_WEIGHTS))
+        self.assertIn({"buildings[]": []}, pool["get_number_classes"])
+
+
+class LoadTestReports(TestCase):
+    # Ensures that percentiles are found using the nearest rank
+    def test_percentile(self):
+        timings = [index / 100 for index in range(1, 101)]
+        self.assertEqual(load_test.percentile(timings, 50), 0.5)
+        self.assertEqual(load_test.percentile(timings, 99), 0.99)
+        self.assertEqual(load_test.percentile([0.3], 95), 0.3)
+
+    # Ensures that the percentiles of an earlier report are added to the matching endpoints
+    def test_compare_reports(self):
+        report = {"overall": {"throughput": 200.0, "p50Ms": 4.0},
+                  "endpoints": {"get_terms": {"throughput": 100.0, "p50Ms": 2.0}, "get_next_time": {"p50Ms": 1.0}}}
+        baseline = {"overall": {"throughput": 100.0, "p50Ms": 4.0}, "endpoints": {"get_terms": {"p50Ms": 1.0}}}
+        report = load_test.compare_reports(report, baseline)
+        self.assertEqual(report["overall"]["baseline"]["throughput"]["change"], 2.0)
+        self.assertEqual(report["endpoints"]["get_terms"]["baseline"]["p50Ms"]["change"], 2.0)
+        self.assertNotIn("baseline", report["endpoints"]["get_next_time"])
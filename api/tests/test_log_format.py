@@ -0,0 +1,85 @@
+import logging
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models.query import QuerySet
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from api import synthetic
+from api.log_format import Truncated
+from api.tests.test_query_budgets import QueryBudgets
+
+"""
+Contains unit tests for the logging helpers in log_format.py, along with tests ensuring that the logging within the
+services and views costs nothing when debug logging is disabled.
+
+Author: Ryan Johnson
+"""
+
+
+class TruncatedValues(TestCase):
+    # Ensures that small values are logged in full
+    def test_small_value(self):
+        self.assertEqual(str(Truncated({"M": [1, 2]})), "{'M': [1, 2]}")
+        self.assertEqual(str(Truncated("SIMP-120")), "SIMP-120")
+
+    # Ensures that large nested values are cut down rather than formatted in full
+    def test_large_value(self):
+        value = {f"{hour:02d}:00:00": [[f"Course {course}", "Instructor", course] for course in range(1000)]
+                 for hour in range(24)}
+        self.assertLess(len(str(Truncated(value))), 1100)
+        self.assertEqual(str(Truncated("A" * 500, limit=10)), "AAAAAAAAAA... (490 more characters)")
+
+    # Ensures that a wrapped value is only formatted once the message is emitted
+    def test_formatted_lazily(self):
+        value = mock.Mock(spec=["__repr__"])
+        value.__repr__ = mock.Mock(return_value="value")
+        logger = logging.getLogger("test_log_format")
+        logger.setLevel(logging.INFO)
+        logger.debug("Value: %s", Truncated([value]))
+        self.assertEqual(value.__repr__.call_count, 0)
+        with self.assertLogs("test_log_format", level="INFO"):
+            logger.info("Value: %s", Truncated([value]))
+        self.assertEqual(value.__repr__.call_count, 1)
+
+
+class LoggingCost(TestCase):
+    # Counts the queries made by every endpoint, along with the number of values formatted for the log
+    def request_endpoints(self):
+        endpoint_requests = QueryBudgets.endpoint_requests()
+        formatted = []
+        original_str = Truncated.__str__
+
+        def tracking_str(truncated):
+            formatted.append(truncated)
+            return original_str(truncated)
+
+        def failing_repr(queryset):
+            raise AssertionError("A queryset was formatted for the log")
+
+        counts = {}
+        with mock.patch.object(Truncated, "__str__", tracking_str), \
+                mock.patch.object(QuerySet, "__repr__", failing_repr):
+            for name, (url_name, parameters) in endpoint_requests.items():
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    self.client.get(reverse(url_name), parameters)
+                counts[name] = len(queries.captured_queries)
+        return counts, formatted
+
+    # Ensures that no values are formatted and no extra queries are made at INFO level, while the same requests at
+    # DEBUG level format their values without making any extra queries
+    def test_info_level_logging_cost(self):
+        synthetic.generate_campus(200, 4, 5, seed=1)
+        for logger_name in ["services", "api_views"]:
+            self.assertFalse(logging.getLogger(logger_name).isEnabledFor(logging.DEBUG))
+        info_counts, info_formatted = self.request_endpoints()
+        self.assertEqual(info_formatted, [])
+
+        with self.assertLogs("services", level="DEBUG"), self.assertLogs("api_views", level="DEBUG"):
+            debug_counts, debug_formatted = self.request_endpoints()
+        self.assertGreater(len(debug_formatted), 0)
+        self.assertEqual(debug_counts, info_counts)
@@ -0,0 +1,98 @@
+import logging
+from logging.handlers import QueueListener
+
+from django.test import SimpleTestCase
+
+from api import log_queue
+
+"""
+Contains unit tests for the queued logging in log_queue.py.
+
+Author: Ryan Johnson
+"""
+
+
+class CollectingHandler(logging.Handler):
+    """
+    Keeps every message it receives, standing in for the console and log file.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class QueuedLogging(SimpleTestCase):
+    # Creates a logger that isn't shared with the rest of the application, passing its messages to the given handler
+    @classmethod
+    def create_logger(cls, name, handler):
+        logger = logging.getLogger(f"test_log_queue.{name}")
+        logger.handlers = [handler]
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        return logger
+
+    # Creates a log record with the given message and level
+    @classmethod
+    def create_record(cls, message, level=logging.INFO):
+        return logging.LogRecord("test_log_queue", level, __file__, 0, message, None, None)
+
+    # Ensures that queued messages are written by the listener
+    def test_messages_written(self):
+        target = CollectingHandler()
+        queue_handler = log_queue.BoundedQueueHandler(10)
+        listener = QueueListener(queue_handler.queue, target)
+        listener.start()
+        logger = self.create_logger("written", queue_handler)
+        logger.info("Upload %s finished", 1)
+        listener.stop()
+        self.assertEqual(target.messages, ["Upload 1 finished"])
+
+    # Ensures that messages are dropped once the queue is full, and that the dropped messages are reported
+    def test_full_queue_dropped(self):
+        queue_handler = log_queue.BoundedQueueHandler(2, report_interval=0)
+        logger = self.create_logger("dropped", queue_handler)
+        for number in range(5):
+            logger.info("Message %s", number)
+        self.assertEqual(queue_handler.dropped, 3)
+        self.assertEqual(queue_handler.queue.qsize(), 2)
+
+        queue_handler.queue.get_nowait()
+        queue_handler.queue.get_nowait()
+        queue_handler.report_losses()
+        report = queue_handler.queue.get_nowait()
+        self.assertEqual(report.levelno, logging.WARNING)
+        self.assertIn("3 log messages dropped", report.getMessage())
+
+    # Ensures that frequent messages are sampled once they have been logged a set number of times in an interval
+    def test_frequent_messages_sampled(self):
+        sampler = log_queue.MessageSampler(interval=60, burst=3, rate=5)
+        allowed = [sampler.allow(self.create_record("Row %s read")) for _ in range(13)]
+        self.assertEqual(allowed, [True] * 3 + [False] * 4 + [True] + [False] * 4 + [True])
+        self.assertTrue(sampler.allow(self.create_record("Another message")))
+
+    # Ensures that warnings and errors are never sampled
+    def test_warnings_not_sampled(self):
+        sampler = log_queue.MessageSampler(interval=60, burst=0, rate=1000)
+        self.assertFalse(sampler.allow(self.create_record("Row %s read")))
+        self.assertTrue(sampler.allow(self.create_record("Upload failed", logging.ERROR)))
+
+    # Ensures that sampled messages are counted and reported
+    def test_sampled_messages_reported(self):
+        queue_handler = log_queue.BoundedQueueHandler(10, log_queue.MessageSampler(interval=60, burst=1, rate=100))
+        logger = self.create_logger("sampled", queue_handler)
+        for number in range(4):
+            logger.info("Row %s read", number)
+        self.assertEqual(queue_handler.sampled, 3)
+        queue_handler.report_losses(force=True)
+        messages = [queue_handler.queue.get_nowait().getMessage() for _ in range(2)]
+        self.assertEqual(messages[0], "Row 0 read")
+        self.assertIn("3 frequent messages sampled out", messages[1])
+
+    # Ensures that the root logger writes through the queue once the application is ready
+    def test_root_logger_queued(self):
+        self.assertTrue(any(isinstance(handler, log_queue.BoundedQueueHandler)
+                            for handler in logging.getLogger().handlers))
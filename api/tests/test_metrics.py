@@ -0,0 +1,148 @@
+import json
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from api import metrics, shadow, slow_queries
+from api.models import Classroom
+
+"""
+Contains unit tests for the metrics collected by the middleware in middleware.py and exposed by metrics.py.
+
+Author: Ryan Johnson
+"""
+
+
+class Metrics(TestCase):
+    # Every test writes its metrics to its own directory, starting without any recorded metrics
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(METRICS_DIRECTORY=self.directory.name)
+        self.settings_override.enable()
+        metrics.registry.reset()
+        slow_queries.slow_query_log.reset()
+        shadow.shadow_log.reset()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.directory.cleanup()
+        metrics.registry.reset()
+        slow_queries.slow_query_log.reset()
+        shadow.shadow_log.reset()
+
+    # Ensures that requests to the API views are recorded, including their queries and response size
+    def test_request_recorded(self):
+        Classroom.objects.create(name="SIMP-120", building="SIMP", room_num="120")
+        response = self.client.get(reverse("get_terms"))
+        self.client.get(reverse("get_terms"))
+        view_metrics = metrics.registry.snapshot()["get_terms"]
+        self.assertEqual(view_metrics["count"], 2)
+        self.assertEqual(view_metrics["statuses"], {"200": 2})
+        self.assertEqual(view_metrics["queries"], 4)
+        self.assertEqual(view_metrics["responseBytes"], 2 * len(response.content))
+        self.assertEqual(view_metrics["buckets"][-1], 2)
+
+    # Ensures that a streamed response is recorded with the size of its body once every chunk has been sent
+    def test_streamed_response_recorded(self):
+        Classroom.objects.create(name="SIMP-120", building="SIMP", room_num="120")
+        response = self.client.get(reverse("export_classroom_schedules"))
+        self.assertNotIn("export_classroom_schedules", metrics.registry.snapshot())
+        body = b"".join(response.streaming_content)
+        response.close()
+        view_metrics = metrics.registry.snapshot()["export_classroom_schedules"]
+        self.assertEqual(view_metrics["count"], 1)
+        self.assertEqual(view_metrics["responseBytes"], len(body))
+        self.assertGreater(len(body), 0)
+
+    # Ensures that the pages of the front end and the metrics themselves aren't recorded
+    def test_other_pages_not_recorded(self):
+        self.client.get(reverse("metrics"))
+        self.client.get("/admin/login/")
+        self.assertEqual(metrics.registry.snapshot(), {})
+
+    # Ensures that the metrics are exposed in the Prometheus text format, merged with those of other processes
+    def test_metrics_endpoint(self):
+        self.client.get(reverse("get_terms"))
+        other_process = metrics.new_view_metrics()
+        other_process.update({"count": 3, "durationSum": 0.3, "queries": 6, "statuses": {"200": 3}})
+        other_process["buckets"] = [3] * len(metrics.LATENCY_BUCKETS)
+        with open(os.path.join(self.directory.name, "metrics-1-1.json"), "w") as file:
+            json.dump({"views": {"get_terms": other_process}, "slowQueries": []}, file)
+
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        text = response.content.decode()
+        self.assertIn("# TYPE api_request_duration_seconds histogram", text)
+        self.assertIn('api_request_duration_seconds_count{view="get_terms"} 4', text)
+        self.assertIn('api_request_duration_seconds_bucket{view="get_terms",le="+Inf"} 4', text)
+        self.assertIn('api_requests_total{view="get_terms",status="200"} 4', text)
+        self.assertIn('api_db_queries_total{view="get_terms"} 8', text)
+
+    # Ensures that the slow queries of every process are merged by fingerprint and exposed with the metrics
+    def test_slow_queries_exposed(self):
+        sql = 'SELECT "name" FROM api_course WHERE term = %s'
+        slow_queries.slow_query_log.record(sql, 0.5, "services.get_terms", "/api/get_terms/")
+        other_query = {"fingerprint": slow_queries.fingerprint(sql), "count": 2, "totalSeconds": 1.5,
+                       "maxSeconds": 1.0, "callers": ["legacy_engine.get_terms"], "paths": ["/api/get_terms/"]}
+        with open(os.path.join(self.directory.name, "metrics-1-1.json"), "w") as file:
+            json.dump({"views": {}, "slowQueries": [other_query]}, file)
+
+        collected = metrics.registry.collect()
+        self.assertEqual(collected["slowQueries"], [dict(other_query, count=3, totalSeconds=2.0, callers=[
+            "legacy_engine.get_terms", "services.get_terms"])])
+        text = self.client.get(reverse("metrics")).content.decode()
+        self.assertIn('api_slow_queries_total{fingerprint="SELECT \\"name\\" FROM api_course WHERE term = ?"} 3',
+                      text)
+        self.assertIn("# TYPE api_slow_query_duration_seconds_total counter", text)
+
+    # Ensures that the shadow comparisons of every process are merged and exposed with the metrics
+    def test_shadow_comparisons_exposed(self):
+        shadow.shadow_log.record("count_block_classrooms", 0.2, 0.1, False)
+        other_process = {"count_block_classrooms": {"comparisons": 2, "divergences": 1, "failures": 0, "skipped": 3,
+                                                    "servedSeconds": 0.5, "shadowSeconds": 0.4,
+                                                    "servedMaxSeconds": 0.3, "shadowMaxSeconds": 0.05}}
+        with open(os.path.join(self.directory.name, "metrics-1-1.json"), "w") as file:
+            json.dump({"views": {}, "slowQueries": [], "shadow": other_process}, file)
+
+        totals = metrics.registry.collect()["shadow"]["count_block_classrooms"]
+        self.assertEqual((totals["comparisons"], totals["divergences"], totals["skipped"]), (3, 1, 3))
+        self.assertAlmostEqual(totals["servedSeconds"], 0.7)
+        self.assertEqual((totals["servedMaxSeconds"], totals["shadowMaxSeconds"]), (0.3, 0.1))
+        text = self.client.get(reverse("metrics")).content.decode()
+        self.assertIn('api_shadow_comparisons_total{function="count_block_classrooms"} 3', text)
+        self.assertIn('api_shadow_divergences_total{function="count_block_classrooms"} 1', text)
+        self.assertIn("# TYPE api_shadow_max_seconds gauge", text)
+
+    # Ensures that the metrics are refused for requests forwarded by the web server
+    def test_metrics_endpoint_forwarded(self):
+        response = self.client.get(reverse("metrics"), HTTP_X_FORWARDED_FOR="203.0.113.5")
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(reverse("metrics"), REMOTE_ADDR="203.0.113.5")
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(reverse("metrics"), REMOTE_ADDR="")
+        self.assertEqual(response.status_code, 403)
+
+    # Ensures that the metrics files of processes that haven't written metrics recently are left out and removed
+    def test_stale_metrics_removed(self):
+        other_process = metrics.new_view_metrics()
+        other_process["count"] = 3
+        file_path = os.path.join(self.directory.name, "metrics-1-1.json")
+        with open(file_path, "w") as file:
+            json.dump({"views": {"get_terms": other_process}, "slowQueries": []}, file)
+        stale_time = time.time() - settings.METRICS_RETENTION - 60
+        os.utime(file_path, (stale_time, stale_time))
+
+        self.assertNotIn("get_terms", metrics.registry.collect()["views"])
+        self.assertFalse(os.path.exists(file_path))
+
+    # Ensures that histogram buckets count every response at least as fast as the bucket's bound
+    def test_histogram_buckets(self):
+        metrics.registry.record("get_terms", 200, 0.02, 1, 0.001, 10)
+        buckets = metrics.registry.snapshot()["get_terms"]["buckets"]
+        self.assertEqual(buckets[:3], [0, 0, 1])
+        self.assertEqual(buckets[-1], 1)
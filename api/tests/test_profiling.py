@@ -0,0 +1,58 @@
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+"""
+Contains unit tests for the profiling middleware in middleware.py.
+
+Author: Ryan Johnson
+"""
+
+
+class Profiling(TestCase):
+    # Every test saves its profiles to its own directory
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(PROFILING_DIRECTORY=self.directory.name)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.directory.cleanup()
+
+    # Ensures that a staff member requesting a profile receives one, saved with a summary of the request
+    def test_profile_saved(self):
+        self.client.force_login(User.objects.create_user("staff", password="password", is_staff=True))
+        response = self.client.get(reverse("get_terms"), {"profile": "1"})
+        self.assertEqual(response.status_code, 200)
+        file_name = response["X-Profile-File"]
+        self.assertTrue(os.path.exists(os.path.join(self.directory.name, f"{file_name}.prof")))
+        with open(os.path.join(self.directory.name, f"{file_name}.txt")) as file:
+            summary = file.read()
+        self.assertIn("Path: /api/get_terms/?profile=1", summary)
+        self.assertIn("Database queries: 2", summary)
+        self.assertIn("cumulative", summary)
+
+    # Ensures that the profiling header also triggers a profile
+    def test_profile_header(self):
+        self.client.force_login(User.objects.create_user("staff", password="password", is_staff=True))
+        response = self.client.get(reverse("get_terms"), HTTP_X_PROFILE="1")
+        self.assertIn("X-Profile-File", response)
+
+    # Ensures that profiles aren't saved for users who aren't staff members
+    def test_profile_refused(self):
+        self.client.force_login(User.objects.create_user("student", password="password"))
+        response = self.client.get(reverse("get_terms"), {"profile": "1"})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Profile-File", response)
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    # Ensures that requests not asking for a profile aren't profiled
+    def test_not_profiled(self):
+        self.client.force_login(User.objects.create_user("staff", password="password", is_staff=True))
+        response = self.client.get(reverse("get_terms"))
+        self.assertNotIn("X-Profile-File", response)
+        self.assertEqual(os.listdir(self.directory.name), [])
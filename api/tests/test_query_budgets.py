@@ -0,0 +1,114 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from api import services, synthetic
+from api.models import Course, Term
+
+"""
+Contains tests ensuring that every API endpoint and set-based calculation stays within its budget of database queries.
+The set-based calculations, and the endpoints they don't shadow, make a fixed number of queries regardless of the amount
+of data held within the database.
+
+Author: Ryan Johnson
+"""
+
+# Number of course sections within each campus the endpoints are checked against
+CAMPUS_SCALES = [10, 100, 1000]
+
+# Maximum number of queries made by each endpoint when no result has been cached
+QUERY_BUDGETS = {
+    "get_building_names": 0,
+    "get_past_time": 2,
+    "get_next_time": 2,
+    "get_terms": 2,
+}
+
+# Maximum number of queries made at each campus scale by the heatmap, used classroom, and classroom schedule endpoints
+# when no result has been cached. These endpoints are served by the legacy engine, which queries each time block and
+# classroom separately, so their budgets grow with the campus.
+LEGACY_QUERY_BUDGETS = {
+    "get_number_classes": {10: 90, 100: 330, 1000: 2300},
+    "get_number_classes_buildings": {10: 40, 100: 115, 1000: 415},
+    "get_used_classrooms": {10: 2, 100: 10, 1000: 110},
+    "get_used_classrooms_buildings": {10: 2, 100: 4, 1000: 22},
+    "get_classroom_data": {10: 25, 100: 55, 1000: 35},
+}
+
+# Maximum number of queries made by each set-based calculation. The endpoints above run these calculations in the
+# shadow of the legacy engine, so the calculations are also checked directly.
+CALCULATION_BUDGETS = {
+    "count_block_classrooms": 2,
+    "count_block_classrooms_buildings": 2,
+    "find_used_classrooms": 1,
+    "find_used_classrooms_buildings": 1,
+    "find_classroom_courses": 1,
+}
+
+
+class QueryBudgets(TestCase):
+    # Returns the URL and query parameters of every endpoint being checked against the campus in the database
+    @classmethod
+    def endpoint_requests(cls):
+        classroom = (Course.objects.exclude(classroom__isnull=True).exclude(classroom__building="OFCP")
+                     .order_by("id").values_list("classroom__name", flat=True).first())
+        return {
+            "get_number_classes": ("get_number_classes", {}),
+            "get_number_classes_buildings": ("get_number_classes", {"buildings[]": ["SIMP", "CENG"]}),
+            "get_building_names": ("get_building_names", {}),
+            "get_used_classrooms": ("get_used_classrooms", {"day": "M", "startTime": "09:00", "endTime": "09:50",
+                                                            "buildings": ""}),
+            "get_used_classrooms_buildings": ("get_used_classrooms", {"day": "M", "startTime": "09:00",
+                                                                      "endTime": "09:50", "buildings": "SIMP, CENG"}),
+            "get_past_time": ("get_past_time", {"day": "M", "currentStartTime": "09:50", "buildings": ""}),
+            "get_next_time": ("get_next_time", {"day": "M", "currentEndTime": "09:00", "buildings": ""}),
+            "get_classroom_data": ("get_classroom_data", {"classroom": classroom}),
+            "get_terms": ("get_terms", {}),
+        }
+
+    # Returns the function and arguments of every set-based calculation being checked against the campus in the database
+    @classmethod
+    def calculation_calls(cls):
+        term = Term.objects.get(is_active=True).name
+        classroom = (Course.objects.exclude(classroom__isnull=True).exclude(classroom__building="OFCP")
+                     .order_by("id").values_list("classroom__name", flat=True).first())
+        return {
+            "count_block_classrooms": (services.count_block_classrooms, ("all", term)),
+            "count_block_classrooms_buildings": (services.count_block_classrooms, (["SIMP", "CENG"], term)),
+            "find_used_classrooms": (services.find_used_classrooms, ("M", "09:00", "09:50", "all", term)),
+            "find_used_classrooms_buildings": (services.find_used_classrooms,
+                                               ("M", "09:00", "09:50", ["SIMP", "CENG"], term)),
+            "find_classroom_courses": (services.find_classroom_courses, (classroom, term)),
+        }
+
+    # Counts the queries made by every endpoint with nothing cached
+    def count_endpoint_queries(self):
+        counts = {}
+        for name, (url_name, parameters) in self.endpoint_requests().items():
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse(url_name), parameters)
+            self.assertEqual(response.status_code, 200, name)
+            counts[name] = len(queries.captured_queries)
+        for name, (function, arguments) in self.calculation_calls().items():
+            with CaptureQueriesContext(connection) as queries:
+                function(*arguments)
+            counts[name] = len(queries.captured_queries)
+        return counts
+
+    # Ensures that every endpoint stays within its query budget, with the set-based calculations and the endpoints not
+    # served by the legacy engine making the same number of queries at every scale
+    def test_query_budgets(self):
+        scale_counts = {}
+        for sections in CAMPUS_SCALES:
+            synthetic.generate_campus(sections, 13, max(sections // 50, 1), seed=sections)
+            counts = self.count_endpoint_queries()
+            for name, budget in {**QUERY_BUDGETS, **CALCULATION_BUDGETS}.items():
+                self.assertLessEqual(counts[name], budget, f"{name} at {sections} sections")
+            for name, budgets in LEGACY_QUERY_BUDGETS.items():
+                self.assertLessEqual(counts[name], budgets[sections], f"{name} at {sections} sections")
+            scale_counts[sections] = {name: count for name, count in counts.items() if name not in LEGACY_QUERY_BUDGETS}
+        for sections in CAMPUS_SCALES[1:]:
+            self.assertEqual(scale_counts[sections], scale_counts[CAMPUS_SCALES[0]], f"{sections} sections")
@@ -0,0 +1,49 @@
+import re
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from api import server_timing
+from api.models import Term
+
+"""
+Contains unit tests for the Server-Timing header added by the middleware in middleware.py.
+
+Author: Ryan Johnson
+"""
+
+
+class ServerTimingHeader(TestCase):
+    # Every test starts without any cached results
+    def setUp(self):
+        cache.clear()
+
+    # Reads the duration of every metric within the Server-Timing header of a response
+    @classmethod
+    def parse_header(cls, response):
+        return {name: float(duration) for name, duration in re.findall(r"(\w+);dur=([\d.]+)", response["Server-Timing"])}
+
+    # Ensures that responses of the API views break down their time into the database, cache, services, and rendering
+    def test_header_added(self):
+        Term.objects.create(name="2024SP", is_active=True)
+        response = self.client.get(reverse("get_number_classes"))
+        timings = self.parse_header(response)
+        self.assertEqual(list(timings), ["db", "cache", "service", "render", "total"])
+        self.assertGreater(timings["db"], 0)
+        self.assertGreater(timings["cache"], 0)
+        self.assertGreater(timings["render"], 0)
+        self.assertLessEqual(timings["db"] + timings["cache"] + timings["service"] + timings["render"],
+                             timings["total"])
+        self.assertIn('desc="', response["Server-Timing"])
+
+    # Ensures that pages outside of the API don't receive the header
+    def test_other_pages_not_timed(self):
+        response = self.client.get("/admin/login/")
+        self.assertNotIn("Server-Timing", response)
+
+    # Ensures that cache lookups made outside of a request aren't recorded
+    def test_cache_outside_request(self):
+        with server_timing.timed_cache():
+            cache.get("key")
+        self.assertIsNone(server_timing.current_timing.get())
@@ -1,14 +1,19 @@
 import datetime
 import os
+from unittest import mock
 
 import pandas as pd
-from django.test import TestCase
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.urls import reverse
 
 from api import services
-from api.models import Classroom, Course, Instructor
+from api.models import Classroom, Course, Instructor, Term
 from api.services import calculate_day_string, calculate_number_classes, get_all_buildings, get_used_classrooms, \
     calculate_classroom_time_blocks, get_classroom_courses, get_past_time, get_next_time, upload_schedule_data, \
-    upload_classroom_data
+    upload_classroom_data, get_terms, set_active_term, validate_upload
 
 """
 Contains unit tests for every method in services.py.
@@ -771,6 +776,41 @@ class CalculateNumberClasses(TestCase):
         self.assertEqual(actual_num_classes, predicted_num_classes)
 
 
+class CompactNumberClasses(TestCase):
+    # Every test starts with two overlapping MWF courses in separate classrooms
+    def setUp(self):
+        cache.clear()
+        Term.objects.create(name="2024SPR", is_active=True)
+        instructor = Instructor.objects.create(name="Nathan Williams")
+        for section_id, (classroom_name, start_time, end_time) in enumerate([("SIMP-120", "08:00", "08:50"),
+                                                                             ("STCH-101", "08:30", "09:50")]):
+            classroom = Classroom.objects.create(name=classroom_name, building=classroom_name[:4],
+                                                 room_num=classroom_name[5:])
+            Course.objects.create(section_id=section_id, course_num="123", section_num="A", term="2024SPR",
+                                  start_date=datetime.date(2024, 4, 4), end_date=datetime.date(2024, 4, 5),
+                                  name="Advanced Software Engineering", subject="CS", status="A", day="MWF",
+                                  classroom=classroom, instruction_method="LEC", instructor=instructor,
+                                  start_time=start_time, end_time=end_time)
+
+    # Ensures that every day is given as the boundaries of its blocks in minutes alongside the count of each block
+    def test_compact_number_classes(self):
+        compact = services.compact_number_classes(calculate_number_classes())
+        self.assertEqual(compact["M"], {"boundaries": [360, 480, 510, 530, 590, 1439], "counts": [0, 1, 2, 1, 0]})
+        self.assertEqual(compact["T"], {"boundaries": [360, 1439], "counts": [0]})
+        self.assertEqual(set(compact), {"M", "T", "W", "th", "F"})
+
+    # Ensures that the compact layout can be requested through either the layout parameter or the Accept header
+    def test_compact_layout_requested(self):
+        default = self.client.get(reverse("get_number_classes"))
+        by_parameter = self.client.get(reverse("get_number_classes"), {"layout": "compact"})
+        by_header = self.client.get(reverse("get_number_classes"), HTTP_ACCEPT="application/json; layout=compact")
+        self.assertEqual(default.json(), calculate_number_classes())
+        self.assertEqual(by_parameter.json(), services.compact_number_classes(calculate_number_classes()))
+        self.assertEqual(by_header.json(), by_parameter.json())
+        self.assertLess(len(by_parameter.content), len(default.content))
+        self.assertIn("Accept", by_header["Vary"])
+
+
 class GetAllBuildings(TestCase):
     def test_get_all_buildings(self):
         actual_buildings_list = get_all_buildings()
@@ -794,6 +834,44 @@ class GetAllBuildings(TestCase):
         self.assertEqual(actual_buildings_list, predicted_buildings_list)
 
 
+class GetBootstrap(TestCase):
+    # Every test starts with courses in two buildings, an off-campus course, and an empty classroom in a third building
+    def setUp(self):
+        cache.clear()
+        Term.objects.create(name="2024SPR", is_active=True)
+        Classroom.objects.create(name="CENG-100", building="CENG", room_num="100")
+        for section_id, classroom_name in enumerate(["SIMP-120", "STCH-101", "OFCP-1"]):
+            classroom = Classroom.objects.create(name=classroom_name, building=classroom_name[:4],
+                                                 room_num=classroom_name[5:])
+            Course.objects.create(section_id=section_id, course_num="123", section_num="A", term="2024SPR",
+                                  start_date=datetime.date(2024, 4, 4), end_date=datetime.date(2024, 4, 5),
+                                  name="Advanced Software Engineering", subject="CS", status="A", day="MWF",
+                                  classroom=classroom, instruction_method="LEC", start_time="08:00",
+                                  end_time="08:50")
+
+    # Ensures that the bundle holds only the buildings with courses, the campus heatmap, and the data's generation
+    def test_get_bootstrap(self):
+        bootstrap = services.get_bootstrap()
+        self.assertEqual(bootstrap["buildings"], {"SIMP": "Simperman Hall", "STCH": "St. Charles Hall"})
+        self.assertEqual(bootstrap["numberClasses"], calculate_number_classes())
+        self.assertEqual([bootstrap["term"], bootstrap["generation"]], ["2024SPR", 0])
+        with self.assertNumQueries(1):
+            self.assertEqual(services.get_bootstrap(), bootstrap)
+
+    # Ensures that browsers holding the current bundle are told it hasn't changed until the term's data changes
+    def test_bootstrap_revalidated(self):
+        response = self.client.get(reverse("get_bootstrap"))
+        self.assertIn("no-cache", response["Cache-Control"])
+        etag = response["ETag"]
+        self.assertEqual(self.client.get(reverse("get_bootstrap"), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        compact = self.client.get(reverse("get_bootstrap"), {"layout": "compact"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(compact.json()["numberClasses"]["M"]["counts"], [0, 2, 0])
+        Term.objects.filter(name="2024SPR").update(generation=F("generation") + 1)
+        response = self.client.get(reverse("get_bootstrap"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["generation"], 1)
+
+
 class GetUsedClassrooms(TestCase):
     # Creates a MWF course in SIMP at the designated start/end time
     @classmethod
@@ -1683,6 +1761,58 @@ class GetNextTime(TestCase):
         self.assertEqual(actual_next_time, predicted_next_time)
 
 
+class GetBlockPage(TestCase):
+    # Every test starts with two overlapping MWF courses in separate buildings
+    def setUp(self):
+        cache.clear()
+        Term.objects.create(name="2024SPR", is_active=True)
+        instructor = Instructor.objects.create(name="Nathan Williams")
+        for section_id, (classroom_name, start_time, end_time) in enumerate([("SIMP-120", "08:00", "08:50"),
+                                                                             ("STCH-101", "08:30", "09:50")]):
+            classroom = Classroom.objects.create(name=classroom_name, building=classroom_name[:4],
+                                                 room_num=classroom_name[5:], occupancy=30)
+            Course.objects.create(section_id=section_id, course_num="123", section_num="A", term="2024SPR",
+                                  start_date=datetime.date(2024, 4, 4), end_date=datetime.date(2024, 4, 5),
+                                  name="Advanced Software Engineering", subject="CS", status="A", day="MWF",
+                                  classroom=classroom, instruction_method="LEC", instructor=instructor,
+                                  start_time=start_time, end_time=end_time, enrolled=20)
+
+    # Ensures that paging forward returns the block starting at the given time, its classrooms, and its neighbours
+    def test_next_block(self):
+        block_page = services.get_block_page('M', '08:30', 'next')
+        self.assertEqual(block_page["startTime"], '08:30')
+        self.assertEqual(block_page["endTime"], '08:50')
+        self.assertEqual(block_page["previousBlock"], ['08:00', '08:30'])
+        self.assertEqual(block_page["nextBlock"], ['08:50', '09:50'])
+        self.assertEqual(block_page["usedClassrooms"], get_used_classrooms('M', '08:30', '08:50'))
+        self.assertEqual(set(block_page["usedClassrooms"]), {"SIMP-120", "STCH-101"})
+
+    # Ensures that paging backward returns the block ending at the given time, with no block before the first block
+    def test_previous_block(self):
+        block_page = services.get_block_page('M', '08:00', 'previous', ["SIMP"])
+        self.assertEqual([block_page["startTime"], block_page["endTime"]], ['06:00', '08:00'])
+        self.assertIsNone(block_page["previousBlock"])
+        self.assertEqual(block_page["nextBlock"], ['08:00', '08:50'])
+        self.assertEqual(block_page["usedClassrooms"], {})
+
+    # Ensures that an empty dictionary is returned if the time, day, or direction is invalid
+    def test_block_not_found(self):
+        self.assertEqual(services.get_block_page('M', '09:00', 'next', ["SIMP"]), {})
+        self.assertEqual(services.get_block_page('test', '08:00', 'next'), {})
+        self.assertEqual(services.get_block_page('M', 'test', 'next'), {})
+        self.assertEqual(services.get_block_page('M', '08:00', 'sideways'), {})
+
+    # Ensures that the view pages through the blocks of the given buildings, rejecting unknown directions
+    def test_block_page_view(self):
+        response = self.client.get(reverse("get_block_page"), {"day": "M", "time": "08:50", "direction": "next",
+                                                               "buildings": "STCH, SIMP"})
+        self.assertEqual(response.json()["endTime"], "09:50")
+        self.assertEqual(list(response.json()["usedClassrooms"]), ["STCH-101"])
+        response = self.client.get(reverse("get_block_page"), {"day": "M", "time": "08:50", "direction": "up",
+                                                               "buildings": ""})
+        self.assertEqual(response.status_code, 400)
+
+
 class CalculateDayString(TestCase):
     def test_monday(self):
         df = pd.DataFrame({'CSM_MONDAY': ['Y'],
@@ -1983,7 +2113,53 @@ class UploadScheduleData(TestCase):
             self.assertEqual(course.enrolled, int(row['STUDENTS_AND_RESERVED_SEATS']))
             self.assertEqual(course.capacity, int(row['SEC_CAPACITY']))
 
-    # Ensures that any file other than an Excel file will fail
+    # Ensure that a valid CSV file is uploaded with the same data as an Excel spreadsheet
+    def test_valid_csv_upload(self):
+        df = pd.DataFrame({'SEC_TERM': ['2024SP'],
+                           'COURSE_SECTIONS_ID': ['20185'],
+                           'SEC_STATUS': ['A'],
+                           'SEC_START_DATE': ['Jan 17 2024'],
+                           'SEC_END_DATE': ['Mar 10 2024'],
+                           'SEC_SUBJECT': ['ACNU'],
+                           'SEC_COURSE_NO': ['307'],
+                           'SEC_NO': ['A'],
+                           'SEC_SHORT_TITLE': ['Evd-Based Practice Rsrch'],
+                           'SEC_MIN_CRED': ['3.00000'],
+                           'CSM_START_TIME': ['9:00AM'],
+                           'CSM_END_TIME': ['11:50AM'],
+                           'CSM_MONDAY': ['-'],
+                           'CSM_TUESDAY': ['Y'],
+                           'CSM_WEDNESDAY': ['-'],
+                           'CSM_THURSDAY': ['-'],
+                           'CSM_FRIDAY': ['-'],
+                           'CSM_BLDG': ['SIMP'],
+                           'CSM_ROOM': ['407'],
+                           'CSM_INSTR_METHOD': ['LEC'],
+                           'SEC_FACULTY_INFO': ['M. Lewis'],
+                           'STUDENTS_AND_RESERVED_SEATS': ['9'],
+                           'SEC_CAPACITY': ['10'],
+                           'SEC_LOCATION': ['MAIN']})
+        df.to_csv('schedule.csv', index=False)
+        with open('schedule.csv', 'rb') as file:
+            success, missing_columns, summary = upload_schedule_data(file)
+        os.remove('schedule.csv')
+
+        self.assertTrue(success)
+        course = Course.objects.get(section_id=20185)
+        self.assertEqual(course.course_num, '307')
+        self.assertEqual(course.term, '2024SP')
+        self.assertEqual(course.start_date, datetime.date(2024, 1, 17))
+        self.assertEqual(course.min_credits, 3.0)
+        self.assertEqual(course.start_time, datetime.time(9, 0))
+        self.assertEqual(course.end_time, datetime.time(11, 50))
+        self.assertEqual(course.day, 'T')
+        self.assertEqual(course.classroom.name, 'SIMP-407')
+        self.assertEqual(course.classroom.room_num, '407')
+        self.assertEqual(course.instructor.name, 'M. Lewis')
+        self.assertEqual(course.enrolled, 9)
+        self.assertEqual(course.capacity, 10)
+
+    # Ensures that any file other than an Excel or CSV file will fail
     def test_invalid_file_type(self):
         df = pd.DataFrame({'SEC_TERM': ['2024SP'],
                            'COURSE_SECTIONS_ID': ['20185'],
@@ -2008,10 +2184,10 @@ class UploadScheduleData(TestCase):
                            'SEC_FACULTY_INFO': ['M. Lewis'],
                            'STUDENTS_AND_RESERVED_SEATS': ['9'],
                            'SEC_CAPACITY': ['10']})
-        df.to_csv('schedule.csv', index=False, encoding='utf')
-        with open("schedule.csv", 'rb') as file:
+        df.to_csv('schedule.txt', index=False, encoding='utf')
+        with open("schedule.txt", 'rb') as file:
             upload_schedule_data(file)
-        os.remove('schedule.csv')
+        os.remove('schedule.txt')
         self.assertEqual(Course.objects.all().count(), 0)
 
     # def test_invalid_columns(self): # For every column
@@ -2049,7 +2225,87 @@ class UploadClassroomData(TestCase):
             self.assertEqual(classroom.features, '')
             self.assertEqual(classroom.notes, None)
 
-    # Ensures that any file other than an Excel file will fail
+    # Ensure that a valid CSV file is uploaded with the same data as an Excel spreadsheet
+    def test_valid_csv_upload(self):
+        df = pd.DataFrame({'Building Information': ['SIMP'],
+                           'Room Number': ['120'],
+                           'Number of Student Seats in Room': ['15'],
+                           'Width of Room': ['20'],
+                           'Length of Room': ['30'],
+                           'Number of Projectors in Room': ['2'],
+                           'Notes': ['N/A'],
+                           'Does room have any of the following?': ['Whiteboard'],
+                           'Any other things of note in Room (TV or Periodic Table poster)': ['N/A']})
+        df.to_csv('classrooms.csv', index=False)
+        with open('classrooms.csv', 'rb') as file:
+            success, missing_columns, summary = upload_classroom_data(file)
+        os.remove('classrooms.csv')
+
+        self.assertTrue(success)
+        classroom = Classroom.objects.get(name="SIMP-120")
+        self.assertEqual(classroom.building, 'SIMP')
+        self.assertEqual(classroom.room_num, '120')
+        self.assertEqual(classroom.occupancy, 15.0)
+        self.assertEqual(classroom.width, 20)
+        self.assertEqual(classroom.length, 30)
+        self.assertEqual(classroom.projector_num, 2)
+        self.assertEqual(classroom.features, 'Whiteboard')
+        self.assertEqual(classroom.notes, None)
+
+    # Ensures that new classrooms are created, changed classrooms are updated, and unchanged classrooms are counted
+    def test_bulk_upsert_summary(self):
+        Classroom.objects.create(name="SIMP-120", building="SIMP", room_num="120", occupancy=15.0, width=20, length=30,
+                                 projector_num=2, features="", notes=None)
+        Classroom.objects.create(name="STCH-101", building="STCH", room_num="101", occupancy=40.0, width=20, length=30,
+                                 projector_num=1, features="", notes=None)
+        df = pd.DataFrame({'Building Information': ['SIMP', 'STCH', 'CUBE'],
+                           'Room Number': ['120', '101', '1'],
+                           'Number of Student Seats in Room': ['15', '45', '10'],
+                           'Width of Room': ['20', '20', '10'],
+                           'Length of Room': ['30', '30', '10'],
+                           'Number of Projectors in Room': ['2', '1', None],
+                           'Notes': [None, 'Near exit', None],
+                           'Does room have any of the following?': [None, None, 'Whiteboard'],
+                           'Any other things of note in Room (TV or Periodic Table poster)': [None, None, None]})
+        df.to_csv('classrooms.csv', index=False)
+        # One query loads the existing classrooms, one creates, one updates, and one increases the term generations.
+        # The remaining two queries open and close the transaction's savepoint inside the test case.
+        with open('classrooms.csv', 'rb') as file:
+            with self.assertNumQueries(6):
+                success, missing_columns, summary = upload_classroom_data(file)
+        os.remove('classrooms.csv')
+
+        self.assertTrue(success)
+        self.assertEqual(summary, {'created': 1, 'updated': 1, 'unchanged': 1})
+        updated_classroom = Classroom.objects.get(name="STCH-101")
+        self.assertEqual(updated_classroom.occupancy, 45.0)
+        self.assertEqual(updated_classroom.notes, 'Near exit')
+        created_classroom = Classroom.objects.get(name="CUBE-1")
+        self.assertEqual(created_classroom.building, 'CUBE')
+        self.assertEqual(created_classroom.projector_num, None)
+        self.assertEqual(created_classroom.features, 'Whiteboard')
+        self.assertEqual(Classroom.objects.all().count(), 3)
+
+    # Ensures that only the last row is used when a classroom is listed more than once
+    def test_duplicate_classroom_rows(self):
+        df = pd.DataFrame({'Building Information': ['SIMP', 'SIMP'],
+                           'Room Number': ['120', '120'],
+                           'Number of Student Seats in Room': ['15', '25'],
+                           'Width of Room': ['20', '20'],
+                           'Length of Room': ['30', '30'],
+                           'Number of Projectors in Room': ['2', '2'],
+                           'Notes': [None, None],
+                           'Does room have any of the following?': [None, None],
+                           'Any other things of note in Room (TV or Periodic Table poster)': [None, None]})
+        df.to_csv('classrooms.csv', index=False)
+        with open('classrooms.csv', 'rb') as file:
+            success, missing_columns, summary = upload_classroom_data(file)
+        os.remove('classrooms.csv')
+
+        self.assertEqual(summary, {'created': 1, 'updated': 0, 'unchanged': 0})
+        self.assertEqual(Classroom.objects.get(name="SIMP-120").occupancy, 25.0)
+
+    # Ensures that any file other than an Excel or CSV file will fail
     def test_invalid_file_type(self):
         df = pd.DataFrame({'Building Information': ['SH'],
                            'Room Number': ['120'],
@@ -2060,8 +2316,381 @@ class UploadClassroomData(TestCase):
                            'Notes': ['N/A'],
                            'Does room have any of the following?': ['N/A'],
                            'Any other things of note in Room (TV or Periodic Table poster)': ['N/A']})
-        df.to_csv('classrooms.csv', index=False)
-        with open('classrooms.csv', encoding="utf8") as file:
+        df.to_csv('classrooms.txt', index=False)
+        with open('classrooms.txt', encoding="utf8") as file:
+            upload_classroom_data(file)
+        os.remove('classrooms.txt')
+        self.assertEqual(Classroom.objects.all().count(), 0)
+
+
+class Terms(TestCase):
+    # Uploads a schedule holding a single MWF course for the given term
+    @classmethod
+    def upload_term_schedule(cls, term, start_time='9:00AM', end_time='9:50AM'):
+        df = pd.DataFrame({'SEC_TERM': [term],
+                           'COURSE_SECTIONS_ID': ['20185'],
+                           'SEC_STATUS': ['A'],
+                           'SEC_START_DATE': ['Jan 17 2024'],
+                           'SEC_END_DATE': ['Mar 10 2024'],
+                           'SEC_SUBJECT': ['CS'],
+                           'SEC_COURSE_NO': ['301'],
+                           'SEC_NO': ['A'],
+                           'SEC_SHORT_TITLE': [f'Software Engineering {term}'],
+                           'SEC_MIN_CRED': ['3.00000'],
+                           'CSM_START_TIME': [start_time],
+                           'CSM_END_TIME': [end_time],
+                           'CSM_MONDAY': ['Y'],
+                           'CSM_TUESDAY': ['-'],
+                           'CSM_WEDNESDAY': ['Y'],
+                           'CSM_THURSDAY': ['-'],
+                           'CSM_FRIDAY': ['Y'],
+                           'CSM_BLDG': ['SIMP'],
+                           'CSM_ROOM': ['120'],
+                           'CSM_INSTR_METHOD': ['LEC'],
+                           'SEC_FACULTY_INFO': ['Nathan Williams'],
+                           'STUDENTS_AND_RESERVED_SEATS': ['9'],
+                           'SEC_CAPACITY': ['10']})
+        df.to_csv('schedule.csv', index=False)
+        with open('schedule.csv', 'rb') as file:
             upload_schedule_data(file)
+        os.remove('schedule.csv')
+
+    # Cached results from earlier tests must not leak into these tests
+    def setUp(self):
+        cache.clear()
+
+    # Ensures that uploading a new term keeps the courses from previously uploaded terms
+    def test_upload_keeps_other_terms(self):
+        self.upload_term_schedule('2024SP')
+        self.upload_term_schedule('2024FA')
+        self.assertEqual(Course.objects.filter(term='2024SP').count(), 1)
+        self.assertEqual(Course.objects.filter(term='2024FA').count(), 1)
+
+    # Ensures that uploading a term again replaces the courses for only that term
+    def test_upload_replaces_same_term(self):
+        self.upload_term_schedule('2024SP')
+        self.upload_term_schedule('2024SP')
+        self.assertEqual(Course.objects.filter(term='2024SP').count(), 1)
+        self.assertEqual(Term.objects.get(name='2024SP').generation, 2)
+
+    # Ensures that the most recently uploaded term becomes the active term
+    def test_upload_sets_active_term(self):
+        self.upload_term_schedule('2024SP')
+        self.upload_term_schedule('2024FA')
+        self.assertEqual(list(Term.objects.filter(is_active=True).values_list('name', flat=True)), ['2024FA'])
+
+    # Ensures that the results for the active term are returned when no term is specified
+    def test_active_term_results(self):
+        self.upload_term_schedule('2024SP', '8:00AM', '8:50AM')
+        self.upload_term_schedule('2024FA', '9:00AM', '9:50AM')
+        self.assertEqual(get_used_classrooms('M', '09:00', '09:50'),
+                         {'SIMP-120': [['Software Engineering 2024FA', 'Nathan Williams', None, 9]]})
+        self.assertEqual(get_used_classrooms('M', '08:00', '08:50'), {})
+
+    # Ensures that the results for a specified term are returned when the term isn't active
+    def test_specified_term_results(self):
+        self.upload_term_schedule('2024SP', '8:00AM', '8:50AM')
+        self.upload_term_schedule('2024FA', '9:00AM', '9:50AM')
+        self.assertEqual(get_used_classrooms('M', '08:00', '08:50', term='2024SP'),
+                         {'SIMP-120': [['Software Engineering 2024SP', 'Nathan Williams', None, 9]]})
+        self.assertEqual(calculate_number_classes(term='2024SP')[1]['M'],
+                         {'06:00:00': 0, '08:00:00': 1, '08:50:00': 0})
+        self.assertEqual(get_next_time('M', '08:00', term='2024SP'), '08:50')
+
+    # Ensures that cached results are used until the data for the term is uploaded again
+    def test_cached_results_replaced_by_upload(self):
+        self.upload_term_schedule('2024SP', '8:00AM', '8:50AM')
+        calculate_number_classes()
+        Course.objects.filter(term='2024SP').delete()
+        self.assertEqual(calculate_number_classes()[1]['M']['08:00:00'], 1)
+        self.upload_term_schedule('2024SP', '9:00AM', '9:50AM')
+        self.assertEqual(calculate_number_classes()[1]['M'], {'06:00:00': 0, '09:00:00': 1, '09:50:00': 0})
+
+    # Ensures that uploading classroom data replaces the cached results for every term
+    def test_classroom_upload_replaces_cached_results(self):
+        self.upload_term_schedule('2024SP')
+        self.upload_term_schedule('2024FA')
+        generations = dict(Term.objects.values_list('name', 'generation'))
+        df = pd.DataFrame({'Building Information': ['SIMP'],
+                           'Room Number': ['120'],
+                           'Number of Student Seats in Room': ['15'],
+                           'Width of Room': ['20'],
+                           'Length of Room': ['30'],
+                           'Number of Projectors in Room': ['2'],
+                           'Notes': ['N/A'],
+                           'Does room have any of the following?': ['N/A'],
+                           'Any other things of note in Room (TV or Periodic Table poster)': ['N/A']})
+        df.to_csv('classrooms.csv', index=False)
+        with open('classrooms.csv', 'rb') as file:
+            upload_classroom_data(file)
         os.remove('classrooms.csv')
+        for term in Term.objects.all():
+            self.assertEqual(term.generation, generations[term.name] + 1)
+
+    # Ensures that every uploaded term is listed along with its number of courses
+    def test_get_terms(self):
+        self.upload_term_schedule('2024SP')
+        self.upload_term_schedule('2024FA')
+        self.assertEqual(get_terms(), [{'name': '2024FA', 'active': True, 'courses': 1},
+                                       {'name': '2024SP', 'active': False, 'courses': 1}])
+
+    # Ensures that the active term can be changed to any uploaded term, but not to a term that was never uploaded
+    def test_set_active_term(self):
+        self.upload_term_schedule('2024SP')
+        self.upload_term_schedule('2024FA')
+        self.assertTrue(set_active_term('2024SP'))
+        self.assertEqual(list(Term.objects.filter(is_active=True).values_list('name', flat=True)), ['2024SP'])
+        self.assertFalse(set_active_term('2023FA'))
+        self.assertEqual(list(Term.objects.filter(is_active=True).values_list('name', flat=True)), ['2024SP'])
+
+
+class ValidateUpload(TestCase):
+    # Creates a schedule DataFrame holding two valid course sections
+    @classmethod
+    def create_schedule_frame(cls):
+        return pd.DataFrame({'SEC_TERM': ['2024SP', '2024SP'],
+                             'COURSE_SECTIONS_ID': ['20185', '20186'],
+                             'SEC_STATUS': ['A', 'A'],
+                             'SEC_START_DATE': ['Jan 17 2024', 'Jan 17 2024'],
+                             'SEC_END_DATE': ['Mar 10 2024', 'Mar 10 2024'],
+                             'SEC_SUBJECT': ['ACNU', 'CS'],
+                             'SEC_COURSE_NO': ['307', '301'],
+                             'SEC_NO': ['A', 'A'],
+                             'SEC_SHORT_TITLE': ['Evd-Based Practice Rsrch', 'Software Engineering'],
+                             'SEC_MIN_CRED': ['3.00000', '3.00000'],
+                             'CSM_START_TIME': ['9:00AM', None],
+                             'CSM_END_TIME': ['11:50AM', None],
+                             'CSM_MONDAY': ['-', '-'],
+                             'CSM_TUESDAY': ['Y', '-'],
+                             'CSM_WEDNESDAY': ['-', '-'],
+                             'CSM_THURSDAY': ['-', '-'],
+                             'CSM_FRIDAY': ['-', '-'],
+                             'CSM_BLDG': ['SIMP', None],
+                             'CSM_ROOM': ['407', None],
+                             'CSM_INSTR_METHOD': ['LEC', 'ONL'],
+                             'SEC_FACULTY_INFO': ['M. Lewis', 'N. Williams'],
+                             'STUDENTS_AND_RESERVED_SEATS': ['9', '20'],
+                             'SEC_CAPACITY': ['10', '25']})
+
+    # Validates the DataFrame as an uploaded CSV file
+    @classmethod
+    def validate_frame(cls, df, data_type="schedule"):
+        df.to_csv('upload.csv', index=False)
+        with open('upload.csv', 'rb') as file:
+            result = validate_upload(file, data_type)
+        os.remove('upload.csv')
+        return result
+
+    # Ensures that a valid schedule passes validation and is summarized without touching the database
+    def test_valid_schedule(self):
+        with self.assertNumQueries(0):
+            result = self.validate_frame(self.create_schedule_frame())
+        self.assertTrue(result['success'])
+        self.assertEqual(result['errors'], [])
+        self.assertEqual(result['stats'], {'rows': 2, 'terms': {'2024SP': 2}, 'buildings': 1, 'classrooms': 1,
+                                           'instructors': 2, 'scheduledSections': 1, 'rowsWithErrors': 0})
+
+    # Ensures that malformed dates, times, and numbers are reported with the spreadsheet row they appear on
+    def test_invalid_schedule_values(self):
+        df = self.create_schedule_frame()
+        df.loc[0, 'SEC_START_DATE'] = '2024-01-17'
+        df.loc[0, 'CSM_START_TIME'] = '9:00'
+        df.loc[1, 'SEC_CAPACITY'] = 'twenty'
+        result = self.validate_frame(df)
+        self.assertFalse(result['success'])
+        self.assertEqual(result['errorCount'], 3)
+        self.assertEqual([(error['row'], error['column'], error['value']) for error in result['errors']],
+                         [(2, 'SEC_START_DATE', '2024-01-17'), (2, 'CSM_START_TIME', '9:00'),
+                          (3, 'SEC_CAPACITY', 'twenty')])
+        self.assertEqual(result['stats']['rowsWithErrors'], 2)
+
+    # Ensures that a fraction in an integer column of a CSV file is reported with its row rather than failing the read
+    def test_fractional_integer_values(self):
+        df = self.create_schedule_frame()
+        df.loc[1, 'STUDENTS_AND_RESERVED_SEATS'] = '9.5'
+        result = self.validate_frame(df)
+        self.assertFalse(result['success'])
+        self.assertEqual([(error['row'], error['column'], error['value'], error['message'])
+                          for error in result['errors']],
+                         [(3, 'STUDENTS_AND_RESERVED_SEATS', '9.5', 'Expected a whole number')])
+
+    # Ensures that missing values for required fields are reported
+    def test_missing_required_values(self):
+        df = self.create_schedule_frame()
+        df.loc[1, 'SEC_END_DATE'] = None
+        df.loc[1, 'SEC_TERM'] = None
+        result = self.validate_frame(df)
+        self.assertEqual([(error['row'], error['column'], error['message']) for error in result['errors']],
+                         [(3, 'SEC_TERM', 'Missing value'), (3, 'SEC_END_DATE', 'Missing value')])
+
+    # Ensures that missing columns are reported before any rows are checked
+    def test_missing_columns(self):
+        df = self.create_schedule_frame().drop(columns=['SEC_CAPACITY'])
+        result = self.validate_frame(df)
+        self.assertFalse(result['success'])
+        self.assertEqual(result['missingColumns'], ['SEC_CAPACITY'])
+
+    # Ensures that non-numeric classroom measurements are reported
+    def test_invalid_classroom_values(self):
+        df = pd.DataFrame({'Building Information': ['SIMP', 'SIMP'],
+                           'Room Number': ['120', '120'],
+                           'Number of Student Seats in Room': ['15', '20'],
+                           'Width of Room': ['20 ft', '20'],
+                           'Length of Room': ['30', '30'],
+                           'Number of Projectors in Room': ['2', '2'],
+                           'Notes': [None, None],
+                           'Does room have any of the following?': [None, None],
+                           'Any other things of note in Room (TV or Periodic Table poster)': [None, None]})
+        result = self.validate_frame(df, "classroom")
+        self.assertEqual([(error['row'], error['column']) for error in result['errors']], [(2, 'Width of Room')])
+        self.assertEqual(result['stats']['duplicateClassrooms'], 1)
         self.assertEqual(Classroom.objects.all().count(), 0)
+
+    # Ensures that the real upload of a malformed schedule is stopped before the current data is deleted
+    def test_invalid_upload_keeps_data(self):
+        Course.objects.create(section_id=1, course_num="123", section_num="A", term="2024SP",
+                              start_date=datetime.date(2024, 4, 4), end_date=datetime.date(2024, 4, 5),
+                              name="Advanced Software Engineering", subject="CS", status="A", day="MWF",
+                              instruction_method="LEC")
+        df = self.create_schedule_frame()
+        df.loc[1, 'CSM_END_TIME'] = '25:00PM'
+        df.to_csv('schedule.csv', index=False)
+        with open('schedule.csv', 'rb') as file:
+            success, missing_columns, summary = upload_schedule_data(file)
+        os.remove('schedule.csv')
+        self.assertFalse(success)
+        self.assertEqual(summary['errorCount'], 1)
+        self.assertEqual(list(Course.objects.values_list('name', flat=True)), ["Advanced Software Engineering"])
+
+
+    # Ensures that the schedule spreadsheet bundled with the project is accepted, including the sections that have no
+    # instruction method
+    def test_bundled_schedule_accepted(self):
+        file_path = settings.BASE_DIR / 'course_schedule_data.xlsx'
+        with open(file_path, 'rb') as file:
+            result = validate_upload(file, "schedule")
+        self.assertTrue(result['success'])
+        self.assertEqual(result['errors'], [])
+        with open(file_path, 'rb') as file:
+            success, missing_columns, summary = upload_schedule_data(file)
+        self.assertTrue(success)
+        self.assertEqual(Course.objects.all().count(), result['stats']['rows'])
+        self.assertTrue(Course.objects.filter(instruction_method="").exists())
+
+class UploadScheduleBatch(TestCase):
+    # Cached results from earlier tests must not leak into these tests
+    def setUp(self):
+        cache.clear()
+
+    # Removes any spreadsheets written by the tests
+    def tearDown(self):
+        for file_name in ['spring.csv', 'fall.csv', 'terms.xlsx']:
+            if os.path.exists(file_name):
+                os.remove(file_name)
+
+    # Writes a schedule CSV file holding the courses of the validation tests for the given term
+    @classmethod
+    def create_term_csv(cls, file_name, term):
+        df = ValidateUpload.create_schedule_frame()
+        df['SEC_TERM'] = term
+        df.to_csv(file_name, index=False)
+        return df
+
+    # Ensures that a batch of schedule files is uploaded with every course, instructor, and classroom created
+    def test_upload_batch(self):
+        self.create_term_csv('spring.csv', '2024SP')
+        self.create_term_csv('fall.csv', '2024FA')
+        success, missing_columns, summary = services.upload_schedule_batch([('spring.csv', 'spring.csv'),
+                                                                            ('fall.csv', 'fall.csv')])
+        self.assertTrue(success)
+        self.assertEqual(summary['created'], 4)
+        self.assertEqual(sorted(summary['terms']), ['2024FA', '2024SP'])
+        self.assertEqual([sheet['rows'] for sheet in summary['sheets']], [2, 2])
+        self.assertEqual(Course.objects.filter(term='2024FA').count(), 2)
+        self.assertEqual(Instructor.objects.count(), 2)
+        self.assertEqual(list(Classroom.objects.values_list('name', flat=True)), ['SIMP-407'])
+        course = Course.objects.get(term='2024SP', section_id=20185)
+        self.assertEqual(course.start_time, datetime.time(9, 0))
+        self.assertEqual(course.end_date, datetime.date(2024, 3, 10))
+        self.assertEqual(course.day, 'T')
+        self.assertEqual(course.classroom.name, 'SIMP-407')
+        self.assertEqual(course.instructor.name, 'M. Lewis')
+        online_course = Course.objects.get(term='2024SP', section_id=20186)
+        self.assertIsNone(online_course.classroom)
+        self.assertIsNone(online_course.start_time)
+
+    # Ensures that a small batch is read within the calling thread, without starting the worker processes
+    def test_upload_batch_in_process(self):
+        self.create_term_csv('spring.csv', '2024SP')
+        self.create_term_csv('fall.csv', '2024FA')
+        with mock.patch.object(services, "get_batch_executor") as get_batch_executor:
+            success, missing_columns, summary = services.upload_schedule_batch([('spring.csv', 'spring.csv'),
+                                                                                ('fall.csv', 'fall.csv')])
+        self.assertTrue(success)
+        self.assertEqual(summary['created'], 4)
+        get_batch_executor.assert_not_called()
+
+    # Ensures that larger batches are read by worker processes, sharing a single pool between batches
+    @override_settings(UPLOAD_BATCH_IN_PROCESS_SIZE=0)
+    def test_upload_batch_worker_processes(self):
+        self.create_term_csv('spring.csv', '2024SP')
+        self.create_term_csv('fall.csv', '2024FA')
+        executors = []
+        with mock.patch.object(services, "_batch_executor", None):
+            for _ in range(2):
+                success, missing_columns, summary = services.upload_schedule_batch([('spring.csv', 'spring.csv'),
+                                                                                    ('fall.csv', 'fall.csv')])
+                self.assertTrue(success)
+                self.assertEqual(summary['created'], 4)
+                executors.append(services._batch_executor)
+        executors[0].shutdown()
+        self.assertIsNotNone(executors[0])
+        self.assertIs(executors[0], executors[1])
+
+    # Ensures that every sheet of an uploaded workbook is read, and that the uploaded terms replace their current data
+    def test_upload_batch_workbook(self):
+        Course.objects.create(section_id=1, course_num="123", section_num="A", term="2024SP",
+                              start_date=datetime.date(2024, 4, 4), end_date=datetime.date(2024, 4, 5),
+                              name="Advanced Software Engineering", subject="CS", status="A", day="MWF",
+                              instruction_method="LEC")
+        with pd.ExcelWriter('terms.xlsx') as writer:
+            for term in ['2024SP', '2024FA']:
+                df = ValidateUpload.create_schedule_frame()
+                df['SEC_TERM'] = term
+                df.to_excel(writer, sheet_name=term, index=False)
+        success, missing_columns, summary = services.upload_schedule_batch([('terms.xlsx', 'terms.xlsx')])
+        self.assertTrue(success)
+        self.assertEqual([sheet['sheet'] for sheet in summary['sheets']], ['2024SP', '2024FA'])
+        self.assertEqual(Course.objects.filter(term='2024SP').count(), 2)
+        self.assertFalse(Course.objects.filter(name="Advanced Software Engineering").exists())
+        self.assertEqual(Term.objects.get(name='2024SP').generation, 1)
+
+    # Ensures that an invalid value within any file of the batch stops the whole batch from being uploaded
+    def test_upload_batch_invalid_value(self):
+        self.create_term_csv('spring.csv', '2024SP')
+        df = self.create_term_csv('fall.csv', '2024FA')
+        df.loc[1, 'CSM_END_TIME'] = '25:00PM'
+        df.to_csv('fall.csv', index=False)
+        success, missing_columns, summary = services.upload_schedule_batch([('spring.csv', 'spring.csv'),
+                                                                            ('fall.csv', 'fall.csv')])
+        self.assertFalse(success)
+        self.assertEqual(summary['errorCount'], 1)
+        self.assertEqual(summary['errors'][0]['fileName'], 'fall.csv')
+        self.assertEqual(Course.objects.count(), 0)
+
+    # Ensures that a file missing columns stops the whole batch from being uploaded
+    def test_upload_batch_missing_columns(self):
+        self.create_term_csv('spring.csv', '2024SP')
+        df = self.create_term_csv('fall.csv', '2024FA')
+        df.drop(columns=['SEC_CAPACITY']).to_csv('fall.csv', index=False)
+        success, missing_columns, summary = services.upload_schedule_batch([('spring.csv', 'spring.csv'),
+                                                                            ('fall.csv', 'fall.csv')])
+        self.assertFalse(success)
+        self.assertEqual(missing_columns, ['SEC_CAPACITY'])
+        self.assertEqual(Course.objects.count(), 0)
+
+    # Ensures that a batch holding a file that isn't a spreadsheet is rejected before any file is read
+    def test_upload_batch_invalid_file_type(self):
+        success, missing_columns, summary = services.upload_schedule_batch([('notes.txt', 'notes.txt')])
+        self.assertFalse(success)
+        self.assertEqual(summary, {})
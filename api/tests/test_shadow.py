@@ -0,0 +1,92 @@
+import datetime
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from api import legacy_engine, services, shadow
+from api.models import Classroom, Course, Instructor, Term
+
+"""
+Contains unit tests for the shadow comparisons of the legacy engine and the services in shadow.py.
+
+Author: Ryan Johnson
+"""
+
+
+class Shadow(TestCase):
+    # Every test starts with a small schedule, no cached results, and no recorded comparisons. Thursday courses are
+    # avoided, as SQLite matches days without regard to case.
+    def setUp(self):
+        cache.clear()
+        shadow.shadow_log.reset()
+        Term.objects.create(name="2024SP", is_active=True)
+        instructor = Instructor.objects.create(name="Nathan Williams")
+        simp = Classroom.objects.create(name="SIMP-120", building="SIMP", room_num="120", occupancy=30)
+        cchs = Classroom.objects.create(name="CCHS-205", building="CCHS", room_num="205", occupancy=24)
+        courses = [("CS 120", "MWF", simp, instructor, "08:00", "08:50"),
+                   ("CS 364", "MWF", simp, None, "08:30", "09:50"),
+                   ("MA 141", "MW", cchs, instructor, "09:00", "10:15"),
+                   ("EN 101", "F", cchs, None, "13:00", "13:50")]
+        for section_id, (name, day, classroom, course_instructor, start_time, end_time) in enumerate(courses):
+            Course.objects.create(section_id=section_id, course_num="100", section_num="A", term="2024SP",
+                                  start_date=datetime.date(2024, 1, 17), end_date=datetime.date(2024, 5, 10),
+                                  name=name, subject=name[:2], status="A", day=day, classroom=classroom,
+                                  instructor=course_instructor, instruction_method="LEC", start_time=start_time,
+                                  end_time=end_time, enrolled=20)
+
+    def tearDown(self):
+        shadow.shadow_log.reset()
+        shadow._pending = 0
+
+    # Ensures that the services agree with the legacy engine on every shadowed calculation
+    def test_engines_agree(self):
+        comparisons = [("calculate_number_classes", legacy_engine.count_block_classrooms,
+                        services.count_block_classrooms, (["SIMP", "CCHS"], "2024SP")),
+                       ("get_used_classrooms", legacy_engine.find_used_classrooms, services.find_used_classrooms,
+                        ("M", "09:00", "09:50", "all", "2024SP")),
+                       ("get_classroom_courses", legacy_engine.find_classroom_courses, services.find_classroom_courses,
+                        ("SIMP-120", "2024SP"))]
+        for function_name, legacy_function, shadow_function, arguments in comparisons:
+            self.assertEqual(shadow.compare(function_name, legacy_function(*arguments), 0.01, shadow_function,
+                                            arguments), [])
+        snapshot = shadow.shadow_log.snapshot()
+        self.assertEqual(snapshot["get_used_classrooms"]["comparisons"], 1)
+        self.assertEqual(snapshot["get_used_classrooms"]["servedSeconds"], 0.01)
+        self.assertEqual(sum(totals["divergences"] for totals in snapshot.values()), 0)
+
+    # Ensures that a divergence between the engines is logged with the paths at which the results differ
+    def test_divergence_logged(self):
+        arguments = ("M", "08:30", "08:50", "all", "2024SP")
+        served = legacy_engine.find_used_classrooms(*arguments)
+        served["SIMP-120"][0][3] = 99
+        with self.assertLogs("shadow", level="WARNING") as logs:
+            differences = shadow.compare("get_used_classrooms", served, 0.0, services.find_used_classrooms, arguments)
+        self.assertEqual(differences, ["result['SIMP-120'][0][3]: 99 served, 20 shadow"])
+        self.assertIn("diverged from the served result in 1 places", logs.output[0])
+        self.assertEqual(shadow.shadow_log.snapshot()["get_used_classrooms"]["divergences"], 1)
+
+    # Ensures that users are served the result of the legacy engine, with the services only run in the shadow
+    def test_legacy_result_served(self):
+        legacy_result = [{"M": [["08:00:00", "09:00:00"]]}, {"M": {"08:00:00-09:00:00": 7}}]
+        with mock.patch.object(services.legacy_engine, "count_block_classrooms", return_value=legacy_result), \
+                mock.patch.object(services, "count_block_classrooms") as shadow_function:
+            self.assertEqual(services.calculate_number_classes(), legacy_result)
+        shadow_function.assert_not_called()
+
+    # Ensures that only sampled requests are compared against a copy of the result that was served
+    def test_sampling(self):
+        with mock.patch.object(shadow, "_executor") as executor:
+            with override_settings(SHADOW_SAMPLE_RATE=0):
+                first = services.get_classroom_courses("SIMP-120")
+            executor.submit.assert_not_called()
+            with override_settings(SHADOW_SAMPLE_RATE=1):
+                second = services.get_classroom_courses("SIMP-120")
+            executor.submit.assert_called_once()
+            function, function_name, served, served_seconds, shadow_function, arguments = executor.submit.call_args[0]
+        self.assertEqual((function, function_name, shadow_function, arguments),
+                         (shadow._compare_in_worker, "get_classroom_courses", services.find_classroom_courses,
+                          ("SIMP-120", "2024SP")))
+        self.assertEqual(served, second)
+        self.assertIsNot(served, second)
+        self.assertEqual(first, second)
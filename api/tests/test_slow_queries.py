@@ -0,0 +1,65 @@
+import datetime
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from api import slow_queries
+from api.models import Classroom, Course, Term
+
+"""
+Contains unit tests for the slow query recorder in slow_queries.py.
+
+Author: Ryan Johnson
+"""
+
+
+class SlowQueries(TestCase):
+    # Every test starts without any recorded slow queries or cached results
+    def setUp(self):
+        cache.clear()
+        slow_queries.slow_query_log.reset()
+
+    def tearDown(self):
+        slow_queries.slow_query_log.reset()
+
+    # Ensures that queries differing only by their values share a fingerprint
+    def test_fingerprint(self):
+        first = slow_queries.fingerprint("SELECT * FROM api_course WHERE id IN (%s, %s, %s) AND name = 'CS 120'")
+        second = slow_queries.fingerprint("SELECT *  FROM api_course\nWHERE id IN (%s) AND name = 'MA 141' LIMIT 21")
+        self.assertEqual(first, "SELECT * FROM api_course WHERE id IN (...) AND name = ?")
+        self.assertEqual(second, first + " LIMIT ?")
+
+    # Ensures that queries slower than the threshold are recorded with the service and request that made them
+    @override_settings(SLOW_QUERY_THRESHOLD=0)
+    def test_slow_query_recorded(self):
+        Term.objects.create(name="2024SP", is_active=True)
+        classroom = Classroom.objects.create(name="SIMP-120", building="SIMP", room_num="120")
+        Course.objects.create(section_id=1, course_num="120", section_num="A", term="2024SP",
+                              start_date=datetime.date(2024, 1, 17), end_date=datetime.date(2024, 5, 10),
+                              name="Software Engineering", subject="CS", status="A", day="MWF", classroom=classroom,
+                              instruction_method="LEC", start_time="08:00", end_time="08:50")
+        with self.assertLogs("slow_queries", level="WARNING") as logs:
+            self.client.get(reverse("get_classroom_data"), {"classroom": "SIMP-120"})
+        summary = slow_queries.slow_query_log.summary()
+        self.assertTrue(summary)
+        self.assertTrue(all(query["paths"] == ["/api/get_classroom_data/"] for query in summary))
+        callers = {caller for query in summary for caller in query["callers"]}
+        self.assertIn("legacy_engine.find_classroom_courses", callers)
+        self.assertIn("in legacy_engine.find_classroom_courses for /api/get_classroom_data/", "\n".join(logs.output))
+
+    # Ensures that repeated queries are added to the totals of their fingerprint
+    @override_settings(SLOW_QUERY_THRESHOLD=0)
+    def test_fingerprint_totals(self):
+        with self.assertLogs("slow_queries", level="WARNING"):
+            self.client.get(reverse("get_terms"))
+            self.client.get(reverse("get_terms"))
+        summary = slow_queries.slow_query_log.summary()
+        self.assertTrue(all(query["count"] % 2 == 0 for query in summary))
+        self.assertEqual(summary, sorted(summary, key=lambda query: query["totalSeconds"], reverse=True))
+
+    # Ensures that queries faster than the threshold aren't recorded
+    @override_settings(SLOW_QUERY_THRESHOLD=60)
+    def test_fast_query_ignored(self):
+        self.client.get(reverse("get_terms"))
+        self.assertEqual(slow_queries.slow_query_log.summary(), [])
@@ -0,0 +1,81 @@
+import datetime
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from api import services, streaming
+from api.models import Classroom, Course, Instructor, Term
+
+"""
+Contains unit tests for the streamed JSON responses written by streaming.py.
+
+Author: Ryan Johnson
+"""
+
+
+class Streaming(TestCase):
+    # Every test starts with courses in several classrooms, one of which holds two courses at once
+    def setUp(self):
+        cache.clear()
+        Term.objects.create(name="2024SP", is_active=True)
+        instructor = Instructor.objects.create(name="Nathan Williams")
+        courses = [("SIMP-120", "CS 120", "08:00", "08:50"), ("SIMP-120", "CS 121", "08:00", "09:50"),
+                   ("CCHS-205", "MA 141", "08:00", "09:15"), ("STCH-101", "EN 101", "09:00", "09:50"),
+                   ("OFCP-1", "BI 102", "08:00", "08:50")]
+        for section_id, (classroom_name, name, start_time, end_time) in enumerate(courses):
+            classroom, _ = Classroom.objects.get_or_create(name=classroom_name, building=classroom_name[:4],
+                                                           room_num=classroom_name[5:], occupancy=30)
+            Course.objects.create(section_id=section_id, course_num="100", section_num="A", term="2024SP",
+                                  start_date=datetime.date(2024, 1, 17), end_date=datetime.date(2024, 5, 10),
+                                  name=name, subject=name[:2], status="A", day="MWF", classroom=classroom,
+                                  instructor=instructor if section_id % 2 == 0 else None, instruction_method="LEC",
+                                  start_time=start_time, end_time=end_time, enrolled=20)
+
+    # Ensures that the members of an object are written in chunks forming the same JSON as encoding it at once
+    def test_stream_json_object(self):
+        members = {"SIMP-120": [["CS 120", None, 30.0, 20]], "Café": [], "STCH-101": [["EN 101", "Nathan", 30.0, 1]]}
+        with mock.patch.object(streaming, "CHUNK_SIZE", 10):
+            chunks = list(streaming.stream_json_object(members.items(), '{"data":', "}"))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(json.loads("".join(chunks)), {"data": members})
+        self.assertEqual("".join(streaming.stream_json_object([])), "{}")
+
+    # Ensures that streamed used classrooms match the unstreamed response, whether or not the result is cached
+    def test_stream_used_classrooms(self):
+        params = {"day": "M", "startTime": "08:00", "endTime": "08:50", "buildings": ""}
+        streamed = self.client.get(reverse("get_used_classrooms"), {**params, "stream": "true"})
+        self.assertTrue(streamed.streaming)
+        uncached = b"".join(streamed.streaming_content)
+        expected = self.client.get(reverse("get_used_classrooms"), params).content
+        cached = b"".join(self.client.get(reverse("get_used_classrooms"),
+                                          {**params, "stream": "true"}).streaming_content)
+        self.assertEqual(uncached, expected)
+        self.assertEqual(cached, expected)
+        self.assertEqual(list(json.loads(expected)), ["CCHS-205", "SIMP-120"])
+
+    # Ensures that every classroom is streamed once, even when classrooms sharing a name aren't next to each other by
+    # building and room number
+    def test_stream_shared_classroom_name(self):
+        duplicate = Classroom.objects.create(name="CCHS-205", building="STCH", room_num="300", occupancy=30)
+        Course.objects.create(section_id=10, course_num="100", section_num="B", term="2024SP",
+                              start_date=datetime.date(2024, 1, 17), end_date=datetime.date(2024, 5, 10),
+                              name="MA 142", subject="MA", status="A", day="MWF", classroom=duplicate,
+                              instruction_method="LEC", start_time="08:00", end_time="08:50", enrolled=20)
+        params = {"day": "M", "startTime": "08:00", "endTime": "08:50", "buildings": "", "stream": "true"}
+        streamed = b"".join(self.client.get(reverse("get_used_classrooms"), params).streaming_content)
+        keys = [key for key, _ in json.loads(streamed, object_pairs_hook=lambda pairs: pairs)]
+        self.assertEqual(keys, ["CCHS-205", "SIMP-120"])
+        self.assertEqual(len(json.loads(streamed)["CCHS-205"]), 2)
+
+    # Ensures that the export holds the same schedule as get_classroom_courses() for every classroom with courses
+    def test_export_classroom_schedules(self):
+        response = self.client.get(reverse("export_classroom_schedules"))
+        self.assertIn('filename="classroom-schedules-2024SP.json"', response["Content-Disposition"])
+        export = json.loads(b"".join(response.streaming_content))
+        self.assertEqual([export["term"], export["generation"]], ["2024SP", 0])
+        self.assertEqual(list(export["classrooms"]), ["CCHS-205", "OFCP-1", "SIMP-120", "STCH-101"])
+        for classroom, schedule in export["classrooms"].items():
+            self.assertEqual(schedule, services.get_classroom_courses(classroom))
@@ -0,0 +1,58 @@
+import random
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from api import services, synthetic
+from api.models import Classroom, Course, Instructor, Term
+
+"""
+Contains unit tests for the synthetic campus generator in synthetic.py.
+
+Author: Ryan Johnson
+"""
+
+
+class GenerateCampus(TestCase):
+    # Cached results from earlier tests must not leak into these tests
+    def setUp(self):
+        cache.clear()
+
+    # Ensures that campuses larger than the real campus receive numbered buildings
+    def test_campus_buildings(self):
+        self.assertEqual(synthetic.campus_buildings(2), ["CENG", "CHPL"])
+        buildings = synthetic.campus_buildings(15)
+        self.assertEqual(len(buildings), 15)
+        self.assertEqual(buildings[-2:], ["B001", "B002"])
+        self.assertNotIn("OFCP", buildings)
+
+    # Ensures that generated schedules pass the same validation as uploaded schedules and follow the meeting patterns
+    def test_build_schedule_frame(self):
+        df = synthetic.build_schedule_frame(300, random.Random(1))
+        self.assertEqual(len(df.index), 300)
+        self.assertEqual(services.find_missing_columns(df, services.SCHEDULE_NECESSARY_COLUMNS), [])
+        self.assertEqual(services.find_schedule_errors(df), [])
+        days = set(df.apply(services.calculate_day_string, axis=1))
+        self.assertTrue(days <= {"MWF", "Tth", "M", "T", "W", "th"})
+        self.assertIn("MWF", days)
+        self.assertIn("Tth", days)
+
+    # Ensures that generating a campus replaces the data within the database with a campus of the requested size
+    def test_generate_campus(self):
+        Classroom.objects.create(name="SIMP-999", building="SIMP", room_num="999")
+        campus = synthetic.generate_campus(200, 3, 4, instructors=10, terms=["2024SP", "2024FA"], seed=2)
+        self.assertEqual(campus["buildings"], 3)
+        self.assertEqual(campus["courses"], 400)
+        self.assertEqual(Course.objects.filter(term="2024FA").count(), 200)
+        self.assertFalse(Classroom.objects.filter(name="SIMP-999").exists())
+        self.assertLessEqual(Instructor.objects.count(), 10)
+        self.assertEqual(Classroom.objects.exclude(building="OFCP").count(), 12)
+        self.assertTrue(Term.objects.get(name="2024SP").is_active)
+
+    # Ensures that campuses generated with the same seed are identical
+    def test_generate_campus_seed(self):
+        synthetic.generate_campus(50, 2, 3, seed=5)
+        first = list(Course.objects.order_by("section_id").values_list("day", "start_time", "classroom__name"))
+        synthetic.generate_campus(50, 2, 3, seed=5)
+        second = list(Course.objects.order_by("section_id").values_list("day", "start_time", "classroom__name"))
+        self.assertEqual(first, second)
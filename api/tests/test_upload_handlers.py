@@ -0,0 +1,89 @@
+import hashlib
+import os
+import tempfile
+
+import pandas as pd
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from api import services
+from api.models import UploadJob
+from api.upload_handlers import MappedFile
+
+"""
+Contains unit tests for the upload handler and memory-mapped file in upload_handlers.py.
+
+Author: Ryan Johnson
+"""
+
+
+class UploadHandlers(TestCase):
+    # Writes a CSV file holding a single valid classroom, returning its contents
+    @classmethod
+    def create_classroom_csv(cls, file_name="classrooms.csv"):
+        df = pd.DataFrame({'Building Information': ['SIMP'],
+                           'Room Number': ['120'],
+                           'Number of Student Seats in Room': ['15'],
+                           'Width of Room': ['20'],
+                           'Length of Room': ['30'],
+                           'Number of Projectors in Room': ['2'],
+                           'Notes': ['N/A'],
+                           'Does room have any of the following?': ['N/A'],
+                           'Any other things of note in Room (TV or Periodic Table poster)': ['N/A']})
+        df.to_csv(file_name, index=False)
+        with open(file_name, 'rb') as file:
+            return file.read()
+
+    def tearDown(self):
+        if os.path.exists("classrooms.csv"):
+            os.remove("classrooms.csv")
+
+    # Ensures that an uploaded file is streamed to disk and hashed as it is received
+    def test_upload_hashed(self):
+        contents = self.create_classroom_csv()
+        with open("classrooms.csv", "rb") as file:
+            response = self.client.post(reverse("upload_file"), {"dataType": "classroom", "file": file})
+        self.assertEqual(response.status_code, 202)
+        job = UploadJob.objects.get(id=response.json()["jobId"])
+        self.assertEqual(job.content_hash, hashlib.sha256(contents).hexdigest())
+        self.assertTrue(os.path.exists(job.file_path))
+        os.remove(job.file_path)
+
+    # Ensures that uploads larger than the maximum upload size are rejected without creating a job
+    @override_settings(MAX_UPLOAD_SIZE=10)
+    def test_upload_too_large(self):
+        self.create_classroom_csv()
+        with open("classrooms.csv", "rb") as file:
+            response = self.client.post(reverse("upload_file"), {"dataType": "classroom", "file": file})
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(UploadJob.objects.count(), 0)
+
+    # Ensures that the upload size is limited across every file of a batch, rather than for each file on its own
+    def test_batch_upload_too_large(self):
+        contents = self.create_classroom_csv()
+        with override_settings(MAX_UPLOAD_SIZE=len(contents) * 2 - 1):
+            with open("classrooms.csv", "rb") as file, open("classrooms.csv", "rb") as other_file:
+                response = self.client.post(reverse("upload_batch"), {"files": [file, other_file]})
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(UploadJob.objects.count(), 0)
+
+    # Ensures that an upload request without a file is rejected
+    def test_upload_missing_file(self):
+        response = self.client.post(reverse("upload_file"), {"dataType": "classroom"})
+        self.assertEqual(response.status_code, 400)
+
+    # Ensures that a spreadsheet can be parsed directly from a memory-mapped file
+    def test_read_mapped_file(self):
+        self.create_classroom_csv()
+        with MappedFile("classrooms.csv") as file:
+            df = services.read_spreadsheet(file, services.CLASSROOM_CSV_COLUMNS)
+        self.assertEqual(df['Building Information'].tolist(), ['SIMP'])
+        self.assertEqual(df['Room Number'].tolist(), ['120'])
+
+    # Ensures that an empty file can still be opened and read, despite being unable to be mapped
+    def test_read_empty_mapped_file(self):
+        descriptor, file_path = tempfile.mkstemp(suffix=".csv")
+        os.close(descriptor)
+        with MappedFile(file_path) as file:
+            self.assertEqual(file.read(), b"")
+        os.remove(file_path)
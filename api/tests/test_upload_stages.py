@@ -0,0 +1,85 @@
+import threading
+import tracemalloc
+
+from django.test import SimpleTestCase
+
+from api import upload_stages
+
+"""
+Contains unit tests for the upload stage measurements in upload_stages.py.
+
+Author: Ryan Johnson
+"""
+
+
+class UploadStages(SimpleTestCase):
+    # Ensures that a stage records its time, throughput, and the peak memory allocated while it ran
+    def test_stage_measured(self):
+        stages = upload_stages.UploadStages(trace_memory=True)
+        with stages.measure("parse", fileName="schedule.csv") as stage:
+            rows = [str(number) * 100 for number in range(1000)]
+            stage["rows"] = len(rows)
+        measured = stages.stages[0]
+        self.assertEqual(measured["stage"], "parse")
+        self.assertEqual(measured["fileName"], "schedule.csv")
+        self.assertEqual(measured["rows"], 1000)
+        self.assertGreater(measured["rowsPerSecond"], 0)
+        self.assertGreater(measured["peakMemoryBytes"], 100 * 1000)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    # Ensures that memory is traced until the last of several nested stages finishes
+    def test_nested_stages(self):
+        stages = upload_stages.UploadStages(trace_memory=True)
+        with stages.measure("write"):
+            with stages.measure("resolve"):
+                pass
+            self.assertTrue(tracemalloc.is_tracing())
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertEqual([stage["stage"] for stage in stages.stages], ["resolve", "write"])
+
+    # Ensures that the peak of an outer stage includes memory allocated within the stages nested inside it
+    def test_nested_stage_peak(self):
+        stages = upload_stages.UploadStages(trace_memory=True)
+        with stages.measure("write"):
+            with stages.measure("invalidate"):
+                rows = [str(number) * 100 for number in range(1000)]
+            del rows
+            with stages.measure("resolve"):
+                pass
+        peaks = {stage["stage"]: stage["peakMemoryBytes"] for stage in stages.stages}
+        self.assertGreater(peaks["write"], 100 * 1000)
+        self.assertGreaterEqual(peaks["write"], peaks["invalidate"])
+
+    # Ensures that a traced stage of another upload runs alongside the current stage without resetting its peak
+    def test_concurrent_stages(self):
+        stages = upload_stages.UploadStages(trace_memory=True)
+        other_stages = upload_stages.UploadStages(trace_memory=True)
+
+        def measure_other():
+            with other_stages.measure("read"):
+                pass
+
+        other_thread = threading.Thread(target=measure_other)
+        with stages.measure("parse"):
+            rows = [str(number) * 100 for number in range(1000)]
+            del rows
+            other_thread.start()
+            other_thread.join(timeout=5)
+            self.assertFalse(other_thread.is_alive())
+            self.assertTrue(tracemalloc.is_tracing())
+        self.assertEqual(len(other_stages.stages), 1)
+        self.assertGreater(stages.stages[0]["peakMemoryBytes"], 100 * 1000)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    # Ensures that stages are measured without memory when tracing is turned off
+    def test_memory_not_traced(self):
+        stages = upload_stages.UploadStages(trace_memory=False)
+        with stages.measure("read"):
+            self.assertFalse(tracemalloc.is_tracing())
+        self.assertIsNone(stages.stages[0]["peakMemoryBytes"])
+
+    # Ensures that uploads made without a stage recorder aren't measured
+    def test_no_recorder(self):
+        with upload_stages.measure_stage(None, "read") as stage:
+            stage["rows"] = 10
+        self.assertFalse(tracemalloc.is_tracing())
@@ -0,0 +1,92 @@
+import hashlib
+import io
+import logging
+import mmap
+
+from django.conf import settings
+from django.core.files.uploadhandler import StopUpload, TemporaryFileUploadHandler
+
+logger = logging.getLogger("upload_handlers")
+
+"""
+Contains the handler used for receiving uploaded spreadsheets, along with the memory-mapped file used for reading them
+back. Uploaded files are streamed straight to a temporary file on disk rather than being buffered in memory, with the
+size of the upload capped and the hash of its contents calculated as each chunk arrives.
+
+Author: Ryan Johnson
+"""
+
+
+class HashingTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """
+    Streams every uploaded file to a temporary file on disk, regardless of its size. The SHA-256 hash of the file is
+    calculated while the file is received and attached to the uploaded file as content_hash. Once the files of a
+    request add up to more than MAX_UPLOAD_SIZE, the upload is stopped, and the request is marked with
+    upload_too_large so the view can reject it.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Bytes received across every file of the request, as a batch may hold several files
+        self.received_size = 0
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.content_hash = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received_size += len(raw_data)
+        if self.received_size > settings.MAX_UPLOAD_SIZE:
+            logger.error("receive_data_chunk - Upload of %s stopped after exceeding %s bytes", self.file_name,
+                         settings.MAX_UPLOAD_SIZE)
+            self.request.upload_too_large = True
+            raise StopUpload(connection_reset=True)
+        self.content_hash.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.content_hash = self.content_hash.hexdigest()
+        return file
+
+
+class MappedFile(io.RawIOBase):
+    """
+    Read-only, memory-mapped view of a file saved on disk. Reads are served directly from the mapped pages of the file,
+    allowing pandas to parse the file without first reading it into a buffer. The name of the file is kept so that the
+    file type can still be checked.
+    """
+
+    def __init__(self, file_path: str):
+        super().__init__()
+        self.name = file_path
+        self._file = open(file_path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped, so these are read directly instead
+            self._map = self._file
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._map.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        self._map.seek(offset, whence)
+        return self._map.tell()
+
+    def tell(self):
+        return self._map.tell()
+
+    def close(self):
+        if not self.closed:
+            self._map.close()
+            self._file.close()
+        super().close()
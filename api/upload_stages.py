@@ -0,0 +1,116 @@
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+from django.conf import settings
+
+"""
+Measures each stage of an upload: reading the file, validating its values, parsing its rows, resolving the instructors
+and classrooms they refer to, writing them to the database, and invalidating the results cached for the old data. Every
+stage records its wall time, the rows it handled per second, and the peak memory allocated while it ran, so that the
+slowest or most memory-hungry stage of an upload can be found from its job.
+
+Author: Ryan Johnson
+"""
+
+# Guards the peaks below while a stage starts or stops. It is never held while a stage runs, so the stages of
+# concurrent uploads run at the same time.
+_tracing_lock = threading.Lock()
+# Peak number of bytes allocated so far by each traced stage that is still running, across every thread
+_tracing_peaks = {}
+
+
+def start_tracing() -> object:
+    """
+    Starts tracing memory allocations for a new stage. tracemalloc and its peak are shared by the whole process, so
+    before the peak is reset for the new stage, the peak reached so far is carried over to every other stage still
+    running, whether it belongs to the same upload or to another upload.
+
+    :return: token identifying the stage when tracing is stopped
+    """
+    token = object()
+    with _tracing_lock:
+        if _tracing_peaks:
+            carry_peak(tracemalloc.get_traced_memory()[1])
+        elif not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        _tracing_peaks[token] = 0
+    return token
+
+
+def stop_tracing(token: object) -> int:
+    """
+    Finishes tracing memory allocations for a stage, stopping tracing once no stage is tracing them.
+
+    :param token: token returned by start_tracing() when the stage started
+    :return:      peak number of bytes allocated while the stage ran
+    """
+    with _tracing_lock:
+        peak = max(_tracing_peaks.pop(token), tracemalloc.get_traced_memory()[1])
+        if _tracing_peaks:
+            carry_peak(peak)
+        else:
+            tracemalloc.stop()
+        return peak
+
+
+def carry_peak(peak: int):
+    """
+    Records a peak reached within every traced stage that is still running, before the peak is reset for another stage.
+
+    :param peak: number of bytes allocated at the peak
+    """
+    for token, stage_peak in _tracing_peaks.items():
+        _tracing_peaks[token] = max(stage_peak, peak)
+
+
+class UploadStages:
+    """
+    Holds the measurements of every stage of a single upload, in the order the stages ran. Memory is traced for the
+    whole process, so the peak of a stage includes anything allocated by concurrent uploads or requests handled while
+    the stage ran, making it an upper bound on a busy server.
+    """
+
+    def __init__(self, trace_memory: bool = None):
+        self.trace_memory = settings.UPLOAD_TRACE_MEMORY if trace_memory is None else trace_memory
+        self.stages = []
+
+    @contextmanager
+    def measure(self, name: str, rows: int = 0, **details):
+        """
+        Measures the enclosed stage of the upload. The number of rows handled may be changed through the yielded
+        dictionary once it is known.
+
+        :param name:    string naming the stage ('read', 'validate', 'parse', 'resolve', 'write', or 'invalidate')
+        :param rows:    number of rows handled by the stage
+        :param details: any other values stored with the stage, such as the file it read
+        """
+        stage = {"stage": name, **details, "rows": rows}
+        token = start_tracing() if self.trace_memory else None
+        start = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            seconds = time.perf_counter() - start
+            stage["seconds"] = round(seconds, 6)
+            stage["rowsPerSecond"] = round(stage["rows"] / seconds, 1) if seconds > 0 else 0.0
+            stage["peakMemoryBytes"] = stop_tracing(token) if self.trace_memory else None
+            self.stages.append(stage)
+
+
+def measure_stage(stages: UploadStages, name: str, rows: int = 0, **details):
+    """
+    Measures the enclosed stage of an upload. Uploads run without a stage recorder (such as those made directly from
+    the shell) skip the measurements entirely.
+
+    :param stages:  UploadStages recording the stages of the upload, or None
+    :param name:    string naming the stage
+    :param rows:    number of rows handled by the stage
+    :param details: any other values stored with the stage
+    :return:        context manager yielding the dictionary describing the stage
+    """
+    if stages is None:
+        return nullcontext({})
+    return stages.measure(name, rows, **details)
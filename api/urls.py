@@ -11,9 +11,17 @@ Author: Ryan Johnson
 urlpatterns = [
     path('get_number_classes/', views.get_number_classes, name="get_number_classes"),
     path('get_building_names/', views.get_building_names, name="get_building_names"),
+    path('get_bootstrap/', views.get_bootstrap, name="get_bootstrap"),
     path('get_used_classrooms/', views.get_used_classrooms, name="get_used_classrooms"),
     path('get_past_time/', views.get_past_time, name="get_past_time"),
     path('get_next_time/', views.get_next_time, name="get_next_time"),
+    path('get_block_page/', views.get_block_page, name="get_block_page"),
     path('get_classroom_data/', views.get_classroom_data, name="get_classroom_data"),
+    path('export_classroom_schedules/', views.export_classroom_schedules, name="export_classroom_schedules"),
+    path('get_terms/', views.get_terms, name="get_terms"),
+    path('set_active_term/', views.set_active_term, name="set_active_term"),
     path('upload_file/', views.upload_file, name="upload_file"),
+    path('upload_batch/', views.upload_batch, name="upload_batch"),
+    path('upload_status/<int:job_id>/', views.upload_status, name="upload_status"),
+    path('metrics/', views.get_metrics, name="metrics"),
 ]
@@ -1,10 +1,18 @@
 import logging
 
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_header_parameters
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.request import Request
 from rest_framework.response import Response
 
-from api import services
+from api import jobs, metrics, services, streaming
+from api.log_format import Truncated
 
 logger = logging.getLogger("api_views")
 
@@ -16,6 +24,23 @@ Author: Ryan Johnson
 """
 
 
+def wants_compact_layout(request) -> bool:
+    """
+    Determines whether the compact layout of the heatmap data was requested, either through the layout query parameter
+    or a layout parameter within the Accept header (such as "application/json; layout=compact"). The format query
+    parameter is left to Django REST Framework, which uses it to choose a renderer.
+
+    :param request: HTTP request object
+    :return:        True if the compact layout was requested; False otherwise
+    """
+    if request.GET.get("layout") == "compact":
+        return True
+    for media_type in request.META.get("HTTP_ACCEPT", "").split(","):
+        if parse_header_parameters(media_type)[1].get("layout") == "compact":
+            return True
+    return False
+
+
 @api_view(["GET"])
 def get_number_classes(request: Request) -> Response:
     """
@@ -23,20 +48,30 @@ def get_number_classes(request: Request) -> Response:
     Returns an HTTP request containing two dictionaries, the first of which containing the time blocks and the second
     containing the recently calculated number of classrooms used during each time block.
 
-    :param request: HTTP request object containing the list of buildings in which to search for used classrooms
+    :param request: HTTP request object containing the list of buildings in which to search for used classrooms and
+                    optionally the term to search within (the active term is used otherwise)
     :return: HTTP response object containing an array with two dictionaries: the first storing the time blocks and the
-             second storing the number of used classrooms during each time block
+             second storing the number of used classrooms during each time block. Should the compact layout be
+             requested, the response instead maps every day to the boundaries of its blocks in minutes and the number
+             of used classrooms during each block.
     """
     buildings = request.GET.getlist("buildings[]")
+    term = request.GET.get("term")
     if buildings.__len__() == 0:
         # Get data for all buildings campus-wide
-        number_classes = services.calculate_number_classes()
-        logger.debug(f"get_number_classes - Calculated class numbers for all-campus: {number_classes}")
+        number_classes = services.calculate_number_classes(term=term)
+        logger.debug("get_number_classes - Calculated class numbers for all-campus: %s", Truncated(number_classes))
     else:
         # Get data for only specified buildings
-        number_classes = services.calculate_number_classes(buildings)
-        logger.debug(f"get_building_classes - Calculated class numbers for {buildings}: {number_classes}")
-    return Response(number_classes)
+        number_classes = services.calculate_number_classes(buildings, term)
+        logger.debug("get_building_classes - Calculated class numbers for %s: %s", buildings, Truncated(number_classes))
+    if wants_compact_layout(request):
+        response = Response(services.compact_number_classes(number_classes))
+    else:
+        response = Response(number_classes)
+    # The layout may be chosen through the Accept header, so caches must keep each layout separately
+    patch_vary_headers(response, ["Accept"])
+    return response
 
 
 @api_view(["GET"])
@@ -49,32 +84,81 @@ def get_building_names(request: Request) -> Response:
     :return: HTTP response object containing a dictionary of all the buildings currently holding classes
     """
     buildings_list = services.get_all_buildings()
-    logger.debug(f"get_building_names - Buildings list: {buildings_list}")
+    logger.debug("get_building_names - Buildings list: %s", buildings_list)
     return Response(buildings_list)
 
 
+def bootstrap_etag(request) -> str:
+    """
+    Builds the entity tag of the bootstrap bundle, which changes whenever the data of the requested term changes. Bundles
+    of terms without a generation aren't given an entity tag, so they are always sent in full.
+
+    :param request: HTTP request object containing optionally the term being loaded
+    :return:        string holding the entity tag, or None if the term has no generation
+    """
+    term, generation = services.resolve_term(request.GET.get("term"))
+    if generation is None:
+        return None
+    layout = "compact" if wants_compact_layout(request) else "default"
+    return f"{term}-{generation}-{layout}"
+
+
+@cache_control(no_cache=True)
+@condition(etag_func=bootstrap_etag)
+@api_view(["GET"])
+def get_bootstrap(request: Request) -> Response:
+    """
+    Returns everything the heatmap page needs when it first loads in a single response: the buildings holding courses,
+    the number of classrooms used during each time block across the whole campus, and the term and generation of the
+    data. The response carries an entity tag tied to the generation, so browsers revalidate their copy and only receive
+    the bundle again once the data has changed.
+
+    :param request: HTTP request object containing optionally the term to load (the active term is used otherwise) and
+                    the layout of the heatmap data
+    :return: HTTP response object containing the term, generation, buildings, and heatmap data, with the heatmap data
+             in the compact layout if requested
+    """
+    bootstrap = services.get_bootstrap(request.GET.get("term"))
+    if wants_compact_layout(request):
+        bootstrap = {**bootstrap, "numberClasses": services.compact_number_classes(bootstrap["numberClasses"])}
+    logger.debug("get_bootstrap - Bootstrap for %s (generation %s): %s", bootstrap["term"], bootstrap["generation"],
+                 Truncated(bootstrap))
+    response = Response(bootstrap)
+    patch_vary_headers(response, ["Accept"])
+    return response
+
+
 @api_view(["GET"])
 def get_used_classrooms(request: Request) -> Response:
     """
     Used for listing all classrooms used during a specific time block. Returns a dictionary of all classrooms and their
     corresponding data that are used within a specified time block.
 
-    :param request: HTTP request object containing the desired day, start/end times, and buildings in which to search for used classrooms
-    :return: HTTP response object containing a dictionary of all the classrooms and their data that are used within a specified time block
+    :param request: HTTP request object containing the desired day, start/end times, buildings, and optionally the term in which to search for used classrooms
+                    and whether the response should be streamed
+    :return: HTTP response object containing a dictionary of all the classrooms and their data that are used within a specified time block.
+             Streamed responses are written one classroom at a time as the courses are read from the database.
     """
     day = request.GET.get("day")
     start_time = request.GET.get("startTime")
     end_time = request.GET.get("endTime")
     buildings = request.GET.get("buildings")
+    term = request.GET.get("term")
+    if request.GET.get("stream") == "true":
+        classrooms = services.iter_used_classrooms(day, start_time, end_time,
+                                                   "all" if buildings == "" else buildings.split(", "), term)
+        logger.debug("get_used_classrooms - Streaming used classrooms from %s to %s on %s", start_time, end_time, day)
+        return StreamingHttpResponse(streaming.stream_json_object(classrooms), content_type="application/json")
     if buildings == "":
         # Get data for all buildings campus-wide
-        used_classrooms = services.get_used_classrooms(day, start_time, end_time)
-        logger.debug(f"get_used_classrooms - Found used classrooms across all-campus: {used_classrooms}")
+        used_classrooms = services.get_used_classrooms(day, start_time, end_time, term=term)
+        logger.debug("get_used_classrooms - Found used classrooms across all-campus: %s", Truncated(used_classrooms))
     else:
         buildings_list = buildings.split(", ")
         # Get data for only specified buildings
-        used_classrooms = services.get_used_classrooms(day, start_time, end_time, buildings_list)
-        logger.debug(f"get_used_classrooms - Found used classrooms for {buildings_list}: {used_classrooms}")
+        used_classrooms = services.get_used_classrooms(day, start_time, end_time, buildings_list, term)
+        logger.debug("get_used_classrooms - Found used classrooms for %s: %s", buildings_list,
+                     Truncated(used_classrooms))
 
     return Response(used_classrooms)
 
@@ -85,39 +169,125 @@ def get_classroom_data(request: Request) -> Response:
     Used for displaying the weekly schedule for a single classroom. Returns a list containing two dictionaries, the
     first storing time blocks and the second the courses running during those time blocks.
 
-    :param request: HTTP request object containing the classroom name to find data for
+    :param request: HTTP request object containing the classroom name to find data for and optionally the term
     :return: HTTP response object containing a list of time blocks and courses running during those time blocks for a single classroom
     """
     classroom_name = request.GET.get("classroom")
-    courses = services.get_classroom_courses(classroom_name)
-    logger.debug(f"get_classroom_data - Found courses held in {classroom_name}: {courses}")
+    term = request.GET.get("term")
+    courses = services.get_classroom_courses(classroom_name, term)
+    logger.debug("get_classroom_data - Found courses held in %s: %s", classroom_name, Truncated(courses))
     return Response(courses)
 
 
+@api_view(["GET"])
+def export_classroom_schedules(request: Request) -> StreamingHttpResponse:
+    """
+    Exports the weekly schedule of every classroom holding courses as a JSON file. The export is streamed one classroom
+    at a time as the courses are read from the database, so the schedules of the whole campus are never held in memory
+    at once.
+
+    :param request: HTTP request object containing optionally the term to export (the active term is used otherwise)
+    :return: HTTP response object streaming the term, the generation of its data, and a dictionary mapping the name of
+             every classroom to its time blocks and the courses running during those time blocks
+    """
+    term, generation = services.resolve_term(request.GET.get("term"))
+    prefix = f'{{"term":{streaming.dumps(term)},"generation":{streaming.dumps(generation)},"classrooms":'
+    schedules = streaming.stream_json_object(services.iter_classroom_schedules(term), prefix, "}")
+    response = StreamingHttpResponse(schedules, content_type="application/json")
+    response["Content-Disposition"] = f'attachment; filename="classroom-schedules-{term or "all-terms"}.json"'
+    logger.debug("export_classroom_schedules - Exporting the classroom schedules of %s", term)
+    return response
+
+
 @api_view(["POST"])
 def upload_file(request: Request) -> Response:
     """
-    Creates model objects using the data from a file and moves them into the database.
-
-    :param request: HTTP request object containing the data file and the type of file being uploaded
-    :return: HTTP response object containing a boolean specifying whether the upload was successful and a list of any
-             missing columns in the .csv file. If the upload is successful, the missing columns is a NoneType.
+    Saves the uploaded data file and queues a background job for moving its data into the database. The upload's
+    progress can be followed using the upload_status endpoint with the returned job ID. If the file is identical to the
+    file the current data was uploaded from, the ID of the job that uploaded the current data is returned instead.
+    Should a dry run be requested, the file is only validated, with nothing being written to the database.
+
+    :param request: HTTP request object containing the data file, the type of file being uploaded, and optionally
+                    whether the upload is a dry run
+    :return: HTTP response object containing the ID of the job importing the file, its current phase, and whether the
+             file was identical to the current data. For dry runs, the response instead contains whether the file is
+             valid, any missing columns, the row-level errors found, and summary statistics for the file. Files larger than
+             MAX_UPLOAD_SIZE are rejected with a 413 response.
     """
+    file = request.FILES.get('file')
+    if getattr(request, 'upload_too_large', False):
+        logger.error("upload_file - Upload rejected for exceeding %s bytes", settings.MAX_UPLOAD_SIZE)
+        return Response({"success": False, "missingColumns": []}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    if file is None:
+        logger.error("upload_file - Upload request did not contain a file")
+        return Response({"success": False, "missingColumns": []}, status=status.HTTP_400_BAD_REQUEST)
+
     data_type = request.POST['dataType']
-    file = request.FILES['file']
+    dry_run = request.POST.get('dryRun', 'false').lower() == 'true'
 
-    if data_type == "schedule":
-        # Handles schedule data .csv file uploads
-        success_message = services.upload_schedule_data(file)
-    else:
-        # Handles classroom data .csv file uploads
-        success_message = services.upload_classroom_data(file)
+    if data_type not in ["schedule", "classroom"]:
+        logger.error("upload_file - Attempt to upload unknown data type: %s", data_type)
+        return Response({"success": False, "missingColumns": []}, status=status.HTTP_400_BAD_REQUEST)
+
+    if dry_run:
+        validation = services.validate_upload(file, data_type)
+        logger.debug("upload_file - Dry Run: %s, Valid: %s, Errors: %s", file.name, validation['success'],
+                     validation['errorCount'])
+        return Response(validation)
+
+    job, created = jobs.submit_upload(data_type, file)
+
+    logger.debug("upload_file - Upload Job: %s, Data Type: %s, File Name: %s", job.id if job else None, data_type,
+                 file.name)
+    if not created:
+        # The job that loaded the identical data may have since been removed, though the data itself is unchanged
+        return Response({"jobId": job.id if job else None, "phase": "complete", "unchanged": True})
+    return Response({"jobId": job.id, "phase": job.phase, "unchanged": False}, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(["POST"])
+def upload_batch(request: Request) -> Response:
+    """
+    Saves several uploaded schedule files and queues a single background job for importing all of them together. Every
+    sheet of each file is read and validated in parallel, and the courses from every sheet are then written to the
+    database at once. The upload's progress can be followed using the upload_status endpoint with the returned job ID.
+
+    :param request: HTTP request object containing the schedule files
+    :return: HTTP response object containing the ID of the job importing the files, its current phase, and whether the
+             files were identical to the ones the current data was uploaded from
+    """
+    files = request.FILES.getlist('files')
+    if getattr(request, 'upload_too_large', False):
+        logger.error("upload_batch - Upload rejected for exceeding %s bytes", settings.MAX_UPLOAD_SIZE)
+        return Response({"success": False, "missingColumns": []}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    if len(files) == 0:
+        logger.error("upload_batch - Batch upload request did not contain any files")
+        return Response({"success": False, "missingColumns": []}, status=status.HTTP_400_BAD_REQUEST)
 
-    success = success_message[0]
-    missing_columns = success_message[1]
+    job, created = jobs.submit_batch_upload(files)
 
-    logger.debug(f"upload_file - Upload Status: {success}, Missing Columns: {missing_columns}, File Name: {file.name}")
-    return Response({"success": success, "missingColumns": missing_columns})
+    logger.debug("upload_batch - Upload Job: %s, File Names: %s", job.id if job else None,
+                 [file.name for file in files])
+    if not created:
+        # The job that loaded the identical data may have since been removed, though the data itself is unchanged
+        return Response({"jobId": job.id if job else None, "phase": "complete", "unchanged": True})
+    return Response({"jobId": job.id, "phase": job.phase, "unchanged": False}, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(["GET"])
+def upload_status(request: Request, job_id: int) -> Response:
+    """
+    Reports the progress of a background upload job. Used by the upload page to poll the job until it completes.
+
+    :param request: HTTP request object
+    :param job_id:  ID of the upload job being checked
+    :return: HTTP response object containing the phase, rows processed, throughput, and outcome of the upload
+    """
+    job_status = jobs.get_job_status(job_id)
+    if job_status is None:
+        return Response({"jobId": job_id}, status=status.HTTP_404_NOT_FOUND)
+    logger.debug("upload_status - Status of upload job %s: %s", job_id, Truncated(job_status))
+    return Response(job_status)
 
 
 @api_view(["GET"])
@@ -126,21 +296,22 @@ def get_next_time(request: Request) -> Response:
     Given the start time of a time block, finds the corresponding end time for the block. Used for paging when viewing
     the used classrooms for a specific time block, displaying the next time block.
 
-    :param request: HTTP request object containing the day, start time, and building list for the desired block
+    :param request: HTTP request object containing the day, start time, building list, and optionally the term for the desired block
     :return: HTTP response object containing the end time for the specified time block
     """
     day = request.GET.get("day")
     start_time = request.GET.get("currentEndTime")
     buildings = request.GET.get("buildings")
+    term = request.GET.get("term")
     buildings_list = buildings.split(", ")
     if buildings.__len__() == 0:
-        next_end_time = services.get_next_time(day, start_time)
-        logger.debug(
-            f"get_next_time - End time for block starting at {start_time} on {day} (in all buildings): {next_end_time}")
+        next_end_time = services.get_next_time(day, start_time, term=term)
+        logger.debug("get_next_time - End time for block starting at %s on %s (in all buildings): %s", start_time, day,
+                     next_end_time)
     else:
-        next_end_time = services.get_next_time(day, start_time, buildings_list)
-        logger.debug(
-            f"get_next_time - End time for block starting at {start_time} on {day} (in {buildings_list}): {next_end_time}")
+        next_end_time = services.get_next_time(day, start_time, buildings_list, term)
+        logger.debug("get_next_time - End time for block starting at %s on %s (in %s): %s", start_time, day,
+                     buildings_list, next_end_time)
 
     return Response(next_end_time)
 
@@ -151,20 +322,99 @@ def get_past_time(request: Request) -> Response:
     Given the end time of a time block, finds the corresponding start time for the block. Used for paging when viewing
     the used classrooms for a specific time block, displaying the previous time block.
 
-    :param request: HTTP request object containing the day, end time, and building list for the desired block
+    :param request: HTTP request object containing the day, end time, building list, and optionally the term for the desired block
     :return: HTTP response object containing the start time for the specified time block
     """
     day = request.GET.get("day")
     end_time = request.GET.get("currentStartTime")
     buildings = request.GET.get("buildings")
+    term = request.GET.get("term")
     buildings_list = buildings.split(", ")
     if buildings.__len__() == 0:
-        past_start_time = services.get_past_time(day, end_time)
-        logger.debug(f"get_past_time - Start time for block ending at {end_time} on {day} (in all buildings): "
-                     f"{past_start_time}")
+        past_start_time = services.get_past_time(day, end_time, term=term)
+        logger.debug("get_past_time - Start time for block ending at %s on %s (in all buildings): %s", end_time, day,
+                     past_start_time)
     else:
-        past_start_time = services.get_past_time(day, end_time, buildings_list)
-        logger.debug(f"get_past_time - Start time for next block ending at {end_time} on {day} "
-                     f"(in {buildings_list}): {past_start_time}")
+        past_start_time = services.get_past_time(day, end_time, buildings_list, term)
+        logger.debug("get_past_time - Start time for next block ending at %s on %s (in %s): %s", end_time, day,
+                     buildings_list, past_start_time)
 
     return Response(past_start_time)
+
+
+@api_view(["GET"])
+def get_block_page(request: Request) -> Response:
+    """
+    Pages from the current time block to the next or previous block, returning the block along with the classrooms used
+    during it and the neighbouring blocks on either side. Replaces the separate requests to get_next_time or
+    get_past_time and then get_used_classrooms made for every page.
+
+    :param request: HTTP request object containing the day, a time, the direction to page in ('next' finds the block
+                    starting at the time, 'previous' the block ending at it), the building list, and optionally the
+                    term
+    :return: HTTP response object containing the start and end time of the block, the classrooms used during it, and the
+             neighbouring blocks. The response is empty if no such block is found.
+    """
+    day = request.GET.get("day")
+    current_time = request.GET.get("time", "")
+    direction = request.GET.get("direction")
+    buildings = request.GET.get("buildings", "")
+    term = request.GET.get("term")
+    if direction not in ["next", "previous"]:
+        logger.error("get_block_page - Unknown paging direction: %s", direction)
+        return Response({}, status=status.HTTP_400_BAD_REQUEST)
+    if buildings == "":
+        block_page = services.get_block_page(day, current_time, direction, term=term)
+    else:
+        block_page = services.get_block_page(day, current_time, direction, buildings.split(", "), term)
+    logger.debug("get_block_page - Paged to the %s block from %s on %s (in %s): %s", direction, current_time, day,
+                 buildings or "all buildings", Truncated(block_page))
+    return Response(block_page)
+
+
+@api_view(["GET"])
+def get_terms(request: Request) -> Response:
+    """
+    Returns a list of every term whose course schedule has been uploaded, marking which of these is the active term.
+
+    :param request: HTTP request object
+    :return: HTTP response object containing a list of the uploaded terms
+    """
+    terms = services.get_terms()
+    logger.debug("get_terms - Terms: %s", Truncated(terms))
+    return Response(terms)
+
+
+@api_view(["POST"])
+def set_active_term(request: Request) -> Response:
+    """
+    Sets the term whose data is shown whenever no term is specified.
+
+    :param request: HTTP request object containing the name of the term to activate
+    :return: HTTP response object containing a boolean specifying whether the term was activated
+    """
+    term = request.POST.get("term")
+    success = services.set_active_term(term)
+    logger.debug("set_active_term - Term: %s, Success: %s", term, success)
+    if not success:
+        return Response({"success": False}, status=status.HTTP_404_NOT_FOUND)
+    return Response({"success": True})
+
+
+def get_metrics(request) -> HttpResponse:
+    """
+    Exposes the performance metrics recorded for every API view, the totals of every slow query, and the shadow
+    comparisons of every shadowed function, merged across every server process, in the Prometheus text format. Only
+    requests made directly to the server from the same machine are answered, so requests forwarded by the web server
+    are refused.
+
+    :param request: HTTP request object
+    :return: HTTP response object containing the metrics in the Prometheus text format
+    """
+    forwarded = "HTTP_X_FORWARDED_FOR" in request.META or "HTTP_X_REAL_IP" in request.META
+    if forwarded or request.META.get("REMOTE_ADDR", "") not in ["127.0.0.1", "::1"]:
+        logger.error("get_metrics - Metrics requested from outside the server: %s", request.META.get("REMOTE_ADDR"))
+        return HttpResponseForbidden()
+    collected = metrics.registry.collect()
+    return HttpResponse(metrics.render_prometheus(collected["views"], collected["slowQueries"], collected["shadow"]),
+                        content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -45,10 +45,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.SlowQueryMiddleware',
+    'api.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -90,6 +94,17 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Cached results are keyed by term and by the generation of the term's data, so uploads never need to clear the cache
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'TIMEOUT': 60 * 60,
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -133,6 +148,63 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# The tests write the metrics they record to a temporary directory instead of METRICS_DIRECTORY
+TEST_RUNNER = 'api.tests.runner.MetricsDirectoryRunner'
+
+# Number of worker threads importing uploaded spreadsheets in the background within each server process
+UPLOAD_JOB_WORKERS = 2
+
+# Maximum number of worker processes reading the spreadsheets of a batch schedule upload at once
+UPLOAD_BATCH_PROCESSES = 4
+
+# Batches holding a single file, or whose files add up to no more than this many bytes, are read within the upload job
+# itself, as handing them to the worker processes would cost more than reading them
+UPLOAD_BATCH_IN_PROCESS_SIZE = 1024 * 1024
+
+# Whether the peak memory allocated during each stage of an upload is traced. Tracing slows every allocation made by the
+# process while an upload runs, so it is off by default.
+UPLOAD_TRACE_MEMORY = os.getenv('UPLOAD_TRACE_MEMORY', 'False') == 'True'
+
+# Uploaded files are always streamed to a temporary file on disk and hashed as they are received
+# https://docs.djangoproject.com/en/5.0/ref/settings/#file-upload-handlers
+FILE_UPLOAD_HANDLERS = ['api.upload_handlers.HashingTemporaryFileUploadHandler']
+
+# Largest uploaded file accepted, in bytes
+MAX_UPLOAD_SIZE = 50 * 1024 * 1024
+
+# Directory shared by every server process for merging the metrics exposed at /api/metrics/, and the minimum number of
+# seconds between each process writing its metrics to the directory. Metrics files not written to within
+# METRICS_RETENTION seconds are assumed to belong to processes that have exited and are removed when the metrics are
+# collected.
+METRICS_DIRECTORY = os.getenv('METRICS_DIRECTORY', str(BASE_DIR / 'logs' / 'metrics'))
+METRICS_FLUSH_INTERVAL = 5
+METRICS_RETENTION = 15 * 60
+
+# Directory holding the profiles of requests profiled by staff members, and the number of functions listed within the
+# summary of each profile
+PROFILING_DIRECTORY = str(BASE_DIR / 'logs')
+PROFILING_TOP_FUNCTIONS = 30
+
+# Number of seconds a database query can take before it is logged as a slow query
+SLOW_QUERY_THRESHOLD = float(os.getenv('SLOW_QUERY_THRESHOLD', '0.1'))
+
+# Maximum number of log messages waiting to be written, beyond which new messages are dropped (0 writes every message
+# from the thread logging it instead)
+LOG_QUEUE_SIZE = 10000
+
+# Number of times each message below WARNING can be logged within each interval of LOG_SAMPLING_INTERVAL seconds, after
+# which only one in every LOG_SAMPLING_RATE is logged. The number of dropped and sampled messages is logged once per
+# interval.
+LOG_SAMPLING_INTERVAL = 60
+LOG_SAMPLING_BURST = 100
+LOG_SAMPLING_RATE = 100
+
+# Fraction of requests for the analytics whose result is also calculated by the set-based services in the background
+# and compared with the result served by the legacy engine (0 turns shadow comparisons off). At most SHADOW_MAX_PENDING
+# comparisons wait to run at once, with any further sampled requests skipped.
+SHADOW_SAMPLE_RATE = float(os.getenv('SHADOW_SAMPLE_RATE', '0'))
+SHADOW_MAX_PENDING = 4
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -6,18 +6,26 @@ import KeyboardArrowUpIcon from "@mui/icons-material/KeyboardArrowUp";
 import KeyboardArrowDownIcon from "@mui/icons-material/KeyboardArrowDown";
 import CloudUploadIcon from '@mui/icons-material/CloudUpload';
 
+// Number of milliseconds between checks on the progress of an upload
+const UPLOAD_POLL_INTERVAL = 1000;
+// Number of invalid values listed when an upload fails
+const MAX_SHOWN_ROW_ERRORS = 10;
+
 
 /**
- * Displays the page for uploading Excel spreadsheets (either for course schedule or classroom data). The data from the
- * uploaded spreadsheet replaces any data currently in the database.
+ * Displays the page for uploading Excel spreadsheets or CSV files (either for course schedule or classroom data). The
+ * data from the uploaded spreadsheet replaces any data currently in the database.
  *
  * @author Ryan Johnson
  */
 export default function FileUpload() {
     const [missingColumns, setMissingColumns] = useState("");
+    const [rowErrors, setRowErrors] = useState([]);
     const [fileErrorShowing, setFileErrorShowing] = useState(false);
     const [successText, setSuccessText] = useState(false);
     const [uploadingText, setUploadingText] = useState(false);
+    const [uploadProgress, setUploadProgress] = useState("");
+    const [uploadFailureText, setUploadFailureText] = useState("");
     const [scheduleFile, setScheduleFile] = useState();
     const [classroomFile, setClassroomFile] = useState();
     const [uploadOptionDropdownStatus, setUploadOptionDropdownStatus] = useState({
@@ -42,10 +50,9 @@ export default function FileUpload() {
     }
 
     /**
-     * Sends the uploaded file to the Django endpoint '/upload_file/', where the ORM is used to create objects with the
-     * file data and populate the database. Depending on the success of loading the data into the database, a
-     * success/error message is shown on the screen before the file is reset, ready for another upload. Should the upload
-     * result in an error, the missing columns resulting in the error are displayed.
+     * Sends the uploaded file to the Django endpoint '/upload_file/', where a background job uses the ORM to create
+     * objects with the file data and populate the database. The job's progress is then polled until the upload
+     * finishes, while the file is reset, ready for another upload.
      *
      * @param e Event indicating that the form has been submitted
      */
@@ -76,25 +83,26 @@ export default function FileUpload() {
         setUploadingText(true);
         setSuccessText(false);
         setFileErrorShowing(false);
+        setUploadFailureText("");
 
-        // Displays a success/error message, depending on the success of loading the data into the database.
+        // The upload is imported in the background, so the job is polled until the import finishes
         axios.post("/api/upload_file/", formData, {
             headers: {
                 'content-type': 'multipart/form-data',
             }
         }).then(res => {
-            if (!res.data['success']) {
-                // Shows the error message if the file has invalid column names or isn't a .xlsx file
-                setUploadingText(false);
-                setSuccessText(false);
-                setFileErrorShowing(true);
-                setMissingColumns(res.data['missingColumns'].join(', '));
+            if (res.data['unchanged']) {
+                // The file matches the current data, so nothing was imported and there is no job to poll
+                showUploadSuccess();
             } else {
-                // Shows the success text upon a successful file upload
-                setUploadingText(false);
-                setSuccessText(true);
-                setFileErrorShowing(false);
-                setMissingColumns("");
+                pollUploadStatus(res.data['jobId']);
+            }
+        }).catch(error => {
+            // Files over the upload size limit are rejected before they are saved
+            if (error.response && error.response.status === 413) {
+                showUploadFailure("This file is too large to upload.");
+            } else {
+                showUploadFailure("The file could not be uploaded. Please try again.");
             }
         });
 
@@ -106,6 +114,65 @@ export default function FileUpload() {
         }
     }
 
+    /**
+     * Repeatedly checks the Django endpoint '/upload_status/' for the progress of a background upload job until the
+     * import finishes. While the job is running, the number of rows imported so far is shown. Once the job completes,
+     * a success/error message is shown on the screen. Should the upload result in an error, the missing columns
+     * resulting in the error are displayed.
+     *
+     * @param jobId  ID of the upload job returned when the file was submitted
+     */
+    const pollUploadStatus = (jobId) => {
+        axios.get(`/api/upload_status/${jobId}/`).then(res => {
+            if (res.data['phase'] === "complete") {
+                showUploadSuccess();
+            } else if (res.data['phase'] === "failed") {
+                // Shows the error message if the file has invalid column names, invalid values, or isn't a .xlsx/.csv
+                // file
+                setUploadingText(false);
+                setUploadProgress("");
+                setSuccessText(false);
+                setFileErrorShowing(true);
+                setMissingColumns(res.data['missingColumns'].join(', '));
+                setRowErrors((res.data['summary']['errors'] || []).slice(0, MAX_SHOWN_ROW_ERRORS));
+            } else {
+                if (res.data['rowsTotal'] > 0) {
+                    setUploadProgress(`${res.data['rowsProcessed']} of ${res.data['rowsTotal']} rows imported`);
+                }
+                setTimeout(() => pollUploadStatus(jobId), UPLOAD_POLL_INTERVAL);
+            }
+        }).catch(() => {
+            showUploadFailure("The progress of the upload could not be found. Please try uploading the file again.");
+        });
+    }
+
+    /**
+     * Shows the success text upon a successful file upload, hiding any earlier upload progress or errors.
+     */
+    const showUploadSuccess = () => {
+        setUploadingText(false);
+        setUploadProgress("");
+        setSuccessText(true);
+        setFileErrorShowing(false);
+        setMissingColumns("");
+        setRowErrors([]);
+        setUploadFailureText("");
+    }
+
+    /**
+     * Shows a message explaining why an upload failed before its rows could be checked, such as the file being too
+     * large or the upload's progress no longer being available.
+     *
+     * @param message  Message describing why the upload failed
+     */
+    const showUploadFailure = (message) => {
+        setUploadingText(false);
+        setUploadProgress("");
+        setSuccessText(false);
+        setFileErrorShowing(false);
+        setUploadFailureText(message);
+    }
+
     /**
      * Toggles whether the given data type div block displays its form for uploading a spreadsheet. The data type div
      * blocks include the classroom block and the course schedule block. If either of these blocks is set to true, the
@@ -134,15 +201,26 @@ export default function FileUpload() {
     return (<div>
         <NavBar/>
         <h1 className="title-font">UPLOAD DATA</h1>
-        {uploadingText && <p className="info-text">Uploading...</p>}
+        {uploadingText && <p className="info-text">Uploading... {uploadProgress}</p>}
         {successText && <p className="info-text">File successfully uploaded.</p>}
-        {fileErrorShowing &&
+        {uploadFailureText && <p className="info-text">{uploadFailureText}</p>}
+        {fileErrorShowing && rowErrors.length === 0 &&
             <div>
                 <p className="info-text">This file has improper formatting. Add the following columns and then try
                     again:</p> <br/>
                 <p className="info-text">{missingColumns}</p>
             </div>
         }
+        {fileErrorShowing && rowErrors.length > 0 &&
+            <div>
+                <p className="info-text">This file has invalid values. Correct the following rows and then try
+                    again:</p> <br/>
+                {rowErrors.map(error =>
+                    <p className="info-text" key={`${error['row']}-${error['column']}`}>
+                        Row {error['row']}, {error['column']}: {error['message']} ("{error['value']}")
+                    </p>)}
+            </div>
+        }
 
         {/*Creates the dropdown for uploading schedule data*/}
         <div
@@ -159,7 +237,7 @@ export default function FileUpload() {
                 {uploadOptionDropdownStatus && uploadOptionDropdownStatus["schedule"] ? <div>
                     <form className="upload-area" id="schedule" onSubmit={handleSubmit} method="POST">
                         <div className="file-chooser-block">
-                            <input id="schedule-chooser" type="file" accept=".xls, .xlsx"
+                            <input id="schedule-chooser" type="file" accept=".xls, .xlsx, .csv"
                                    onChange={handleFileChange} hidden/>
                             <label htmlFor="schedule-chooser" className="file-chooser">
                                 <CloudUploadIcon/>
@@ -190,7 +268,7 @@ export default function FileUpload() {
                 {uploadOptionDropdownStatus && uploadOptionDropdownStatus["classroom"] ? <div>
                     <form className="upload-area" id="classroom" onSubmit={handleSubmit} method="POST">
                         <div className="file-chooser-block">
-                            <input id="classroom-chooser" type="file" accept=".xls, .xlsx"
+                            <input id="classroom-chooser" type="file" accept=".xls, .xlsx, .csv"
                                    onChange={handleFileChange} hidden/>
                             <label htmlFor="classroom-chooser" className="file-chooser">
                                 <CloudUploadIcon/>
@@ -27,6 +27,7 @@ export default function HeatmapSchedule() {
     const [buildingNames, setBuildingNames] = useState({});
     const filterButtonRef = useRef(null);
     const filterDropdownRef = useRef(false);
+    const skipNextLoad = useRef(false);
 
     /*
     Adds a mouse listener to the whole page for closing the filter with a click outside the filter. This listener is
@@ -44,13 +45,17 @@ export default function HeatmapSchedule() {
     useEffect(() => {
         /**
          * Fetches the data detailing the number of classes per time block from the database upon startup, reloading
-         * whenever the building filter is changed. Also loads the names of the buildings from the database for use
-         * in the buildings filter.
+         * whenever the building filter is changed. Upon startup, the names of the buildings used in the buildings
+         * filter are loaded within the same request as the campus-wide heatmap data.
          */
         async function fetchData() {
-            await loadData();
             if (firstRender) {
-                await loadFilter();
+                await loadBootstrap();
+            } else if (skipNextLoad.current) {
+                // The filter was only just created by the bootstrap request, which already loaded the campus-wide data
+                skipNextLoad.current = false;
+            } else {
+                await loadData();
             }
         }
 
@@ -66,10 +71,10 @@ export default function HeatmapSchedule() {
     }, [numberClasses]);
 
     /**
-     * Loads the classroom and building data from the database. The classroom data is stored within two dictionaries:
-     * the first contains the time block divisions for the selected buildings, and the second contains the number of
-     * classes running during each time block. Both of these dictionaries is used for heatmap display, showing the
-     * number of classrooms used during each time block. The building data is used for displaying the building filter.
+     * Loads the classroom data from the database for the buildings selected in the filter. The classroom data is stored
+     * within two dictionaries: the first contains the time block divisions for the selected buildings, and the second
+     * contains the number of classes running during each time block. Both of these dictionaries is used for heatmap
+     * display, showing the number of classrooms used during each time block.
      */
     const loadData = async () => {
         try {
@@ -85,14 +90,6 @@ export default function HeatmapSchedule() {
             const classesData = await axios.get("/api/get_number_classes", {params: {buildings: currentFilter}});
             setTimeBlocks(classesData.data[0]);
             setNumberClasses(classesData.data[1]);
-
-            // Loads the names of all buildings in the database for use in the filter
-            const buildingNamesData = await axios.get("/api/get_building_names");
-            // Add an empty selection to the BUILDINGS dict for selecting/deselecting all building boxes at once
-            buildingNamesData.data[""] = "SELECT ALL"
-            // Don't allow a filter for off-campus classes, since these have no classrooms at Carroll
-            delete buildingNamesData.data["OFCP"]
-            setBuildingNames(buildingNamesData.data);
         } catch (error) {
             console.error(error);
         }
@@ -115,15 +112,28 @@ export default function HeatmapSchedule() {
     }
 
     /**
-     * Fetches the names of all the building names from the database. These names are used for the building filter.
+     * Loads everything needed when the page first opens with a single request: the campus-wide heatmap data and the
+     * names of the buildings holding courses. The building names are used for creating the building filter, with
+     * every building initially unselected.
      */
-    const loadFilter = async () => {
-        const buildingNamesData = await axios.get("/api/get_building_names");
-        const filter = {}
-        Object.keys(buildingNamesData.data).forEach(item => {
-            filter[item] = false; // Initialize all filters to false
-        });
-        setBuildingFilter(filter)
+    const loadBootstrap = async () => {
+        try {
+            const bootstrapData = await axios.get("/api/get_bootstrap/");
+            setTimeBlocks(bootstrapData.data.numberClasses[0]);
+            setNumberClasses(bootstrapData.data.numberClasses[1]);
+
+            // Add an empty selection for selecting/deselecting all building boxes at once
+            const names = {"": "SELECT ALL", ...bootstrapData.data.buildings};
+            setBuildingNames(names);
+            const filter = {}
+            Object.keys(names).forEach(item => {
+                filter[item] = false; // Initialize all filters to false
+            });
+            skipNextLoad.current = true;
+            setBuildingFilter(filter)
+        } catch (error) {
+            console.error(error);
+        }
         setFirstRender(false)
     }
 
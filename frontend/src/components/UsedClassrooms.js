@@ -56,35 +56,23 @@ export default function UsedClassrooms() {
     /**
      * Loads the list of classrooms used during the specified time block on a given day. The time block on either side
      * of the one being currently viewed is stored for paging purposes, allowing the user to page through previous or
-     * future time blocks in the same classroom without leaving the page.
+     * future time blocks in the same classroom without leaving the page. The block, its classrooms, and the blocks on
+     * either side are all returned by a single request.
      */
     const loadData = async () => {
         try {
-            const usedClassroomsData = await axios.get("/api/get_used_classrooms/", {
+            const blockPageData = await axios.get("/api/get_block_page/", {
                 params: {
                     day: day,
                     buildings: buildingList,
-                    startTime: startTime,
-                    endTime: endTime
+                    time: startTime,
+                    direction: "next"
                 }
             });
-            const pastStartTimeData = await axios.get("/api/get_past_time/", {
-                params: {
-                    day: day,
-                    buildings: buildingList,
-                    currentStartTime: startTime
-                }
-            });
-            const nextEndTimeData = await axios.get("/api/get_next_time/", {
-                params: {
-                    day: day,
-                    buildings: buildingList,
-                    currentEndTime: endTime
-                }
-            });
-            setClassroomsData(usedClassroomsData.data);
-            setPastStartTime(pastStartTimeData.data);
-            setNextEndTime(nextEndTimeData.data);
+            const blockPage = blockPageData.data;
+            setClassroomsData(blockPage.usedClassrooms || {});
+            setPastStartTime(blockPage.previousBlock ? blockPage.previousBlock[0] : '');
+            setNextEndTime(blockPage.nextBlock ? blockPage.nextBlock[1] : '');
         } catch (error) {
             console.error(error);
         }